@@ -0,0 +1,908 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: benchmark.py
+- Descripción: mide el rendimiento del analizador (tiempos y memoria; las
+verificaciones de resultados están en tests/). Uso:
+    python3 benchmark.py quartiles [--stations N] [--circuits N]
+    python3 benchmark.py parser [directorio]
+    python3 benchmark.py store [directorio]
+    python3 benchmark.py sketch [--stations N] [--workers N] [--compression N]
+    python3 benchmark.py generate directorio [--circuits N] [--stations N]
+        [--parties N] [--anomalies F] [--seed N]
+    python3 benchmark.py suite [--sizes N,N,...] [--jobs N] [--output archivo]
+        [--baseline archivo] [--tolerance F]
+    python3 benchmark.py memory [--stations N]
+    python3 benchmark.py ingest [--sizes N,N,...] [--jobs N]
+    python3 benchmark.py startup [--repeat N] [--limit MS]
+    python3 benchmark.py baselines [--stations N] [--circuits N]
+    python3 benchmark.py sweep [--stations N] [--circuits N]
+        [--ponderations P,P,...]
+    python3 benchmark.py refresh [--requests N] [--concurrency N]
+        [--timeout S]
+- Autor: Agustín González.
+- Modificado: 17/10/26
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import json
+import os
+import pickle
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+from lib import utils
+from lib.analyzer import StatisticsAnalyzer, VotingStation
+from lib.analyzer import VotingStationCollection, VotingStationParser
+from lib.download import Downloader, RetryPolicy
+from lib.sketch import SketchStatistics, TDigest
+from lib.store import PackedStore, open_store
+from lib.synthetic import TelegramGenerator
+from main import analyze, parse_files
+
+
+# Tipos de voto y categorías simuladas (blanco, nulo y cinco partidos).
+VTYPES = 7
+CATEGORIES = 4
+
+# Etapas medidas por el modo suite, y etapas comparadas con --baseline (la
+# generación de telegramas no forma parte del analizador).
+STAGES = ("generate", "parse", "analysis", "report")
+COMPARED = ("parse", "analysis", "report")
+
+# Duración mínima (en segundos) de una etapa para considerarla regresión (por
+# debajo, la medición es mayormente ruido).
+MIN_SECONDS = 0.1
+
+# Comandos medidos por el modo startup (argumentos de cli.py).
+STARTUP_COMMANDS = (("--help",), ("report",), ("analyze", "--help"))
+
+
+def synthetic_counts(nstations, ncircuits, seed=0):
+    """Genera conteos sintéticos de votos.
+
+    Returns:
+        counts (list): por mesa, lista (tipos de voto x categorías) de votos.
+        labels (list): circuito (entero) de cada mesa."""
+
+    rnd = random.Random(seed)
+    counts = []
+    labels = []
+    for i in range(nstations):
+        labels.append(i % ncircuits)
+        counts.append([[max(1, int(rnd.gauss(40, 15)))
+                        for _ in range(CATEGORIES)] for _ in range(VTYPES)])
+    return counts, labels
+
+
+def bench_python(counts, labels, ncircuits):
+    """Calcula los límites con StatisticsAnalyzer (una muestra por circuito,
+    tipo de voto y categoría)."""
+
+    samples = {}
+    for station, label in zip(counts, labels):
+        for v in range(VTYPES):
+            for c in range(CATEGORIES):
+                samples.setdefault((label, v, c), []).append(station[v][c])
+
+    limits = {}
+    for key, sample in samples.items():
+        statistics = StatisticsAnalyzer(sample)
+        limits[key] = (statistics.lower_limit(), statistics.upper_limit())
+    return limits
+
+
+def pack(counts, labels):
+    """Empaqueta los conteos en arreglos de NumPy."""
+    import numpy as np
+    return np.array(counts), np.array(labels)
+
+
+def bench_numpy(counts, labels, ncircuits):
+    """Calcula los límites con el motor vectorizado (conteos empaquetados)."""
+
+    from lib.vectorized import VectorizedStatistics
+
+    statistics = VectorizedStatistics(counts, labels)
+
+    # Se incluye el cálculo de máscaras de valores atípicos.
+    statistics.lower_mask()
+    statistics.upper_mask()
+
+    limits = {}
+    for label in range(ncircuits):
+        for v in range(VTYPES):
+            for c in range(CATEGORIES):
+                key = (label, v, c)
+                limits[key] = (statistics.lower[key], statistics.upper[key])
+    return limits
+
+
+def timed(function, *args):
+    """Ejecuta la función y retorna (resultado, segundos)."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def parse_bs4(htmls, political_parties):
+    """Parsea los telegramas mediante BeautifulSoup."""
+    settings = utils.settings()
+    return [VotingStationParser(html, settings).to_record()
+            for html in htmls]
+
+
+def parse_lxml(htmls, political_parties):
+    """Parsea los telegramas mediante el parser rápido."""
+    from lib import telegram
+    return [telegram.parse(html, political_parties) for html in htmls]
+
+
+def bench_parser(options):
+    """Compara los parsers de telegramas."""
+
+    settings = utils.settings()
+    dir = options.dir or settings.webcache_dir
+    political_parties = settings.party_keys
+
+    htmls = []
+    for filename in sorted(f for f in next(os.walk(dir))[2]
+                           if f.endswith(".htm")):
+        file = open(dir + "/" + filename)
+        htmls.append(file.read())
+        file.close()
+
+    print("Parseando {0} telegramas...".format(len(htmls)))
+
+    srecords, stime = timed(parse_bs4, htmls, political_parties)
+    print("BeautifulSoup: {0:.0f} mesas/s".format(len(htmls) / stime))
+
+    lrecords, ltime = timed(parse_lxml, htmls, political_parties)
+    print("lxml: {0:.0f} mesas/s (x{1:.1f})".format(len(htmls) / ltime,
+                                                   stime / ltime))
+
+
+def read_files(dir, filenames):
+    """Lee los telegramas indicados (un archivo por telegrama)."""
+    contents = []
+    for filename in filenames:
+        file = open(os.path.join(dir, filename), "rb")
+        contents.append(file.read())
+        file.close()
+    return contents
+
+
+def read_store(store, filenames):
+    """Lee los telegramas indicados del almacén."""
+    return [store.read(filename) for filename in filenames]
+
+
+def disk_usage(paths):
+    """Retorna el espacio en disco (en bytes) de los archivos indicados."""
+    return sum(os.stat(path).st_blocks * 512 for path in paths)
+
+
+def bench_store(options):
+    """Compara los layouts de caché web."""
+
+    settings = utils.settings()
+    dir = options.dir or settings.webcache_dir
+    filenames = sorted(f for f in os.listdir(dir) if f.endswith(".htm"))
+
+    temp = tempfile.mkdtemp()
+    try:
+        print("Empaquetando {0} telegramas...".format(len(filenames)))
+        store = PackedStore(temp)
+        contents, _ = timed(read_files, dir, filenames)
+        for filename, content in zip(filenames, contents):
+            store.store(filename, "", 200, content)
+        store.close()
+
+        _, dtime = timed(read_files, dir, filenames)
+        dsize = disk_usage(os.path.join(dir, f) for f in filenames)
+        print("Directorio: {0:.0f} mesas/s, {1:.1f} MB".format(
+            len(filenames) / dtime, dsize / 2 ** 20))
+
+        store = PackedStore(temp)
+        _, ptime = timed(read_store, store, filenames)
+        store.close()
+        psize = disk_usage(os.path.join(temp, f) for f in os.listdir(temp))
+        print("Empaquetado: {0:.0f} mesas/s (x{1:.1f}), {2:.1f} MB".format(
+            len(filenames) / ptime, dtime / ptime, psize / 2 ** 20))
+    finally:
+        shutil.rmtree(temp)
+
+
+def bench_sketch(options):
+    """Compara el estimador aproximado de cuartiles con el exacto."""
+
+    rnd = random.Random(0)
+    nstations = options.stations
+    nworkers = options.workers
+
+    print("Generando {0} conteos...".format(nstations))
+    sample = [max(1, int(rnd.gauss(40, 15))) for _ in range(nstations)]
+
+    # Un sketch por proceso (cada uno resume una parte del flujo), y combina-
+    # ción de los resultados.
+    def summarize():
+        digests = [TDigest(options.compression) for _ in range(nworkers)]
+        for i, digest in enumerate(digests):
+            digest.update(sample[i::nworkers])
+        for digest in digests[1:]:
+            digests[0].merge(digest)
+        return digests[0]
+
+    digest, stime = timed(summarize)
+    print("t-digest: {0:.3f} s, {1} centroides".format(
+        stime, len(digest.centroids())))
+
+    exact, etime = timed(StatisticsAnalyzer, list(sample))
+    print("Exacto: {0:.3f} s".format(etime))
+
+    estimated = SketchStatistics(digest)
+    print("Límites: estimados ({0:.2f}, {1:.2f}), exactos ({2:.2f}, "
+          "{3:.2f})".format(estimated.lower_limit(), estimated.upper_limit(),
+                            exact.lower_limit(), exact.upper_limit()))
+
+
+def bench_quartiles(options):
+    """Compara los motores de estadísticas."""
+
+    nstations = options.stations
+    ncircuits = options.circuits
+
+    print("Generando {0} mesas en {1} circuitos...".format(nstations,
+                                                          ncircuits))
+    counts, labels = synthetic_counts(nstations, ncircuits)
+
+    plimits, ptime = timed(bench_python, counts, labels, ncircuits)
+    print("Python: {0:.3f} s".format(ptime))
+
+    packed, ktime = timed(pack, counts, labels)
+    print("Empaquetado: {0:.3f} s".format(ktime))
+
+    nlimits, ntime = timed(bench_numpy, packed[0], packed[1], ncircuits)
+    print("NumPy: {0:.3f} s (x{1:.1f})".format(ntime, ptime / ntime))
+
+
+def circuit_names(ncircuits):
+    """Retorna nombres de circuitos sintéticos."""
+    return ["{0:04d}".format(i + 1) for i in range(ncircuits)]
+
+
+def bench_generate(options):
+    """Escribe telegramas sintéticos en el directorio indicado."""
+
+    settings = utils.settings()
+    parties = list(settings.party_values)
+    for i in range(len(parties), options.parties):
+        parties.append("Lista {0}".format(i + 1))
+
+    generator = TelegramGenerator(circuit_names(options.circuits),
+                                  options.stations,
+                                  parties[:options.parties],
+                                  options.anomalies,
+                                  settings.impugned_votes_admitted,
+                                  options.seed)
+
+    store = open_store(settings._replace(webcache_dir=options.dir))
+    count, gtime = timed(generator.write, store)
+    store.close()
+
+    print("Telegramas generados: {0} ({1:.0f} mesas/s), con {2} anomalías."
+          .format(count, count / gtime, len(generator.planted)))
+    print("Rangos: {0}".format(", ".join(
+        "{0}-{1}".format(init, end) for circuit, init, end
+        in generator.ranges())))
+
+
+def synthetic_records(settings, nstations, ncircuits):
+    """Genera y parsea telegramas sintéticos (sin anomalías adicionales) de
+    nstations mesas en ncircuits circuitos, con los partidos de la configura-
+    ción.
+
+    Returns:
+        records (list): registros de las mesas (ver VotingStation.to_record),
+        en el orden de los circuitos y mesas."""
+
+    generator = TelegramGenerator(
+        circuit_names(ncircuits), nstations // ncircuits,
+        settings.party_values,
+        impugned_admitted=settings.impugned_votes_admitted)
+
+    print("Generando {0} mesas...".format(nstations))
+    return [VotingStation.parse_record(html, settings)
+            for circuit, number, html in generator.telegrams()]
+
+
+def analyze_records(records, settings):
+    """Analiza los registros indicados (sin salida por pantalla)."""
+    devnull = open(os.devnull, "w")
+    try:
+        with contextlib.redirect_stdout(devnull):
+            vstations = [VotingStation.from_record(r) for r in records]
+            return VotingStationCollection(vstations, settings)
+    finally:
+        devnull.close()
+
+
+def bench_size(settings, nstations, options):
+    """Mide las etapas del analizador sobre nstations telegramas sintéticos.
+
+    Returns:
+        result (dict): cantidad de mesas y circuitos, segundos por etapa,
+        mesas por segundo por etapa, anomalías introducidas y mesas con ob-
+        servaciones."""
+
+    ncircuits = max(1, nstations // options.per_circuit)
+    per_circuit = nstations // ncircuits
+
+    temp = tempfile.mkdtemp()
+    try:
+        settings = settings._replace(
+            webcache_dir=os.path.join(temp, "response"),
+            statistics_dir=os.path.join(temp, "statistics"),
+            reports_dir=os.path.join(temp, "reports"),
+            parsed_cache="")
+
+        generator = TelegramGenerator(circuit_names(ncircuits), per_circuit,
+                                      settings.party_values, options.anomalies,
+                                      settings.impugned_votes_admitted)
+
+        times = {}
+        store = open_store(settings)
+        count, times["generate"] = timed(generator.write, store)
+        filenames = sorted(store.files())
+
+        def parse():
+            return list(parse_files(filenames, options.jobs, settings, store))
+
+        results, times["parse"] = timed(parse)
+        store.close()
+
+        errors = sum(1 for record, error in results if error)
+        records = [record for record, error in results if not error]
+        results = None
+
+        collection, times["analysis"] = timed(analyze_records, records,
+                                              settings)
+        _, times["report"] = timed(collection.save_analysis)
+        summary = collection.summary()
+    finally:
+        shutil.rmtree(temp)
+
+    return {"stations": count,
+            "circuits": ncircuits,
+            "seconds": times,
+            "stations_per_second": {stage: count / times[stage]
+                                    for stage in STAGES},
+            "planted": len(generator.planted),
+            "remarked": sum(remarked for circuit, stations, remarked
+                            in summary),
+            "errors": errors}
+
+
+def revision():
+    """Retorna el commit (git) actual, si está disponible."""
+    try:
+        output = subprocess.check_output(["git", "rev-parse", "--short",
+                                          "HEAD"], stderr=subprocess.DEVNULL)
+        return output.decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(results, baseline, tolerance):
+    """Compara los resultados con los de una ejecución previa (mismas canti-
+    dades de mesas).
+
+    Returns:
+        regressions (int): cantidad de etapas más lentas que la tolerancia."""
+
+    previous = {result["stations"]: result for result in baseline["results"]}
+    regressions = 0
+
+    print("\nComparación con {0} ({1}):".format(
+        baseline.get("revision") or "ejecución previa",
+        baseline.get("date", "")))
+
+    for result in results:
+        before = previous.get(result["stations"])
+        if before is None:
+            continue
+
+        for stage in COMPARED:
+            ratio = result["seconds"][stage] / before["seconds"][stage]
+            regression = ratio > 1 + tolerance and \
+                result["seconds"][stage] >= MIN_SECONDS
+            regressions += regression
+            print("{0} mesas, {1}: x{2:.2f}{3}".format(
+                result["stations"], stage, ratio,
+                " (regresión)" if regression else ""))
+
+    return regressions
+
+
+def bench_suite(options):
+    """Mide el parseo, el análisis y la escritura del análisis sobre tele-
+    gramas sintéticos de distintas escalas."""
+
+    settings = utils.settings()
+    sizes = [int(size) for size in options.sizes.split(",")]
+
+    results = []
+    for nstations in sizes:
+        print("Midiendo {0} mesas...".format(nstations))
+        result = bench_size(settings, nstations, options)
+        results.append(result)
+
+        print(", ".join("{0}: {1:.3f} s ({2:.0f} mesas/s)".format(
+            stage, result["seconds"][stage],
+            result["stations_per_second"][stage]) for stage in STAGES))
+        print("Anomalías introducidas: {0}, mesas con observaciones: {1}, "
+              "errores de parseo: {2}.".format(result["planted"],
+                                               result["remarked"],
+                                               result["errors"]))
+
+    output = {"revision": revision(),
+              "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": platform.python_version(),
+              "parser": settings.parser_backend,
+              "engine": settings.engine,
+              "estimator": settings.estimator,
+              "layout": settings.webcache_layout,
+              "jobs": options.jobs,
+              "results": results}
+
+    file = open(options.output, "w")
+    json.dump(output, file, indent=2)
+    file.write("\n")
+    file.close()
+    print("Resultados: {0}".format(options.output))
+
+    if options.baseline:
+        file = open(options.baseline)
+        baseline = json.load(file)
+        file.close()
+
+        if compare(results, baseline, options.tolerance) > 0:
+            print("Hay etapas más lentas que la tolerancia ({0:.0%})."
+                  .format(options.tolerance))
+            return 1
+
+    if any(result["errors"] for result in results):
+        print("Hubo errores de parseo de telegramas sintéticos.")
+        return 1
+
+
+# Revisión con la representación previa a la mesa compacta (objetos con dic-
+# cionario por instancia), con la que se compara la memoria por mesa (ver
+# modo memory).
+LEGACY_REVISION = "7416f6a^"
+
+
+def legacy_station():
+    """Retorna la clase VotingStation de la revisión previa a la mesa compac-
+    ta (ver LEGACY_REVISION), cargando el módulo lib/analyzer.py de esa revi-
+    sión desde el repositorio git.
+
+    Returns:
+        vstation (class): VotingStation previa (ver VotingStation.from_re-
+        cord)."""
+
+    source = subprocess.check_output(
+        ["git", "show", LEGACY_REVISION + ":lib/analyzer.py"],
+        cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    module = types.ModuleType("legacy_analyzer")
+    exec(compile(source, "legacy_analyzer.py", "exec"), module.__dict__)
+    return module.VotingStation
+
+
+def bench_memory(options):
+    """Mide la memoria por mesa de una colección de mesas sintéticas, y la
+    compara con la de la representación previa (ver legacy_station)."""
+
+    try:
+        LegacyStation = legacy_station()
+    except (OSError, subprocess.CalledProcessError):
+        print("No se pudo obtener la representación previa ({0}) del reposi-"
+              "torio git.".format(LEGACY_REVISION))
+        return 1
+
+    settings = utils.settings()
+    ncircuits = max(1, options.stations // 250)
+
+    # Registros serializados (como en la caché de registros parseados), para
+    # que las mesas no compartan strings con los registros.
+    blobs = [pickle.dumps(record) for record
+             in synthetic_records(settings, options.stations, ncircuits)]
+
+    # Representación previa (en la misma ejecución, y liberada antes de me-
+    # dir la compacta).
+    tracemalloc.start()
+    try:
+        vstations = [LegacyStation.from_record(pickle.loads(blob))
+                     for blob in blobs]
+        legacy = tracemalloc.get_traced_memory()[0] / len(vstations)
+        vstations = None
+    finally:
+        tracemalloc.stop()
+
+    tracemalloc.start()
+    try:
+        vstations = [VotingStation.from_record(pickle.loads(blob))
+                     for blob in blobs]
+        loaded = tracemalloc.get_traced_memory()[0] / len(vstations)
+
+        # Análisis (observaciones y estadísticas de los circuitos).
+        with open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(devnull):
+                collection = VotingStationCollection(vstations, settings)
+        analyzed = tracemalloc.get_traced_memory()[0] / len(vstations)
+    finally:
+        tracemalloc.stop()
+
+    print("Mesas (representación previa): {0:.0f} bytes/mesa".format(legacy))
+    print("Mesas: {0:.0f} bytes/mesa (x{1:.1f} menos)".format(
+        loaded, legacy / loaded))
+    print("Colección analizada ({0} mesas con observaciones): {1:.0f} "
+          "bytes/mesa".format(sum(remarked for circuit, count, remarked
+                                  in collection.summary()), analyzed))
+
+
+def measure_ingest(settings, jobs):
+    """Analiza la caché web de la configuración (ver main.analyze), midiendo
+    la memoria.
+
+    Returns:
+        result (tuple): (bytes retenidos por la colección, bytes transitorios
+        (pico menos retenidos))."""
+
+    devnull = open(os.devnull, "w")
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(devnull):
+            collection = analyze(settings, jobs)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        devnull.close()
+
+    del collection
+    return current, peak - current
+
+
+def bench_ingest(options):
+    """Mide la memoria retenida y transitoria de la ingesta a distintas esca-
+    las."""
+
+    settings = utils.settings()
+    sizes = [int(size) for size in options.sizes.split(",")]
+
+    # Memoria transitoria, por escala, sin (cold) y con (warm) caché.
+    transient = {"cold": [], "warm": []}
+
+    for nstations in sizes:
+        ncircuits = max(1, nstations // 250)
+        generator = TelegramGenerator(circuit_names(ncircuits),
+                                      nstations // ncircuits,
+                                      settings.party_values)
+
+        temp = tempfile.mkdtemp()
+        try:
+            dsettings = settings._replace(
+                webcache_dir=os.path.join(temp, "response"),
+                parsed_cache=os.path.join(temp, "parsed.sqlite"))
+
+            store = open_store(dsettings)
+            count = generator.write(store)
+            store.close()
+            size = sum(os.path.getsize(os.path.join(root, f))
+                       for root, dirs, files in os.walk(dsettings.webcache_dir)
+                       for f in files)
+
+            for run in ("cold", "warm"):
+                retained, extra = measure_ingest(dsettings, options.jobs)
+                transient[run].append(extra)
+                print("{0} mesas ({1:.0f} bytes/telegrama), {2}: colección "
+                      "{3:.0f} bytes/mesa, transitoria {4} KiB".format(
+                          count, size / count, run, retained / count,
+                          extra // 1024))
+        finally:
+            shutil.rmtree(temp)
+
+    added = sizes[-1] - sizes[0]
+    for run, values in sorted(transient.items()):
+        growth = (values[-1] - values[0]) / added if added else 0
+        print("Crecimiento de memoria transitoria ({0}): {1:.0f} bytes/mesa"
+              .format(run, growth))
+
+
+def import_times(args):
+    """Ejecuta python -X importtime con los argumentos indicados.
+
+    Returns:
+        times (dict): módulo -> (tiempo propio, tiempo acumulado), en micro-
+        segundos."""
+
+    process = subprocess.run([sys.executable, "-X", "importtime"] + args,
+                             stdout=subprocess.DEVNULL,
+                             stderr=subprocess.PIPE,
+                             universal_newlines=True)
+
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        fields = line[len("import time:"):].split("|")
+        try:
+            times[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+        except (IndexError, ValueError):
+            # Encabezado.
+            continue
+
+    return times
+
+
+def bench_startup(options):
+    """Mide el tiempo de importación de los subcomandos livianos."""
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "cli.py")
+
+    failed = False
+    for command in STARTUP_COMMANDS:
+        # Se considera la mejor de varias ejecuciones.
+        runs = [import_times([script] + list(command))
+                for _ in range(options.repeat)]
+        totals = [sum(own for own, cumulative in times.values())
+                  for times in runs]
+        times = runs[totals.index(min(totals))]
+        total = min(totals) / 1000
+
+        slowest = sorted(times.items(), key=lambda item: -item[1][1])[:3]
+        print("cli.py {0}: {1:.1f} ms, {2} módulos (mayor tiempo acumulado: "
+              "{3})".format(" ".join(command), total, len(times), ", ".join(
+                  "{0} {1:.1f} ms".format(module, cumulative / 1000)
+                  for module, (own, cumulative) in slowest)))
+
+        if total > options.limit:
+            print("El tiempo de importación supera el límite ({0} ms)."
+                  .format(options.limit))
+            failed = True
+
+    if failed:
+        return 1
+
+
+def bench_baselines(options):
+    """Compara el análisis con una y con todas las líneas de base."""
+
+    settings = utils.settings()
+    records = synthetic_records(settings, options.stations, options.circuits)
+
+    engines = ["python"]
+    if importlib.util.find_spec("numpy") is not None:
+        engines.append("numpy")
+    else:
+        print("NumPy no está instalado: sólo se mide el motor python.")
+
+    for baselines in (("circuit",), utils.BASELINES):
+        for engine in engines:
+            collection, seconds = timed(analyze_records, records,
+                                        settings._replace(
+                                            baselines=baselines,
+                                            engine=engine,
+                                            estimator="exact"))
+            metrics = collection.metrics()
+
+            levels = {}
+            for record in collection.remark_records():
+                if record[6]:
+                    levels[record[6]] = levels.get(record[6], 0) + 1
+
+            print("{0} ({1}): análisis {2:.3f} s, estadísticas {3:.3f} s "
+                  "({4} calculadas), observaciones por nivel: {5}".format(
+                      ", ".join(baselines), engine, seconds,
+                      metrics["statistics_seconds"],
+                      metrics["statistics_computed"],
+                      ", ".join("{0} {1}".format(level, count)
+                                for level, count in levels.items())))
+
+
+def bench_sweep(options):
+    """Compara el tiempo de la verificación de varias ponderaciones de IQR
+    en una única pasada con el de un análisis completo por ponderación."""
+
+    settings = utils.settings()
+    ponderations = [float(p) for p in options.ponderations.split(",")]
+    records = synthetic_records(settings, options.stations, options.circuits)
+
+    def sweep():
+        collection = analyze_records(records, settings)
+        return collection.sweep(ponderations)
+
+    (summary, stations), stime = timed(sweep)
+    print("Pasada única ({0} ponderaciones): {1:.3f} s".format(
+        len(ponderations), stime))
+
+    rtime = 0
+    for ponderation in ponderations:
+        collection, seconds = timed(analyze_records, records,
+                                    settings._replace(
+                                        iqr_ponderation=ponderation))
+        rtime += seconds
+
+    print("Análisis completo por ponderación: {0:.3f} s (x{1:.1f})".format(
+        rtime, rtime / stime))
+
+
+async def not_modified(reader, writer):
+    """Atiende una conexión keep-alive del servidor del modo refresh: res-
+    ponde cada request con 304 Not Modified, sin cuerpo ni Content-Length."""
+
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            while line not in (b"\r\n", b"\n", b""):
+                line = await reader.readline()
+
+            writer.write(b"HTTP/1.1 304 Not Modified\r\n"
+                         b"ETag: \"telegrama\"\r\n\r\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def refresh_local(requests, concurrency, timeout):
+    """Descarga urls del servidor local del modo refresh (ver not_modified).
+
+    Args:
+        requests (int): cantidad de urls.
+        concurrency (int): conexiones simultáneas.
+        timeout (float): timeout (en segundos) de cada descarga.
+
+    Returns:
+        result (tuple): (statuses, fallas)."""
+
+    server = await asyncio.start_server(not_modified, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    statuses = []
+    failures = []
+    jobs = [(i, "/telegrama_{0}.htm".format(i),
+             {"If-None-Match": "\"telegrama\""})
+            for i in range(requests)]
+
+    def handler(key, url, status, headers, body):
+        statuses.append(status)
+
+    def failure(key, url, error):
+        failures.append(error)
+
+    try:
+        downloader = Downloader("127.0.0.1", concurrency, port=port,
+                                policy=RetryPolicy(retries=0),
+                                timeout=timeout)
+        await downloader.run(jobs, handler, failure=failure)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    return statuses, failures
+
+
+def bench_refresh(options):
+    """Mide las re-consultas condicionales (304) del motor de descarga."""
+
+    (statuses, failures), seconds = timed(asyncio.run,
+                                          refresh_local(options.requests,
+                                                        options.concurrency,
+                                                        options.timeout))
+
+    print("Requests: {0}, 304: {1}, fallidos: {2} ({3:.3f} s, {4:.0f} "
+          "requests/s)".format(options.requests, statuses.count(304),
+                               len(failures), seconds,
+                               options.requests / seconds))
+
+
+def main(args):
+    """Punto de entrada."""
+
+    parser = argparse.ArgumentParser(description="Benchmark del analizador.")
+    modes = parser.add_subparsers(dest="mode")
+    modes.required = True
+
+    quartiles = modes.add_parser("quartiles", help="motores de estadísticas")
+    quartiles.add_argument("--stations", type=int, default=300000)
+    quartiles.add_argument("--circuits", type=int, default=600)
+    quartiles.set_defaults(function=bench_quartiles)
+
+    parsers = modes.add_parser("parser", help="parsers de telegramas")
+    parsers.add_argument("dir", nargs="?", default="")
+    parsers.set_defaults(function=bench_parser)
+
+    sketch = modes.add_parser("sketch", help="estimador aproximado")
+    sketch.add_argument("--stations", type=int, default=1000000)
+    sketch.add_argument("--workers", type=int, default=4)
+    sketch.add_argument("--compression", type=float, default=100)
+    sketch.set_defaults(function=bench_sketch)
+
+    stores = modes.add_parser("store", help="layouts de caché web")
+    stores.add_argument("dir", nargs="?", default="")
+    stores.set_defaults(function=bench_store)
+
+    generate = modes.add_parser("generate", help="telegramas sintéticos")
+    generate.add_argument("dir")
+    generate.add_argument("--circuits", type=int, default=4)
+    generate.add_argument("--stations", type=int, default=250)
+    generate.add_argument("--parties", type=int, default=5)
+    generate.add_argument("--anomalies", type=float, default=0.05)
+    generate.add_argument("--seed", type=int, default=0)
+    generate.set_defaults(function=bench_generate)
+
+    suite = modes.add_parser("suite", help="parseo, análisis y escritura")
+    suite.add_argument("--sizes", default="1000,10000,100000")
+    suite.add_argument("--per-circuit", type=int, default=250)
+    suite.add_argument("--anomalies", type=float, default=0.05)
+    suite.add_argument("--jobs", type=int, default=1)
+    suite.add_argument("--output", default="benchmark.json")
+    suite.add_argument("--baseline", default="")
+    suite.add_argument("--tolerance", type=float, default=0.25)
+    suite.set_defaults(function=bench_suite)
+
+    memory = modes.add_parser("memory", help="memoria por mesa")
+    memory.add_argument("--stations", type=int, default=10000)
+    memory.set_defaults(function=bench_memory)
+
+    ingests = modes.add_parser("ingest", help="memoria de la ingesta")
+    ingests.add_argument("--sizes", default="1000,4000")
+    ingests.add_argument("--jobs", type=int, default=1)
+    ingests.set_defaults(function=bench_ingest)
+
+    startup = modes.add_parser("startup", help="tiempo de importación")
+    startup.add_argument("--repeat", type=int, default=5)
+    startup.add_argument("--limit", type=float, default=150)
+    startup.set_defaults(function=bench_startup)
+
+    baselines = modes.add_parser("baselines", help="líneas de base")
+    baselines.add_argument("--stations", type=int, default=20000)
+    baselines.add_argument("--circuits", type=int, default=80)
+    baselines.set_defaults(function=bench_baselines)
+
+    sweeps = modes.add_parser("sweep", help="ponderaciones de IQR")
+    sweeps.add_argument("--stations", type=int, default=20000)
+    sweeps.add_argument("--circuits", type=int, default=80)
+    sweeps.add_argument("--ponderations", default="0.5,1.0,1.5,3.0")
+    sweeps.set_defaults(function=bench_sweep)
+
+    refresh = modes.add_parser("refresh", help="re-consultas condicionales")
+    refresh.add_argument("--requests", type=int, default=200)
+    refresh.add_argument("--concurrency", type=int, default=4)
+    refresh.add_argument("--timeout", type=float, default=2)
+    refresh.set_defaults(function=bench_refresh)
+
+    options = parser.parse_args(args[1:])
+    return options.function(options)
+
+
+# Entrada de aplicación.
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: cli.py
+- Descripción: punto de entrada único del analizador, con un subcomando por
+etapa:
+    - download: descarga los telegramas en la caché web (ver requester.py).
+    - parse: parsea los telegramas nuevos o modificados de la caché web, y los
+    almacena en la caché de telegramas parseados (opción ParsedCache).
+    - analyze: analiza las mesas de votación (parseando, según corresponda,
+    los telegramas nuevos o modificados) y escribe el análisis en el directo-
+    rio de análisis (opción Statistics, sección Dirs).
+    - report: imprime en pantalla el último análisis escrito, sin volver a
+    analizar.
+    - run: descarga, analiza e imprime el análisis.
+    - sweep: analiza las mesas de votación y verifica sus límites con varias
+    ponderaciones de IQR (ver VotingStationCollection.sweep), reutilizando
+    los cuartiles; escribe las tablas sweep.csv y sweep_stations.csv en el
+    directorio de análisis.
+Uso:
+    python3 cli.py download [--refresh] [--profile] [--cprofile archivo]
+    python3 cli.py parse [--jobs N] [--profile] [--cprofile archivo]
+    python3 cli.py analyze [--jobs N] [--no-cache] [--profile]
+        [--cprofile archivo]
+    python3 cli.py report [circuito ...]
+    python3 cli.py run [--jobs N] [--refresh] [--no-cache] [--profile]
+        [--cprofile archivo]
+    python3 cli.py sweep [--ponderations P,P,...] [--jobs N] [--no-cache]
+        [--profile] [--cprofile archivo]
+Los módulos de cada etapa se importan recién al ejecutarla, y el archivo de
+configuración se lee luego de interpretar los argumentos: report (o --help) no
+cargan el parser html (BeautifulSoup, lxml) ni NumPy, y analyze sólo los carga
+si hay telegramas a parsear (o con el motor numpy).
+Los subcomandos no son interactivos: los telegramas con error de parseo se
+registran en la cuarentena (ver lib/quarantine.py) sin detener el procesamien-
+to. El código de salida es 1 si alguna descarga o algún telegrama falló, y 2
+si la ejecución se abortó por superar la tasa máxima de errores de parseo
+(opción MaxFailureRate).
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import argparse
+import os
+import sys
+
+from lib import utils
+
+
+def parse_args(args):
+    """Parsea argumentos de línea de comandos."""
+
+    parser = argparse.ArgumentParser(description="Descarga y análisis de "
+                                     "mesas de votación.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    def profile(command):
+        """Agrega las opciones de métricas (ver lib/metrics.py)."""
+        command.add_argument("--profile", action="store_true",
+                             help="registra métricas por etapa (JSON)")
+        command.add_argument("--cprofile", default="",
+                             help="archivo de volcado de cProfile (implica "
+                             "--profile)")
+
+    def jobs(command):
+        """Agrega la opción de procesos de parseo."""
+        command.add_argument("--jobs", type=int, default=1,
+                             help="cantidad de procesos de parseo (por "
+                             "omisión, 1)")
+
+    def refresh(command):
+        """Agrega la opción de re-consulta de mesas descargadas."""
+        command.add_argument("--refresh", action="store_true",
+                             help="re-consulta (con requests condicionales) "
+                             "las mesas ya descargadas")
+
+    def no_cache(command):
+        """Agrega la opción de parseo sin caché."""
+        command.add_argument("--no-cache", action="store_true",
+                             help="no utiliza la caché de telegramas "
+                             "parseados")
+
+    download = commands.add_parser("download", help="descarga telegramas")
+    refresh(download)
+    profile(download)
+    download.set_defaults(function=command_download)
+
+    parse = commands.add_parser("parse", help="parsea telegramas")
+    jobs(parse)
+    profile(parse)
+    parse.set_defaults(function=command_parse)
+
+    analyze = commands.add_parser("analyze", help="analiza mesas de votación")
+    jobs(analyze)
+    no_cache(analyze)
+    profile(analyze)
+    analyze.set_defaults(function=command_analyze)
+
+    report = commands.add_parser("report", help="imprime el último análisis")
+    report.add_argument("circuits", nargs="*",
+                        help="circuitos a imprimir (por omisión, los de la "
+                        "configuración)")
+    report.set_defaults(function=command_report)
+
+    run = commands.add_parser("run", help="descarga, analiza e imprime")
+    jobs(run)
+    refresh(run)
+    no_cache(run)
+    profile(run)
+    run.set_defaults(function=command_run)
+
+    sweep = commands.add_parser("sweep", help="sensibilidad a la ponderación "
+                                "de IQR")
+    sweep.add_argument("--ponderations", default="1.0,1.5,3.0",
+                       help="ponderaciones de IQR, separadas por coma (por "
+                       "omisión, 1.0,1.5,3.0)")
+    jobs(sweep)
+    no_cache(sweep)
+    profile(sweep)
+    sweep.set_defaults(function=command_sweep)
+
+    return parser.parse_args(args[1:])
+
+
+def open_metrics(options):
+    """Retorna las métricas de ejecución de las opciones indicadas."""
+    from lib.metrics import Metrics
+    return Metrics(options.profile, options.cprofile)
+
+
+def save_metrics(metrics, settings, command):
+    """Almacena las métricas del subcomando indicado (directorio Reports)."""
+    path = metrics.save(os.path.join(settings.reports_dir,
+                                     "metrics_{0}.json".format(command)))
+    if path:
+        print("Métricas: {0}.".format(path))
+
+
+def run_download(settings, options, metrics):
+    """Descarga los telegramas (ver requester.run).
+
+    Returns:
+        failures (int): cantidad de descargas fallidas."""
+
+    import requester
+
+    changed, report = requester.run(settings, options.refresh, metrics)
+
+    if report.count > 0:
+        msg = "Descargas fallidas: {0} (ver {1})."
+        print(msg.format(report.count, report.path))
+
+    return report.count
+
+
+def open_quarantine(settings):
+    """Retorna la cuarentena (no interactiva) de telegramas con error."""
+    from lib.quarantine import Quarantine
+    return Quarantine(settings.reports_dir, settings.max_failure_rate)
+
+
+def run_analysis(settings, options, metrics, quarantine):
+    """Analiza las mesas de votación (ver main.analyze) y escribe el análi-
+    sis.
+
+    Returns:
+        collection (VotingStationCollection): colección analizada."""
+
+    from main import analyze
+
+    collection = analyze(settings, options.jobs, not options.no_cache,
+                         metrics, quarantine)
+
+    with metrics.stage("report", hot=True):
+        collection.save_analysis()
+
+    return collection
+
+
+def print_report(settings, circuits=None):
+    """Imprime el análisis escrito (un archivo por circuito, en el directorio
+    de análisis), sin volver a analizar.
+
+    Args:
+        settings (Settings): configuración.
+        circuits (list): circuitos a imprimir (por omisión, los de la confi-
+        guración).
+
+    Returns:
+        missing (list): circuitos sin análisis escrito."""
+
+    missing = []
+    for circuit in circuits or settings.circuits:
+        path = os.path.join(settings.statistics_dir, circuit + ".txt")
+        if not os.path.exists(path):
+            missing.append(circuit)
+            continue
+
+        with open(path) as file:
+            print(file.read(), end="")
+
+    return missing
+
+
+def command_download(settings, options):
+    """Subcomando download."""
+
+    metrics = open_metrics(options)
+    failures = run_download(settings, options, metrics)
+    save_metrics(metrics, settings, "download")
+
+    if failures:
+        return 1
+
+
+def command_parse(settings, options):
+    """Subcomando parse."""
+
+    from main import read_records
+
+    if not settings.parsed_cache:
+        msg = "La opción ParsedCache (sección Dirs) está vacía: no hay caché "
+        msg += "de telegramas parseados."
+        print(msg)
+        return 1
+
+    metrics = open_metrics(options)
+    quarantine = open_quarantine(settings)
+
+    count = 0
+    for record in read_records(settings, options.jobs, True, metrics,
+                               quarantine):
+        count += 1
+
+    print("Telegramas en caché: {0}.".format(count))
+    save_metrics(metrics, settings, "parse")
+
+    if quarantine.files:
+        return 1
+
+
+def command_analyze(settings, options):
+    """Subcomando analyze."""
+
+    metrics = open_metrics(options)
+    quarantine = open_quarantine(settings)
+    collection = run_analysis(settings, options, metrics, quarantine)
+
+    summary = collection.summary()
+    msg = "\nMesas analizadas: {0}, con observaciones: {1} (ver {2})."
+    print(msg.format(sum(count for circuit, count, remarked in summary),
+                     sum(remarked for circuit, count, remarked in summary),
+                     settings.statistics_dir))
+    save_metrics(metrics, settings, "analyze")
+
+    if quarantine.files:
+        return 1
+
+
+def command_report(settings, options):
+    """Subcomando report."""
+
+    missing = print_report(settings, options.circuits)
+
+    if missing:
+        msg = "No se ha encontrado el análisis de los circuitos {0}; por favor"
+        msg += " ejecute el subcomando 'analyze'."
+        print(msg.format(", ".join(missing)), file=sys.stderr)
+        return 1
+
+
+def command_run(settings, options):
+    """Subcomando run (download, analyze y report)."""
+
+    metrics = open_metrics(options)
+    quarantine = open_quarantine(settings)
+
+    failures = run_download(settings, options, metrics)
+    collection = run_analysis(settings, options, metrics, quarantine)
+
+    with metrics.stage("report", hot=True):
+        collection.print_analysis()
+
+    save_metrics(metrics, settings, "run")
+
+    if failures or quarantine.files:
+        return 1
+
+
+def command_sweep(settings, options):
+    """Subcomando sweep."""
+
+    from lib import export
+    from main import analyze
+
+    try:
+        ponderations = [float(value) for value
+                        in options.ponderations.split(",")]
+    except ValueError:
+        print("Ponderaciones inválidas: {0}.".format(options.ponderations))
+        return 1
+
+    metrics = open_metrics(options)
+    quarantine = open_quarantine(settings)
+
+    collection = analyze(settings, options.jobs, not options.no_cache,
+                         metrics, quarantine)
+
+    with metrics.stage("sweep", hot=True):
+        summary, stations = collection.sweep(ponderations)
+
+        utils.makedirs(settings.statistics_dir)
+        paths = export.export_sweep(summary, stations,
+                                    settings.statistics_dir)
+
+    print()
+    msg = "Ponderación {0}: mesas con observaciones: {1}, con valores atípi"
+    msg += "cos: {2} (observaciones inferiores: {3}, superiores: {4})."
+    for ponderation in ponderations:
+        rows = [row for row in summary if row[0] == ponderation]
+        print(msg.format(ponderation, *[sum(row[i] for row in rows)
+                                        for i in range(3, 7)]))
+
+    print("Tablas: {0}.".format(", ".join(paths)))
+    save_metrics(metrics, settings, "sweep")
+
+    if quarantine.files:
+        return 1
+
+
+def main(args):
+    """Punto de entrada."""
+
+    options = parse_args(args)
+
+    # Lectura de configuración (luego de interpretar los argumentos).
+    settings = utils.settings()
+
+    return options.function(settings, options)
+
+
+# Entrada de aplicación.
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
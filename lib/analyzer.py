@@ -7,20 +7,30 @@ ción (nota: el término "mesa electoral" se ha traducido como "voting station",
 de ahí el nombre de ciertas variables y clases):
     - StatisticsAnalyzer (class), ver docstring.
     - VotingStationStatus (class), ver docstring.
+    - Remark (class), ver docstring.
     - VotingCategories (class), ver docstring.
-    - VotingStationInformation (class), ver docstring.
+    - StationLayout (class), ver docstring.
     - VotingStation (class), ver docstring.
+    - VotingStationParser (class), ver docstring.
+    - RemarksDiff (class), ver docstring.
+    - BaselineAggregator (class), ver docstring.
     - VotingStationCollection (class), ver docstring.
 - Autor: Agustín González.
 - Modificado: 05/11/17.
 """
 
-from bs4 import BeautifulSoup
-from lib import utils
+import struct
+import time
+from array import array
+from collections import namedtuple
+
+from lib import export, utils
+from lib.sketch import SketchStatistics, TDigest
 
 
 class StatisticsAnalyzer:
-    """Permite los siguientes análisis estadísticos en base a una muestra (lista):
+    """Permite los siguientes análisis estadísticos en base a una muestra
+    (lista):
     - Medidas de tendencia central:
         - Media: promedio de lista.
         - Mediana: elemento central de lista.
@@ -129,6 +139,11 @@ class StatisticsAnalyzer:
         # Rango intercuartil.
         self.__qrange = self.__q3 - self.__q1
 
+    def quartiles(self):
+        """Retorna los cuartiles q1, q2 y q3 (no dependen de la ponderación de
+        IQR, ver VotingStationCollection.sweep)."""
+        return self.__q1, self.__q2, self.__q3
+
     def lower_limit(self):
         """Retorna límite inferior.
 
@@ -158,11 +173,53 @@ class VotingStationStatus(object):
                  " {2}, valor de la mesa: {3}"
     LowerOfAvg = "{0} para {1} por debajo de la media. Valor de referencia:"  \
                  " {2}, valor de la mesa: {3}"
+    Baseline = " (línea de base: {0})"
+
+
+class Remark(namedtuple("Remark", ["kind", "vtype", "category", "limit",
+                                   "reference", "count", "level"])):
+    """Observación de una mesa de votación (registro inmutable):
+    - kind (string): verificación que originó la observación (ver kinds).
+    - vtype, category (string): tipo de voto y categoría (sólo en las verifi-
+    caciones de límites; vacíos en el resto).
+    - limit (float): límite superado (límite inferior o superior de la línea
+    de base, o máximo de votos impugnados admitidos). None si no corresponde.
+    - reference (float): valor de referencia (media de la línea de base). None
+    si no corresponde.
+    - count (int): valor de la mesa (None si el acta no fue computada).
+    - level (string): nivel de la línea de base que originó la observación
+    (ver utils.BASELINES; sólo en las verificaciones de límites, vacío en el
+    resto).
+    El texto de la observación (ver VotingStationStatus) no se almacena; se
+    formatea al emitir el análisis (ver VotingStationCollection)."""
+
+    __slots__ = ()
+
+    # Verificaciones.
+    Status = "status"
+    Impugned = "impugned"
+    Lower = "lower"
+    Upper = "upper"
+
+    kinds = (Status, Impugned, Lower, Upper)
+
+    @property
+    def check(self):
+        """Verificación que originó la observación (verificación, tipo de vo-
+        to, categoría y nivel), sin los valores (límite, referencia y conteo)
+        que pueden cambiar al reanalizar la mesa (ver RemarksDiff)."""
+        return (self.kind, self.vtype, self.category, self.level)
 
 
 class VotingCategories(object):
     """Votos por categoría."""
 
+    __slots__ = ("national_senator", "national_deputy", "provintial_deputy",
+                 "councilor")
+
+    # Nombres de categorías (en el orden de las columnas del telegrama).
+    keys = utils.CATEGORIES
+
     def __init__(self):
         # Votos a senador nacional.
         self.national_senator = 0
@@ -177,38 +234,252 @@ class VotingCategories(object):
         self.councilor = 0
 
 
-class VotingStationInformation(object):
-    """Información de mesa."""
+class StationLayout(dict):
+    """Layout (compartido entre las mesas de un mismo circuito y estado, con
+    los mismos tipos de voto) de los datos de una mesa de votación (ver Vo-
+    tingStation): posición (en bytes) de los conteos de cada tipo de voto en
+    los datos empaquetados, en el orden de los tipos de voto, seguidos de los
+    votos impugnados y del número de mesa (texto).
 
-    def __init__(self):
-        # Circuito de votación
-        self.circuit = ""
+    Atributos:
+    - section, circuit, status (string): sección, circuito y estado de las
+    mesas.
+    - categories (dict): posición (en bytes) de cada categoría, relativa a
+    la del tipo de voto.
+    - unpack (function): lectura de un conteo (ver struct.unpack_from).
+    - impugned (int): posición de los votos impugnados.
+    - number (int): posición del número de mesa."""
 
-        # Número de mesa
-        self.station_number = ""
+    __slots__ = ("section", "circuit", "status", "categories", "unpack",
+                 "impugned", "number")
 
-        # Estado de mesa.
-        self.status = ""
+    def __init__(self, section, circuit, status, vtypes, typecode):
+        """Inicializa el layout.
 
-        # Observaciones (seteada durante análisis en VotingStationCollection).
-        self.remarks = []
+        Args:
+            section, circuit, status (string): sección, circuito y estado de
+            las mesas.
+            vtypes (tuple): tipos de voto, en el orden de los conteos.
+            typecode (string): tipo de entero de los conteos ("h" o "i", ver
+            array)."""
+
+        width = array(typecode).itemsize
+        size = len(VotingCategories.keys) * width
+        dict.__init__(self, ((vtype, i * size)
+                             for i, vtype in enumerate(vtypes)))
+
+        self.section = section
+        self.circuit = circuit
+        self.status = status
+        self.categories = {key: i * width
+                           for i, key in enumerate(VotingCategories.keys)}
+        self.unpack = struct.Struct("=" + typecode).unpack_from
+        self.impugned = len(vtypes) * size
+        self.number = self.impugned + width
 
 
 class VotingStation(object):
-    """Mesa de votación."""
+    """Mesa de votación, en representación compacta: la mesa sólo almacena
+    (en __slots__, sin diccionario por instancia) sus observaciones, su lay-
+    out y sus datos: los conteos de votos (tipos de voto x categorías, con
+    MISSING para los conteos vacíos), los votos impugnados y el número de
+    mesa, empaquetados en un único objeto bytes. La sección, el circuito y el
+    estado se almacenan en el layout (ver StationLayout), que se comparte
+    entre todas las mesas del mismo circuito y estado con los mismos tipos de
+    voto.
+
+    Las observaciones se almacenan como registros (ver Remark), que se forma-
+    tean como texto sólo al emitir el análisis."""
+
+    __slots__ = ("remarks", "layout", "data")
 
     # String que indica estado de mesa 'grabada' en sistema.
     status_ok = "grabada"
 
-    def __init__(self, html):
-        """Inicializa mesa de votación con los datos del html.
+    # Conteo vacío (en los datos empaquetados).
+    MISSING = -1
+
+    # Layouts compartidos, por sección, circuito, estado, tipos de voto y ti-
+    # po de entero (ver __load).
+    layouts = {}
+
+    def __init__(self, html, settings=None):
+        """Inicializa mesa de votación con los datos del html (ver Voting-
+        StationParser).
+
+        Args:
+            html (string): página html de mesa de votación con el formato de
+            las de resultados.gob.ar
+            settings (Settings): configuración. Por omisión, la del archivo de
+            configuración (ver utils.settings)."""
+
+        self.__load(VotingStationParser(html, settings).to_record())
+
+    @classmethod
+    def parse_record(cls, html, settings=None):
+        """Parsea html de mesa de votación y retorna su registro (ver to_re-
+        cord). Con el parser (opción Backend, sección Parser) "lxml", se uti-
+        liza el parser rápido del módulo telegram; si este no está disponible
+        o el html no respeta el formato esperado, se recurre (al igual que con
+        el parser "bs4") al parseo mediante BeautifulSoup.
 
         Args:
             html (string): página html de mesa de votación con el formato de
-            las de resultados.gob.ar"""
+            las de resultados.gob.ar
+            settings (Settings): configuración. Por omisión, la del archivo de
+            configuración (ver utils.settings).
+
+        Returns:
+            record (tuple): registro de mesa de votación."""
 
-        # Archivo de configuración a mem. (evita posteriores lect. de disco).
-        self.__cfg = utils.cfg()
+        settings = settings or utils.settings()
+
+        if settings.parser_backend == "lxml":
+            try:
+                from lib import telegram
+            except ImportError:
+                telegram = None
+
+            if telegram is not None:
+                try:
+                    return telegram.parse(html, settings.party_keys)
+                except telegram.TelegramFormatError:
+                    pass
+
+        return VotingStationParser(html, settings).to_record()
+
+    @classmethod
+    def from_record(cls, record):
+        """Crea una mesa de votación a partir de un registro (ver to_record),
+        sin realizar parseo de html.
+
+        Args:
+            record (tuple): registro de mesa de votación.
+
+        Returns:
+            vstation (VotingStation): mesa de votación."""
+
+        vstation = cls.__new__(cls)
+        vstation.__load(record)
+        return vstation
+
+    def __load(self, record):
+        """Carga los datos de un registro de mesa de votación."""
+
+        section, circuit, station_number, status, impugned, votes = record
+
+        self.remarks = ()
+
+        # Conteos y votos impugnados (enteros de 16 bits, salvo que alguno no
+        # entre en ese rango).
+        values = [VotingStation.MISSING if count is None else count
+                  for vtype, counts in votes for count in counts]
+        values.append(VotingStation.MISSING if impugned is None else impugned)
+        try:
+            packed = array("h", values)
+        except OverflowError:
+            packed = array("i", values)
+
+        # Layout compartido.
+        vtypes = tuple(vtype for vtype, counts in votes)
+        key = (section, circuit, status, vtypes, packed.typecode)
+        layout = VotingStation.layouts.get(key)
+        if layout is None:
+            layout = VotingStation.layouts[key] = StationLayout(*key)
+        self.layout = layout
+
+        self.data = packed.tobytes() + station_number.encode()
+
+    @property
+    def section(self):
+        """Sección (ver StationLayout)."""
+        return self.layout.section
+
+    @property
+    def circuit(self):
+        """Circuito (ver StationLayout)."""
+        return self.layout.circuit
+
+    @property
+    def status(self):
+        """Estado (ver StationLayout)."""
+        return self.layout.status
+
+    @property
+    def station_number(self):
+        """Número de mesa (texto)."""
+        return self.data[self.layout.number:].decode()
+
+    @property
+    def impugned_votes(self):
+        """Votos impugnados (None si la mesa no fue grabada)."""
+        value = self.layout.unpack(self.data, self.layout.impugned)[0]
+        return None if value == VotingStation.MISSING else value
+
+    def count(self, vtype, category):
+        """Retorna la cantidad de votos del tipo de voto y categoría indica-
+        dos (None si el conteo es vacío).
+
+        Raises:
+            KeyError: si la mesa no tiene votos del tipo indicado (por ejem-
+            plo, si no fue grabada)."""
+
+        layout = self.layout
+        value = layout.unpack(self.data,
+                              layout[vtype] + layout.categories[category])[0]
+        return None if value == VotingStation.MISSING else value
+
+    @property
+    def votes(self):
+        """Votos por tipo de voto, como diccionario de VotingCategories (se
+        construye en cada acceso; ver count)."""
+
+        votes = {}
+        for vtype in self.layout:
+            categories = VotingCategories()
+            for key in VotingCategories.keys:
+                setattr(categories, key, self.count(vtype, key))
+            votes[vtype] = categories
+        return votes
+
+    def to_record(self):
+        """Retorna un registro compacto (sólo tuplas, strings y enteros, por lo
+        que es serializable mediante pickle) con los datos de la mesa.
+
+        Returns:
+            record (tuple): (sección, circuito, número de mesa, estado, votos
+            impugnados, votos), donde votos es una tupla de pares (tipo de
+            voto, conteos por categoría en el orden de VotingCategories.keys).
+            Si la mesa no fue grabada, los votos impugnados son None."""
+
+        votes = tuple((vtype, tuple(self.count(vtype, key)
+                                    for key in VotingCategories.keys))
+                      for vtype in self.layout)
+
+        return (self.section, self.circuit, self.station_number, self.status,
+                self.impugned_votes, votes)
+
+
+class VotingStationParser(object):
+    """Parser (BeautifulSoup) de telegramas de mesas de votación. Se utiliza
+    con el parser "bs4" (opción Backend, sección Parser), o si el html no res-
+    peta el formato esperado por el parser rápido (ver lib/telegram.py)."""
+
+    def __init__(self, html, settings=None):
+        """Parsea los datos del html de la mesa de votación.
+
+        Args:
+            html (string): página html de mesa de votación con el formato de
+            las de resultados.gob.ar
+            settings (Settings): configuración. Por omisión, la del archivo de
+            configuración (ver utils.settings)."""
+
+        # Importación diferida: BeautifulSoup sólo se carga si se parsea html
+        # (y no, por ejemplo, al analizar registros de la caché de parseo).
+        from bs4 import BeautifulSoup
+
+        # Configuración.
+        self.__settings = settings or utils.settings()
 
         # Diccionario de votos (tipos de voto y partidos políticos).
         self.votes = {}
@@ -219,11 +490,14 @@ class VotingStation(object):
         # Tablas parseadas de html (son 4).
         self.__tables = html_parser.findAll("table")
 
+        # Tablas convertidas a listas (cada tabla se recorre una única vez).
+        self.__parsed_tables = {}
+
         # Parseo de información general.
         self.__parse_information()
 
         # Si la mesa fue grabada...
-        if self.information.status.lower() == VotingStation.status_ok:
+        if self.status.lower() == VotingStation.status_ok:
             # Parseo de otros votos.
             self.__parse_other_votes()
 
@@ -233,6 +507,31 @@ class VotingStation(object):
             # Parseo de votos a partidos.
             self.__parse_political_parties_votes()
 
+        # Liberación del árbol html: sólo se conservan los datos extraídos
+        # (el árbol tiene referencias circulares, por lo que sino se libera
+        # recién en la siguiente recolección de ciclos).
+        html_parser.decompose()
+        self.__tables = None
+        self.__parsed_tables = None
+
+    def to_record(self):
+        """Retorna un registro compacto (sólo tuplas, strings y enteros, por lo
+        que es serializable mediante pickle) con los datos de la mesa.
+
+        Returns:
+            record (tuple): (sección, circuito, número de mesa, estado, votos
+            impugnados, votos), donde votos es una tupla de pares (tipo de
+            voto, conteos por categoría en el orden de VotingCategories.keys).
+            Si la mesa no fue grabada, los votos impugnados son None."""
+
+        votes = tuple((vtype, tuple(getattr(categories, key)
+                                    for key in VotingCategories.keys))
+                      for vtype, categories in self.votes.items())
+        impugned = getattr(self, "impugned_votes", None)
+
+        return (self.section, self.circuit, self.station_number, self.status,
+                impugned, votes)
+
     def __parseHTMLtable(self, html_table):
         """Parsea tabla HTML a tabla leíble en python.
 
@@ -267,7 +566,10 @@ class VotingStation(object):
 
         categories = VotingCategories()
 
-        parsed = self.__parseHTMLtable(self.__tables[table_index])
+        parsed = self.__parsed_tables.get(table_index)
+        if parsed is None:
+            parsed = self.__parseHTMLtable(self.__tables[table_index])
+            self.__parsed_tables[table_index] = parsed
 
         ns = parsed[vtype_index][0]
         categories.national_senator = int(ns) if ns != "" else None
@@ -288,13 +590,10 @@ class VotingStation(object):
 
         parsed = self.__parseHTMLtable(self.__tables[0])
 
-        info = VotingStationInformation()
-        info.section = parsed[1][0].strip()
-        info.circuit = parsed[2][0].strip()
-        info.station_number = parsed[3][0].strip()
-        info.status = parsed[4][0].strip().lower()
-
-        self.information = info
+        self.section = parsed[1][0].strip()
+        self.circuit = parsed[2][0].strip()
+        self.station_number = parsed[3][0].strip()
+        self.status = parsed[4][0].strip().lower()
 
     def __parse_other_votes(self):
         """Parsea votos nulos, en blanco y recurridos (tabla 2 de html)."""
@@ -310,40 +609,152 @@ class VotingStation(object):
         self.impugned_votes = int(parsed.getText())
 
     def __parse_political_parties_votes(self):
-        """Parsea votos de partidos políticos (tabla 4 de html). El orden de los
-        partidos políticos se establece según orden de aparición en la opción
-        Keys, sección "PoliticalParties" del archivo de configuración."""
-
-        # Lectura de configuración
-        cfg = self.__cfg
-        political_parties = cfg["PoliticalParties"]["Keys"].split(",")
+        """Parsea votos de partidos políticos (tabla 4 de html). El orden de
+        los partidos políticos se establece según orden de aparición en la
+        opción Keys, sección "PoliticalParties" del archivo de configura-
+        ción."""
 
         # Index en tabla de partido político
         index = 1
 
         # Asignación de votos de la sección a partido político.
-        for pp in political_parties:
-            self.votes[pp.strip()] = self.__parse_vote_type(3, index)
+        for pp in self.__settings.party_keys:
+            self.votes[pp] = self.__parse_vote_type(3, index)
             # Incremento de identificador.
             index += 1
 
 
+class RemarksDiff(object):
+    """Diferencia de observaciones resultante de actualizar mesas de una co-
+    lección (ver VotingStationCollection.update):
+    - added (list): observaciones agregadas, como tuplas (circuito, mesa,
+    observación).
+    - cleared (list): observaciones eliminadas, ídem added.
+    - changed (list): observaciones que se mantienen con otros valores (lí-
+    mite, referencia o conteo; por ejemplo, porque cambió la media de la lí-
+    nea de base), ídem added, con la observación actual.
+    - circuits (list): circuitos reanalizados.
+    Las observaciones se comparan por mesa y verificación (ver Remark.check),
+    por lo que sólo las que aparecen o desaparecen son agregadas o elimina-
+    das (y cuentan en la longitud de la diferencia)."""
+
+    def __init__(self):
+        self.added = []
+        self.cleared = []
+        self.changed = []
+        self.circuits = []
+
+    def __len__(self):
+        return len(self.added) + len(self.cleared)
+
+
+class BaselineAggregator(object):
+    """Agregación (group-by) de los conteos de votos por nivel de línea de
+    base (circuito, sección y distrito, ver utils.BASELINES): en una única re-
+    corrida de las mesas, cada conteo se agrega a la muestra del grupo de la
+    mesa en cada nivel, por lo que los niveles adicionales no requieren reco-
+    rrer nuevamente las mesas. Las estadísticas de cada muestra se calculan con
+    el estimador de cuartiles indicado."""
+
+    def __init__(self, levels, cells, estimator="exact", compression=100):
+        """Inicializa agregación vacía.
+
+        Args:
+            levels (tuple): niveles de línea de base.
+            cells (list): tuplas (tipo de voto, categoría) a agregar.
+            estimator (string): estimador de cuartiles ("exact" o "tdigest").
+            compression (float): compresión del estimador aproximado."""
+
+        self.levels = levels
+        self.__cells = cells
+        self.__digest = estimator == "tdigest"
+        self.__compression = compression
+
+        # Muestras por (nivel, grupo, tipo de voto, categoría): listas de
+        # conteos o, con el estimador aproximado, sketches (la muestra no se
+        # almacena).
+        self.__samples = {}
+
+    def add(self, vstation, groups):
+        """Agrega los conteos de una mesa de votación (grabada).
+
+        Args:
+            vstation (VotingStation): mesa de votación.
+            groups (tuple): grupo de la mesa en cada nivel (en el orden de
+            levels)."""
+
+        levels = tuple(zip(self.levels, groups))
+        samples = self.__samples
+
+        for vtype, vcategory in self.__cells:
+            count = vstation.count(vtype, vcategory)
+            if count is None:
+                continue
+
+            for level, group in levels:
+                key = (level, group, vtype, vcategory)
+                sample = samples.get(key)
+
+                if self.__digest:
+                    if sample is None:
+                        sample = samples[key] = TDigest(self.__compression)
+                    sample.add(count)
+                elif sample is None:
+                    samples[key] = [count]
+                else:
+                    sample.append(count)
+
+    def statistics(self, iqr_ponderation=1.00):
+        """Retorna (como generador) las estadísticas de cada muestra.
+
+        Args:
+            iqr_ponderation (float): suavizador de IQR.
+
+        Returns:
+            statistics (generator): tuplas ((nivel, grupo, tipo de voto, cate-
+            goría), StatisticsAnalyzer o SketchStatistics)."""
+
+        for key, sample in self.__samples.items():
+            if self.__digest:
+                yield key, SketchStatistics(sample, iqr_ponderation)
+            else:
+                yield key, StatisticsAnalyzer(sample, iqr_ponderation)
+
+
 class VotingStationCollection:
     """Colección que agrupa varias mesas de votación (VotingStation) con el
     fin de realizar los análisis pertinentes."""
 
-    def __init__(self, vstations):
+    def __init__(self, vstations, settings=None):
         """Inicializa colección.
 
         Args:
             vstations (list): listado de mesas de votación.
+            settings (Settings): configuración. Por omisión, la del archivo de
+            configuración (ver utils.settings).
         """
 
+        # Configuración.
+        self.__settings = settings or utils.settings()
+
         # Mesas de votación
         self.__vstations = vstations
 
-        # Mesas observadas.
-        self.__remarked_vstations = []
+        # Índice de mesas por circuito.
+        self.__by_circuit = {}
+
+        # Índice de mesas observadas por circuito.
+        self.__remarked_by_circuit = {}
+
+        # Caché de estadísticas por (nivel de línea de base, grupo, tipo de
+        # voto, categoría). Las estadísticas se calculan de antemano, en una
+        # única recorrida de las mesas (ver __load_statistics).
+        self.__statistics = {}
+
+        # Cantidad de estadísticas calculadas, y tiempo de cálculo (ver met-
+        # rics).
+        self.__statistics_computed = 0
+        self.__statistics_seconds = 0
 
         # Diccionario de categorías (equivalente con enum VotingCategories).
         self.__categories = {"national_senator": "Senador nacional",
@@ -353,6 +764,10 @@ class VotingStationCollection:
         # Tipos de voto.
         self.__vote_types = {"blank": "Votos en blanco",
                              "null": "Votos nulos"}
+        # Niveles de línea de base.
+        self.__level_names = {"circuit": "circuito",
+                              "section": "sección",
+                              "district": "distrito"}
 
         # Actualización de tipos de voto (append de partidos políticos).
         self.__update_vote_types()
@@ -366,112 +781,454 @@ class VotingStationCollection:
         # Análisis.
         self.__analize()
 
-    def __update_vote_types(self):
-        """Actualiza los tipos de voto, agregando los partidos políticos
-        especificados en el archivo de configuración."""
-        cfg = utils.cfg()
+    def add(self, vstations):
+        """Agrega mesas de votación a la colección y rehace el análisis. Las
+        estadísticas cacheadas se invalidan, dado que las muestras de los cir-
+        cuitos cambian.
 
-        sPoliticalParties = "PoliticalParties"
+        Args:
+            vstations (list): listado de mesas de votación a agregar."""
 
-        keys = cfg[sPoliticalParties]["Keys"].split(",")
-        values = cfg[sPoliticalParties]["Values"].split(",")
+        self.__vstations.extend(vstations)
 
-        if len(keys) != len(values):
-            msg = "La cantidad de keys y values de los partidos políticos \
-            especificados en el archivo de configuración no es la misma."
-            print(msg)
-            exit(1)
+        # Invalidación de caché de estadísticas.
+        self.__statistics = {}
 
-        for i in range(0, len(keys)):
-            # Saneamiento de keys y values
-            keys[i] = keys[i].strip()
-            values[i] = values[i].strip()
+        # Reinicio de observaciones previas.
+        self.__remarked_by_circuit = {}
+        for vs in self.__vstations:
+            vs.remarks = ()
 
+        self.__load_circuits()
+        self.__analize()
+
+    def update(self, vstations):
+        """Actualiza (en forma incremental) mesas de votación de la colección:
+        cada mesa reemplaza a la de igual circuito y número de mesa (o se agre-
+        ga, si no existe). Sólo se recalculan las estadísticas y se reevalúan
+        las observaciones de los circuitos afectados.
+
+        Args:
+            vstations (list): listado de mesas de votación nuevas o modifica-
+            das.
+
+        Returns:
+            diff (RemarksDiff): observaciones agregadas, eliminadas y con va-
+            lores modificados."""
+
+        diff = RemarksDiff()
+
+        # Circuitos afectados, en orden de aparición.
+        affected = []
+        for vs in vstations:
+            circuit = vs.circuit
+            if circuit not in affected:
+                affected.append(circuit)
+
+        # Con líneas de base de sección o distrito (cuyas muestras abarcan
+        # varios circuitos), se reanalizan todos los circuitos.
+        extended = bool(affected) and self.__levels != ("circuit",)
+
+        # Observaciones previas de las mesas de los circuitos a reanalizar.
+        previous = {}
+        for circuit in (list(self.__circuits) if extended else affected):
+            for vs in self.__get_by_circuit(circuit):
+                key = (circuit, str(vs.station_number))
+                previous[key] = vs.remarks
+
+        # Reemplazo (o agregado) de mesas, por circuito y número de mesa.
+        for vs in vstations:
+            circuit = vs.circuit
+            key = (circuit, str(vs.station_number))
+            circuit_stations = self.__by_circuit.get(circuit)
+
+            if circuit_stations is None:
+                circuit_stations = self.__by_circuit[circuit] = []
+                self.__circuits.append(circuit)
+
+            position = self.__positions.get(key)
+            if position is None:
+                self.__positions[key] = (len(self.__vstations),
+                                         len(circuit_stations))
+                self.__vstations.append(vs)
+                circuit_stations.append(vs)
+            else:
+                self.__vstations[position[0]] = vs
+                circuit_stations[position[1]] = vs
+
+        reanalyze = list(self.__circuits) if extended else affected
+
+        # Invalidación de estadísticas y observaciones de circuitos a reana-
+        # lizar.
+        circuits = set(reanalyze)
+        for key in list(self.__statistics.keys()):
+            if key[0] != "circuit" or key[1] in circuits:
+                del self.__statistics[key]
+
+        for circuit in reanalyze:
+            self.__remarked_by_circuit.pop(circuit, None)
+            for vs in self.__get_by_circuit(circuit):
+                vs.remarks = ()
+
+        # Reanálisis.
+        if reanalyze:
+            self.__load_statistics(reanalyze)
+
+        for circuit in reanalyze:
+            self.__analize_circuit(circuit)
+
+            for vs in self.__get_by_circuit(circuit):
+                key = (circuit, str(vs.station_number))
+                before = {remark.check: remark
+                          for remark in previous.get(key, ())}
+                after = {remark.check: remark for remark in vs.remarks}
+                for check, remark in after.items():
+                    if check not in before:
+                        diff.added.append(key + (remark,))
+                    elif remark != before[check]:
+                        diff.changed.append(key + (remark,))
+                for check, remark in before.items():
+                    if check not in after:
+                        diff.cleared.append(key + (remark,))
+
+        diff.circuits = reanalyze
+        return diff
+
+    def summary(self):
+        """Retorna el resumen del análisis, por circuito.
+
+        Returns:
+            summary (list): tuplas (circuito, cantidad de mesas, cantidad de
+            mesas con observaciones), en el orden de los circuitos."""
+
+        return [(circuit, len(self.__get_by_circuit(circuit)),
+                 len(self.__remarked_by_circuit.get(circuit, [])))
+                for circuit in self.__circuits]
+
+    def sweep(self, ponderations, circuits=None):
+        """Verifica los límites inferior y superior de las mesas con cada una
+        de las ponderaciones de IQR indicadas (ver opción IqrPonderation), sin
+        rehacer el análisis: los cuartiles no dependen de la ponderación (sólo
+        los límites), por lo que se reutilizan los calculados en el análisis,
+        una única vez por línea de base, tipo de voto y categoría. Las verifi-
+        caciones de estado y votos impugnados no dependen de la ponderación.
+
+        Args:
+            ponderations (list): ponderaciones de IQR.
+            circuits (list): circuitos a verificar (por omisión, todos).
+
+        Returns:
+            summary (list): tuplas (ponderación, circuito, mesas, mesas con
+            observaciones, mesas con valores atípicos, observaciones por debajo
+            del límite inferior, observaciones por encima del límite superior),
+            en el orden de las ponderaciones y los circuitos.
+            stations (list): tuplas (ponderación, circuito, sección, mesa, ob-
+            servaciones por debajo del límite inferior, observaciones por enci-
+            ma del límite superior) de las mesas con valores atípicos, en el
+            orden de las ponderaciones, los circuitos y las mesas."""
+
+        if circuits is None:
+            circuits = self.__circuits
+
+        nponderations = len(ponderations)
+        vtypes, categories = self.__checked_cells()
+        cells = [(vtype, vcategory) for vtype in vtypes
+                 for vcategory in categories]
+
+        # Filas de cada ponderación.
+        summary = [[] for p in ponderations]
+        stations = [[] for p in ponderations]
+
+        for circuit in circuits:
+            vstations = sorted(self.__get_by_circuit(circuit),
+                               key=lambda x: int(x.station_number))
+
+            # Contadores (mesas con observaciones, mesas con valores atípi-
+            # cos, observaciones inferiores y superiores) por ponderación.
+            counters = [[0, 0, 0, 0] for p in ponderations]
+
+            for vs in vstations:
+                kinds = set(remark.kind for remark in vs.remarks)
+
+                # Actas no computadas: sin verificación de límites.
+                if Remark.Status in kinds:
+                    for counter in counters:
+                        counter[0] += 1
+                    continue
+
+                lower = [0] * nponderations
+                upper = [0] * nponderations
+                levels = tuple(zip(self.__levels, self.__groups(vs)))
+
+                for vtype, vcategory in cells:
+                    vcount = vs.count(vtype, vcategory)
+                    if vcount is None:
+                        continue
+
+                    check_lower = vtype in self.__st_lower_check
+                    check_upper = vtype in self.__st_upper_check
+
+                    for level, group in levels:
+                        q1, q2, q3 = self.__get_statistics(
+                            level, group, vtype, vcategory).quartiles()
+                        qrange = q3 - q1
+
+                        for i, ponderation in enumerate(ponderations):
+                            if check_lower and \
+                               vcount < q1 - ponderation * qrange:
+                                lower[i] += 1
+                            if check_upper and \
+                               vcount > q3 + ponderation * qrange:
+                                upper[i] += 1
+
+                for i, ponderation in enumerate(ponderations):
+                    counter = counters[i]
+                    if lower[i] or upper[i]:
+                        counter[1] += 1
+                        counter[2] += lower[i]
+                        counter[3] += upper[i]
+                        stations[i].append((ponderation, circuit,
+                                            vs.section,
+                                            int(vs.station_number),
+                                            lower[i], upper[i]))
+                    if lower[i] or upper[i] or Remark.Impugned in kinds:
+                        counter[0] += 1
+
+            for i, ponderation in enumerate(ponderations):
+                summary[i].append((ponderation, circuit, len(vstations)) +
+                                  tuple(counters[i]))
+
+        return ([row for rows in summary for row in rows],
+                [row for rows in stations for row in rows])
+
+    def metrics(self):
+        """Retorna métricas del análisis (ver lib/metrics.py).
+
+        Returns:
+            metrics (dict): cantidad de estadísticas calculadas (por circuito,
+            tipo de voto y categoría), tiempo de cálculo (en segundos), y can-
+            tidad de mesas con observaciones y de observaciones."""
+
+        remarked = [vs for vstations in self.__remarked_by_circuit.values()
+                    for vs in vstations]
+        return {"statistics_computed": self.__statistics_computed,
+                "statistics_seconds": self.__statistics_seconds,
+                "stations_remarked": len(remarked),
+                "remarks": sum(len(vs.remarks)
+                               for vs in remarked)}
+
+    def __update_vote_types(self):
+        """Actualiza los tipos de voto, agregando los partidos políticos
+        especificados en el archivo de configuración."""
+        settings = self.__settings
+
+        for key, value in zip(settings.party_keys, settings.party_values):
             # Agregación de key, value de partidos políticos a tipos de voto.
-            self.__vote_types[keys[i]] = "Votos de " + values[i]
+            self.__vote_types[key] = "Votos de " + value
 
     def __load_circuits(self):
-        """Carga los circuitos de votación especificados en la config."""
-        lst = []
-        for vs in self.__vstations:
-            if vs.information.circuit not in lst:
-                lst.append(vs.information.circuit)
+        """Carga los circuitos de votación y el índice de mesas por circuito
+        (en una única recorrida de las mesas)."""
+        index = {}
+        positions = {}
+        for i, vs in enumerate(self.__vstations):
+            circuit_stations = index.setdefault(vs.circuit, [])
+            positions[(vs.circuit, str(vs.station_number))] = \
+                (i, len(circuit_stations))
+            circuit_stations.append(vs)
 
-        self.__circuits = lst
+        self.__by_circuit = index
+
+        # Posición de cada mesa (por circuito y número de mesa) en la lista de
+        # mesas y en la de su circuito (ver update).
+        self.__positions = positions
+
+        # Circuitos, en orden de aparición.
+        self.__circuits = list(index.keys())
 
     def __load_cfg(self):
         """Carga configuración de tipos de votos de los que se deberá realizar
         análisis de cota inferior y superior, y aquellas categorías que se
         deberán exluir del análisis. También carga la ponderancia del multipli-
         cador para cada tipo de voto."""
-        cfg = utils.cfg()
-
-        # Load de tipos de votos a analizar (cota inferior y superior) y de
-        # categorías a excluir de análisis.
-        section = "Statistics"
+        settings = self.__settings
 
-        optionupper = cfg[section]["VoteTypesUpperCheck"]
-        optionlower = cfg[section]["VoteTypesLowerCheck"]
-        optionavoid = cfg[section]["AvoidedCategories"]
-
-        self.__st_upper_check = [x.strip() for x in optionupper.split(",")]
-        self.__st_lower_check = [x.strip() for x in optionlower.split(",")]
-        self.__st_avoid_check = [x.strip() for x in optionavoid.split(",")]
-        self.__st_max_impugned = int(cfg[section]["ImpugnedVotesAdmitted"])
+        # Tipos de votos a analizar (cota inferior y superior) y categorías a
+        # excluir de análisis.
+        self.__st_upper_check = settings.upper_check
+        self.__st_lower_check = settings.lower_check
+        self.__st_avoid_check = settings.avoided_categories
+        self.__st_max_impugned = settings.impugned_votes_admitted
 
         # Ponderación de rango intercuartil a la hora de analizar valores
         # atípicos.
-        self.__iqr_ponderation = float(cfg[section]["IqrPonderation"])
+        self.__iqr_ponderation = settings.iqr_ponderation
+
+        # Motor de cálculo de estadísticas ("python" o "numpy"). Sólo aplica
+        # al estimador exacto de cuartiles.
+        self.__engine = settings.engine
+        if settings.estimator != "exact":
+            self.__engine = "python"
 
-    def __get_by_circuit(self, circuit, vstations=[]):
-        """Obtiene, de la lista de mesas especificada, aquellas del circuito indicado.
+        # Estimador de cuartiles ("exact" o "tdigest") y compresión del esti-
+        # mador aproximado.
+        self.__estimator = settings.estimator
+        self.__compression = settings.compression
+
+        # Niveles de línea de base (ver utils.BASELINES) y distrito de la co-
+        # lección (grupo único del nivel distrito).
+        self.__levels = settings.baselines
+        self.__district = settings.district
+
+    def __get_by_circuit(self, circuit):
+        """Obtiene, mediante el índice de la colección, las mesas del circuito
+        indicado.
 
         Args:
             circuit (string): circuito a recuperar.
-            vstations (list): lista de mesas en las que realizar la búsqueda.
-            En caso de no especificarse, se utiliza la de la colección.
 
         Returns:
             lst (list): mesas de votación del circuito indicado."""
 
-        if len(vstations) == 0:
-            vstations = self.__vstations
+        return self.__by_circuit.get(circuit, [])
 
-        lst = []
+    def __groups(self, vstation):
+        """Retorna el grupo de la mesa indicada en cada nivel de línea de base
+        (circuito, sección o distrito), en el orden de los niveles."""
 
-        for vs in vstations:
-            if vs.information.circuit == circuit:
-                lst.append(vs)
+        groups = {"circuit": vstation.circuit,
+                  "section": vstation.section,
+                  "district": self.__district}
+        return tuple(groups[level] for level in self.__levels)
 
-        return lst
-
-    def __get_circuit_statistics(self, circuit, vtype, vcategory):
-        """Obtiene estadísticas del circuito indicado, para el tipo de voto y
-        categoría especificados.
+    def __get_statistics(self, level, group, vtype, vcategory):
+        """Obtiene estadísticas de la línea de base indicada, para el tipo de
+        voto y categoría especificados (ver __load_statistics).
 
         Args:
-            circuit (string): circuito a analizar.
+            level (string): nivel de línea de base (circuito, sección o dis-
+            trito).
+            group (string): grupo (circuito, sección o distrito).
             vtype (string): tipo de voto (blanco, nulo, etc).
             vcategory (string): categoría (senador, diputado, etc)
 
         Returns:
-            statistics (StatisticsAnalyzer): estadísticas del circuito."""
+            statistics (StatisticsAnalyzer, SketchStatistics o QuartileSum-
+            mary): estadísticas de la línea de base."""
 
-        vstations = self.__get_by_circuit(circuit)
-        lst = []
+        return self.__statistics[(level, group, vtype, vcategory)]
 
-        for vs in vstations:
-            if(vs.information.status.lower() == "grabada"):
-                categories = vs.votes[vtype]
+    def __load_statistics(self, circuits=None):
+        """Calcula las estadísticas de todas las líneas de base de los cir-
+        cuitos indicados (por omisión, todos) y las carga en la caché de esta-
+        dísticas, según el motor de cálculo."""
 
-                # Obtención de atributo según categoría.
-                count = getattr(categories, vcategory)
+        if self.__engine == "numpy":
+            self.__load_vectorized_statistics(circuits)
+        else:
+            self.__load_grouped_statistics(circuits)
 
-                # Si hay votos.
-                if(count is not None):
-                    lst.append(count)
+    def __checked_cells(self):
+        """Retorna los tipos de voto a chequear (por debajo o por encima de
+        los límites) y las categorías no excluidas, cuyo producto son las cel-
+        das con estadísticas.
 
-        return StatisticsAnalyzer(lst, self.__iqr_ponderation)
+        Returns:
+            vtypes (list): tipos de voto a chequear.
+            categories (list): categorías no excluidas."""
+
+        checked = self.__st_lower_check | self.__st_upper_check
+        vtypes = [vtype for vtype in self.__vote_types.keys()
+                  if vtype in checked]
+        categories = [vcategory for vcategory in self.__categories.keys()
+                      if vcategory not in self.__st_avoid_check]
+        return vtypes, categories
+
+    def __load_grouped_statistics(self, circuits=None):
+        """Calcula (ver BaselineAggregator), en una única recorrida de las me-
+        sas grabadas de los circuitos indicados (por omisión, todos), las esta-
+        dísticas de cada nivel de línea de base, tipo de voto a chequear y ca-
+        tegoría no excluida, y las carga en la caché de estadísticas."""
+
+        start = time.perf_counter()
+
+        if circuits is None:
+            circuits = self.__circuits
+
+        vtypes, categories = self.__checked_cells()
+        cells = [(vtype, vcategory) for vtype in vtypes
+                 for vcategory in categories]
+
+        aggregator = BaselineAggregator(self.__levels, cells,
+                                        self.__estimator, self.__compression)
+
+        for circuit in circuits:
+            for vs in self.__get_by_circuit(circuit):
+                if vs.status.lower() == "grabada":
+                    aggregator.add(vs, self.__groups(vs))
+
+        for key, statistics in aggregator.statistics(self.__iqr_ponderation):
+            self.__statistics[key] = statistics
+            self.__statistics_computed += 1
+
+        self.__statistics_seconds += time.perf_counter() - start
+
+    def __load_vectorized_statistics(self, circuits=None):
+        """Calcula, mediante el motor vectorizado (NumPy), las estadísticas de
+        los circuitos indicados (por omisión, todos) para todos los tipos de
+        voto a chequear y categorías no excluidas a la vez, y las carga en la
+        caché de estadísticas.
+        Los conteos se empaquetan en una única recorrida de las mesas, y cada
+        nivel de línea de base sólo agrega un cálculo vectorizado (con las
+        etiquetas de sus grupos)."""
+
+        try:
+            import numpy as np
+            from lib.vectorized import MISSING, VectorizedStatistics
+        except ImportError:
+            print("El motor 'numpy' requiere tener instalado NumPy.")
+            exit(1)
+
+        start = time.perf_counter()
+
+        vtypes, categories = self.__checked_cells()
+        if circuits is None:
+            circuits = self.__circuits
+
+        # Sólo se consideran las mesas grabadas.
+        vstations = [vs for circuit in circuits
+                     for vs in self.__get_by_circuit(circuit)
+                     if vs.status.lower() == "grabada"]
+
+        # Empaquetado de conteos (mesas x tipos de voto x categorías), y
+        # etiquetas de grupo de cada mesa, por nivel de línea de base.
+        counts = np.full((len(vstations), len(vtypes), len(categories)),
+                         MISSING, dtype=np.int64)
+        labels = np.zeros((len(self.__levels), len(vstations)),
+                          dtype=np.int64)
+        groups = [{} for level in self.__levels]
+
+        for i, vs in enumerate(vstations):
+            for l, group in enumerate(self.__groups(vs)):
+                labels[l, i] = groups[l].setdefault(group, len(groups[l]))
+            for j, vtype in enumerate(vtypes):
+                for k, vcategory in enumerate(categories):
+                    count = vs.count(vtype, vcategory)
+                    if count is not None:
+                        counts[i, j, k] = count
+
+        for l, level in enumerate(self.__levels):
+            statistics = VectorizedStatistics(counts, labels[l],
+                                              self.__iqr_ponderation)
+
+            for group, i in groups[l].items():
+                for j, vtype in enumerate(vtypes):
+                    for k, vcategory in enumerate(categories):
+                        key = (level, group, vtype, vcategory)
+                        self.__statistics[key] = statistics.summary(i, j, k)
+                        self.__statistics_computed += 1
+
+        self.__statistics_seconds += time.perf_counter() - start
 
     def __verify_status(self, vstation):
         """Verifica el estado de una mesa de votación.
@@ -479,14 +1236,13 @@ class VotingStationCollection:
             vstation (VotingStation): mesa de votación a analizar.
 
         Returns:
-            remark (string): observación en caso de que la mesa no haya sido
-            cargada. Si no hay observaciones se retorna vacío.
+            remark (Remark): observación en caso de que la mesa no haya sido
+            cargada. Si no hay observaciones se retorna None.
         """
-        remark = ""
+        remark = None
         # Si acta no fue grabada...
-        if vstation.information.status.lower() != VotingStation.status_ok:
-            status = vstation.information.status
-            remark = VotingStationStatus.NotComputed.format(status)
+        if vstation.status.lower() != VotingStation.status_ok:
+            remark = Remark(Remark.Status, "", "", None, None, None, "")
 
         return remark
 
@@ -496,35 +1252,44 @@ class VotingStationCollection:
             vstation (VotingStation): mesa de votación a analizar.
 
         Returns:
-            remark (string): observación en caso de que la mesa no haya sido
-            cargada. Si no hay observaciones, se retorna vacío."""
-        remark = ""
+            remark (Remark): observación en caso de que la mesa no haya sido
+            cargada. Si no hay observaciones, se retorna None."""
+        remark = None
 
         # Si se supera la cantidad máxima de votos impugnados admitidos.
         count = vstation.impugned_votes
         max = self.__st_max_impugned
         if count > max:
-            remark = VotingStationStatus.ImpugnedVotes.format(max, count)
+            remark = Remark(Remark.Impugned, "", "", max, None, count, "")
         return remark
 
-    def __verify_deviation(self, circuit, vcount, vtype, vcategory):
+    def __verify_deviation(self, level, group, vcount, vtype, vcategory):
         """Verifica si los votos de la mesa pasada por parámetro son menores/
-        superiores a los límites inferior/superior. Nota: la verificación
+        superiores a los límites inferior/superior de la línea de base indica-
+        da. Nota: la verificación
         sólo se realiza si el tipo de voto o partido político se ha especifica-
         do en las opciones "VoteTypesUpperCheck" o "VoteTypesLowerCheck"
         (sección Statistics) del archivo de configuración.
 
         Args:
-            circuit (string): circuito al que corresponde el conteo.
+            level (string): nivel de línea de base (circuito, sección o dis-
+            trito).
+            group (string): grupo (del nivel) al que corresponde el conteo.
             vcount (int): cantidad de votos para el tipo de voto y categoría.
             vtype (string): tipo de voto.
             vcategory (string): tipo de categoría.
 
         Returns:
-            remarks (list): listado de observaciones."""
+            remarks (list): listado de observaciones (Remark)."""
+
+        # Si el tipo de voto no se chequea, no hay observaciones posibles (y
+        # no es necesario obtener las estadísticas de la línea de base).
+        if vtype not in self.__st_lower_check and \
+           vtype not in self.__st_upper_check:
+            return []
 
-        # Valores estadísticos del circuito.
-        statistics = self.__get_circuit_statistics(circuit, vtype, vcategory)
+        # Valores estadísticos de la línea de base.
+        statistics = self.__get_statistics(level, group, vtype, vcategory)
 
         # Tipos de votos a chequear.
         tocheck = []
@@ -537,8 +1302,9 @@ class VotingStationCollection:
             # Indica si los val. de la mesa se encuentran en los límites.
             in_bound = True
 
-            # Observación.
-            remark = ""
+            # Observación (verificación y límite).
+            kind = ""
+            limit = None
 
             if i == 0:
                 # lower limit check.
@@ -546,11 +1312,12 @@ class VotingStationCollection:
                 tocheck = self.__st_lower_check
 
                 # Si la cantidad de votos es menor a la esperada.
-                if vcount < statistics.lower_limit():
+                limit = statistics.lower_limit()
+                if vcount < limit:
                     in_bound = False
 
                     # Observación establecida en lower.
-                    remark = VotingStationStatus.LowerOfAvg
+                    kind = Remark.Lower
 
             else:
                 # upper limit check.
@@ -558,10 +1325,11 @@ class VotingStationCollection:
                 tocheck = self.__st_upper_check
 
                 # Si la cantidad de votos supera la esperada.
-                if vcount > statistics.upper_limit():
+                limit = statistics.upper_limit()
+                if vcount > limit:
                     in_bound = False
                     # Observación. establecido en upper.
-                    remark = VotingStationStatus.UpperOfAvg
+                    kind = Remark.Upper
 
             # Si está en los límites...
             if in_bound:
@@ -570,26 +1338,28 @@ class VotingStationCollection:
 
             # Si no está en los límites y se debe chequear...
             elif vtype in tocheck:
-                # Formateo de comentario.
-                remark = remark.format(self.__vote_types[vtype],
-                                       self.__categories[vcategory],
-                                       round(statistics.average()), vcount)
-                remarks.append(remark)
+                # Registro de observación (el texto se formatea al emitir el
+                # análisis, ver __remark_text).
+                remarks.append(Remark(kind, vtype, vcategory, limit,
+                                      statistics.average(), vcount, level))
 
         return remarks
 
-    def __verify_statistics(self, circuit, vstation):
-        """Verifica estadísticas de la mesa de votación pasada por parámetro.
+    def __verify_statistics(self, vstation):
+        """Verifica estadísticas de la mesa de votación pasada por parámetro,
+        contra cada nivel de línea de base.
 
         Args:
-            circuit (string): circuito de la mesa de votación.
             vstation (VotingStation): mesa de votación.
 
         Returns:
-            remarks (list): listado de observaciones."""
+            remarks (list): listado de observaciones (Remark)."""
 
         remarks = []
 
+        # Grupo de la mesa en cada nivel de línea de base.
+        levels = tuple(zip(self.__levels, self.__groups(vstation)))
+
         for vtype in self.__vote_types.keys():
             for vcategory in self.__categories.keys():
 
@@ -597,112 +1367,217 @@ class VotingStationCollection:
                 if vcategory in self.__st_avoid_check:
                     continue
 
-                # Obtención de categorías de tipo de voto.
-                category_votes = vstation.votes[vtype]
-
                 # Obtención de conteo de la categoría específica.
-                vcount = getattr(category_votes, vcategory)
+                vcount = vstation.count(vtype, vcategory)
 
                 # Si el conteo es nulo.
                 if vcount is None:
                     continue
 
-                # Add de comentarios de categoría analizada.
-                cat_remarks = self.__verify_deviation(circuit, vcount,
-                                                      vtype, vcategory)
+                # Add de comentarios de categoría analizada (por nivel).
+                for level, group in levels:
+                    cat_remarks = self.__verify_deviation(level, group, vcount,
+                                                          vtype, vcategory)
 
-                if len(cat_remarks) > 0:
-                    remarks.extend(cat_remarks)
+                    if len(cat_remarks) > 0:
+                        remarks.extend(cat_remarks)
 
         return remarks
 
     def __analize(self):
         """Realiza análisis de la colección de mesas de votación."""
 
+        # Las estadísticas de todas las líneas de base se calculan de antema-
+        # no, en una única recorrida de las mesas.
+        if self.__vstations:
+            self.__load_statistics()
+
         # Análisis por circuito.
         for circuit in self.__circuits:
-            # Obtención de votos de circuito.
-            vstations = self.__get_by_circuit(circuit)
+            self.__analize_circuit(circuit)
+
+    def __analize_circuit(self, circuit):
+        """Realiza análisis de las mesas de votación del circuito indicado."""
 
-            # Análisis de mesas de votación.
-            for vstation in vstations:
-                print("Analizando", vstation.information.station_number)
+        # Obtención de votos de circuito.
+        vstations = self.__get_by_circuit(circuit)
+
+        # Análisis de mesas de votación.
+        for vstation in vstations:
+            print("Analizando", vstation.station_number)
+
+            # Observaciones de la mesa.
+            remarks = []
+
+            # Análisis de estado de la mesa.
+            remark = self.__verify_status(vstation)
+
+            if remark:
+                remarks.append(remark)
 
-                # Análisis de estado de la mesa.
-                remark = self.__verify_status(vstation)
+            # Si no hay observaciones (estado ok)...
+            if not remark:
+                # Análisis de votos impugnados.
+                remark = self.__verify_impugned(vstation)
 
-                if remark:
-                    vstation.information.remarks.append(remark)
+                if(remark):
+                    remarks.append(remark)
 
-                # Si no hay observaciones (estado ok)...
-                if not remark:
-                    # Análisis de votos impugnados.
-                    remark = self.__verify_impugned(vstation)
+                # Análisis estadístico de circuito.
+                remarks.extend(self.__verify_statistics(vstation))
 
-                    if(remark):
-                        vstation.information.remarks.append(remark)
+            # Las observaciones se almacenan como tupla (inmutable, sin
+            # sobreasignación).
+            vstation.remarks = tuple(remarks)
 
-                    # Análisis estadístico de circuito.
-                    remarks = self.__verify_statistics(circuit, vstation)
+            # Si hay observaciones...
+            if len(vstation.remarks) > 0:
+                remarked = self.__remarked_by_circuit.setdefault(circuit, [])
+                remarked.append(vstation)
 
-                    if len(remarks) > 0:
-                        vstation.information.remarks.extend(remarks)
+    def __remark_text(self, vstation, remark):
+        """Retorna el texto de una observación de la mesa indicada (ver Voting-
+        StationStatus)."""
 
-                # Si hay observaciones...
-                if len(vstation.information.remarks) > 0:
-                    self.__remarked_vstations.append(vstation)
+        if remark.kind == Remark.Status:
+            return VotingStationStatus.NotComputed.format(vstation.status)
+        elif remark.kind == Remark.Impugned:
+            return VotingStationStatus.ImpugnedVotes.format(remark.limit,
+                                                            remark.count)
+
+        if remark.kind == Remark.Lower:
+            text = VotingStationStatus.LowerOfAvg
+        else:
+            text = VotingStationStatus.UpperOfAvg
+
+        text = text.format(self.__vote_types[remark.vtype],
+                           self.__categories[remark.category],
+                           round(remark.reference), remark.count)
+
+        # Con más de una línea de base (o distinta del circuito), se indica el
+        # nivel que originó la observación.
+        if self.__levels != ("circuit",):
+            text += VotingStationStatus.Baseline.format(
+                self.__level_names[remark.level])
+
+        return text
+
+    def __remarked(self, circuit):
+        """Retorna las mesas con observaciones del circuito indicado, ordena-
+        das por número de mesa."""
+        return sorted(self.__remarked_by_circuit.get(circuit, []),
+                      key=lambda x: int(x.station_number))
+
+    def remark_records(self, circuits=None):
+        """Retorna las observaciones como registros estructurados (ver lib/
+        export.py), en el orden de los circuitos, las mesas y las verifica-
+        ciones.
+
+        Args:
+            circuits (list): circuitos a exportar (por omisión, todos).
+
+        Returns:
+            records (list): tuplas (circuito, sección, mesa, verificación,
+            tipo de voto, categoría, nivel de línea de base, límite, valor de
+            referencia, valor de la mesa, observación)."""
+
+        if circuits is None:
+            circuits = self.__circuits
+
+        records = []
+        for circuit in circuits:
+            for vs in self.__remarked(circuit):
+                for remark in vs.remarks:
+                    records.append((vs.circuit, vs.section,
+                                    int(vs.station_number), remark.kind,
+                                    remark.vtype, remark.category,
+                                    remark.level, remark.limit,
+                                    remark.reference, remark.count,
+                                    self.__remark_text(vs, remark)))
+        return records
+
+    def save_analysis(self, circuits=None, remarks=True):
+        """Almacena, en el directorio especificado en el archivo de configura-
+        ción, el análisis resultante: un archivo de texto por circuito, más la
+        exportación (ver export_remarks) de las observaciones de todos los
+        circuitos analizados.
 
-    def save_analysis(self):
-        """Almacena, en el directorio especificado en el archivo de configuraci-
-        ón, el análisis resultante."""
+        Args:
+            circuits (list): circuitos a almacenar (por omisión, todos).
+            remarks (bool): indica si se exportan las observaciones (recorre
+            todos los circuitos, por lo que, al almacenar circuitos a medida
+            que se completan, conviene exportarlas una única vez al final)."""
 
-        # Obtención de configuración.
-        cfg = utils.cfg()
-        dir = cfg["Dirs"]["Statistics"]
+        dir = self.__settings.statistics_dir
         utils.makedirs(dir)
 
         # Print en directorio.
-        self.print_analysis(dir)
+        self.print_analysis(dir, circuits)
 
-    def print_analysis(self, dir=""):
-        """Imprime en pantalla (o en un directorio) el análisis resultante.
+        # Exportación estructurada.
+        if remarks:
+            self.export_remarks()
 
-        Args:
-            dir (string): directorio de salida (opcional). Si es vacío, la im-
-            presión se realiza en pantalla."""
+    def export_remarks(self):
+        """Exporta (JSON lines y CSV, ver lib/export.py) las observaciones de
+        todos los circuitos analizados en el directorio de análisis.
 
-        # Archivo de salida (outputfile).
-        ofile = None
+        Returns:
+            paths (list): paths de los archivos generados."""
 
-        # Evaluación por circuitos.
-        for circuit in self.__circuits:
+        dir = self.__settings.statistics_dir
+        utils.makedirs(dir)
+        return export.export_remarks(self.remark_records(), dir)
 
-            # Establecimiento de un output file por circuito.
-            if dir != "":
-                ofile = open(dir + "/" + circuit + ".txt", "w")
+    def __format_circuit(self, circuit):
+        """Retorna el análisis (texto) del circuito indicado: mesas con obser-
+        vaciones y resumen."""
+
+        # Filtro por circuito (ordenado).
+        ordered = self.__remarked(circuit)
+
+        lines = []
 
-            # Filtro por circuito.
-            filtered = self.__get_by_circuit(circuit,
-                                             self.__remarked_vstations)
+        # Mesas de votación con observaciones.
+        for vs in ordered:
+            lines.append("Datos de mesa:")
+            lines.append("- Circuito: {0}".format(vs.circuit))
+            lines.append("- Sección: {0}".format(vs.section))
+            lines.append("- Mesa: {0}".format(vs.station_number))
+            lines.append("- Observaciones:")
 
-            # Sorted.
-            ordered = sorted(filtered, key=lambda x:
-                             int(x.information.station_number))
+            for remark in vs.remarks:
+                lines.append("  - " + self.__remark_text(vs, remark))
 
-            # Impresión de mesas de votación con observaciones.
-            for vs in ordered:
-                print("Datos de mesa:", file=ofile)
-                print("- Circuito:", vs.information.circuit, file=ofile)
-                print("- Sección:", vs.information.section, file=ofile)
-                print("- Mesa:", vs.information.station_number, file=ofile)
-                print("- Observaciones:", file=ofile)
+            # Pretty print ;)
+            lines.append("")
 
-                for remark in vs.information.remarks:
-                    print("  - " + remark, file=ofile)
+        # Resumen del circuito.
+        msg = "Mesas con observaciones (circuito {0}): {1}\n"
+        lines.append(msg.format(circuit, len(ordered)))
 
-                # Pretty print ;)
-                print("", file=ofile)
+        return "\n".join(lines) + "\n"
 
-            # Impresión de resumen del circuito.
-            msg = "Mesas con observaciones (circuito {0}): {1}\n"
-            print(msg.format(circuit, len(filtered)), file=ofile)
+    def print_analysis(self, dir="", circuits=None):
+        """Imprime en pantalla (o en un directorio) el análisis resultante.
+        El análisis de cada circuito se escribe en una única escritura, y cada
+        archivo se cierra al finalizar.
+
+        Args:
+            dir (string): directorio de salida (opcional). Si es vacío, la im-
+            presión se realiza en pantalla.
+            circuits (list): circuitos a imprimir (por omisión, todos)."""
+
+        if circuits is None:
+            circuits = self.__circuits
+
+        # Evaluación por circuitos.
+        for circuit in circuits:
+            content = self.__format_circuit(circuit)
+
+            # Un output file por circuito.
+            if dir != "":
+                with open(dir + "/" + circuit + ".txt", "w") as ofile:
+                    ofile.write(content)
+            else:
+                print(content, end="")
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: cache.py
+- Descripción: caché persistente (SQLite) de telegramas parseados:
+    - ParsedCache (class), ver docstring.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import os
+import pickle
+import sqlite3
+
+
+class ParsedCache(object):
+    """Caché persistente de registros de mesas de votación (ver VotingStation.
+    to_record), indexada por nombre de archivo. Cada registro se almacena junto
+    con la firma del telegrama del que se parseó (dos enteros, según el alma-
+    cén de la caché web: fecha de modificación y tamaño del archivo, o hash y
+    tamaño del contenido; ver lib/store.py), por lo que un registro sólo se
+    reutiliza si el telegrama no cambió.
+
+    La caché se invalida por completo si cambia su huella (fingerprint), es de-
+    cir, la configuración de la que dependen los registros parseados (por ejem-
+    plo, las keys de partidos políticos)."""
+
+    # Versión del formato de los registros almacenados.
+    version = "1"
+
+    # Versión del esquema de la base (PRAGMA user_version, ver __migrate).
+    schema = 1
+
+    def __init__(self, path, fingerprint=""):
+        """Abre (o crea) la caché.
+
+        Args:
+            path (string): path del archivo SQLite.
+            fingerprint (string): huella de la configuración de parseo."""
+
+        dir = os.path.dirname(path)
+        if dir and not os.path.exists(dir):
+            os.makedirs(dir)
+
+        self.__connection = sqlite3.connect(path)
+        self.__connection.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS stations (
+                filename TEXT PRIMARY KEY,
+                signature INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                record BLOB NOT NULL);
+        """)
+        self.__migrate()
+
+        # Invalidación de caché ante cambios de versión o configuración.
+        fingerprint = ParsedCache.version + ":" + fingerprint
+        row = self.__connection.execute("SELECT value FROM meta WHERE "
+                                        "key = 'fingerprint'").fetchone()
+        if row is None or row[0] != fingerprint:
+            with self.__connection:
+                self.__connection.execute("DELETE FROM stations")
+                self.__connection.execute("INSERT OR REPLACE INTO meta "
+                                          "VALUES ('fingerprint', ?)",
+                                          (fingerprint,))
+
+    def __migrate(self):
+        """Actualiza el esquema de una caché creada con una versión previa:
+        en el esquema 0, la primera componente de la firma se almacenaba en
+        la columna mtime (aunque, según el almacén de la caché web, puede ser
+        un hash del contenido), renombrada a signature en el esquema 1. Los
+        registros almacenados se conservan."""
+
+        version = self.__connection.execute("PRAGMA user_version").fetchone()
+        if version[0] >= ParsedCache.schema:
+            return
+
+        columns = [row[1] for row in self.__connection.execute(
+            "PRAGMA table_info(stations)")]
+        with self.__connection:
+            if "mtime" in columns:
+                self.__connection.execute("ALTER TABLE stations RENAME "
+                                          "COLUMN mtime TO signature")
+            self.__connection.execute("PRAGMA user_version = {0}"
+                                      .format(ParsedCache.schema))
+
+    def load(self):
+        """Carga, en una única consulta, todas las entradas de la caché.
+
+        Returns:
+            entries (dict): filename -> (firma, registro)."""
+
+        entries = {}
+        cursor = self.__connection.execute("SELECT filename, signature, "
+                                           "size, record FROM stations")
+        for filename, signature, size, record in cursor:
+            entries[filename] = ((signature, size), pickle.loads(record))
+
+        return entries
+
+    def signatures(self):
+        """Carga las firmas de todas las entradas de la caché (sin los regis-
+        tros, que se leen de a uno; ver get).
+
+        Returns:
+            signatures (dict): filename -> firma."""
+
+        cursor = self.__connection.execute("SELECT filename, signature, "
+                                           "size FROM stations")
+        return {filename: (signature, size)
+                for filename, signature, size in cursor}
+
+    def get(self, filename):
+        """Retorna el registro almacenado para el archivo indicado (None si no
+        está en la caché)."""
+
+        row = self.__connection.execute("SELECT record FROM stations WHERE "
+                                        "filename = ?", (filename,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def store(self, entries):
+        """Almacena (o reemplaza) entradas en la caché.
+
+        Args:
+            entries (list): tuplas (filename, firma, registro)."""
+
+        rows = [(filename, signature[0], signature[1],
+                 pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+                for filename, signature, record in entries]
+
+        with self.__connection:
+            self.__connection.executemany("INSERT OR REPLACE INTO stations "
+                                          "VALUES (?, ?, ?, ?)", rows)
+
+    def prune(self, filenames):
+        """Elimina de la caché las entradas cuyos archivos ya no existen.
+
+        Args:
+            filenames (iterable): nombres de archivo vigentes."""
+
+        current = set(filenames)
+        stale = [(filename,) for filename in self.load_filenames()
+                 if filename not in current]
+
+        with self.__connection:
+            self.__connection.executemany("DELETE FROM stations WHERE "
+                                          "filename = ?", stale)
+
+    def load_filenames(self):
+        """Retorna los nombres de archivo presentes en la caché."""
+        cursor = self.__connection.execute("SELECT filename FROM stations")
+        return [row[0] for row in cursor]
+
+    def close(self):
+        """Cierra la caché."""
+        self.__connection.close()
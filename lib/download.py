@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: download.py
+- Descripción: motor de descarga asíncrono (asyncio), con concurrencia acotada
+y limitación de tasa de requests, y política de reintentos:
+    - DownloadError (class), ver docstring.
+    - RetryPolicy (class), ver docstring.
+    - fetch (function), ver docstring.
+    - observe (function), ver docstring.
+    - TokenBucket (class), ver docstring.
+    - KeepAliveConnection (class), ver docstring.
+    - Downloader (class), ver docstring.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import asyncio
+import http.client
+import random
+import time
+
+
+# Clasificación de respuestas (ver RetryPolicy.classify).
+OK = "ok"
+END = "end"
+TRANSIENT = "transient"
+FAILED = "failed"
+
+
+class DownloadError(Exception):
+    """Error de descarga definitivo (permanente, o transitorio pero persis-
+    tente luego de agotar los reintentos)."""
+
+
+class RetryPolicy(object):
+    """Política de reintentos: los errores transitorios (de conexión, timeouts,
+    respuestas 5xx y 429) se reintentan hasta retries veces, con espera expo-
+    nencial (base * 2^intento, acotada a maximum) y jitter completo (la espera
+    efectiva es aleatoria entre 0 y dicho valor)."""
+
+    def __init__(self, retries=5, base=0.5, maximum=30.0):
+        """Inicializa política.
+
+        Args:
+            retries (int): cantidad máxima de reintentos.
+            base (float): espera base, en segundos.
+            maximum (float): espera máxima, en segundos."""
+
+        self.retries = retries
+        self.__base = base
+        self.__maximum = maximum
+
+    def delay(self, attempt):
+        """Retorna la espera (en segundos) previa al reintento indicado (0 es
+        el primer reintento)."""
+        return random.uniform(0, min(self.__maximum,
+                                     self.__base * 2 ** attempt))
+
+    @staticmethod
+    def classify(status):
+        """Clasifica el status de una respuesta.
+
+        Returns:
+            kind (string): OK (respuesta válida), END (404, la mesa no existe,
+            por lo que finaliza el rango), TRANSIENT (se debe reintentar) o
+            FAILED (error permanente)."""
+
+        if status == 404:
+            return END
+        if status == 429 or status >= 500:
+            return TRANSIENT
+        if status >= 400:
+            return FAILED
+        return OK
+
+
+# Errores de conexión que se consideran transitorios.
+TRANSIENT_ERRORS = (OSError, http.client.HTTPException, asyncio.TimeoutError,
+                    asyncio.IncompleteReadError, ValueError)
+
+
+def fetch(host, url, policy, timeout=30, port=80, headers=None,
+          metrics=None):
+    """Realiza request GET (en forma sincrónica), reintentando los errores
+    transitorios según la política indicada.
+
+    Args:
+        host (string): servidor.
+        url (string): path a solicitar.
+        policy (RetryPolicy): política de reintentos.
+        timeout (float): timeout de conexión y lectura, en segundos.
+        port (int): puerto del servidor.
+        headers (dict): headers adicionales (por ejemplo, condicionales).
+        metrics (Metrics): métricas de ejecución (latencia y bytes de cada
+        request, ver observe).
+
+    Returns:
+        response (tuple): (status, headers, cuerpo), con status de tipo OK o
+        END (ver RetryPolicy.classify).
+
+    Raises:
+        DownloadError: si la descarga falla en forma definitiva."""
+
+    attempt = 0
+    while True:
+        start = time.perf_counter()
+        try:
+            connection = http.client.HTTPConnection(host, port,
+                                                    timeout=timeout)
+            try:
+                connection.request("GET", url, headers=headers or {})
+                response = connection.getresponse()
+                body = response.read()
+            finally:
+                connection.close()
+
+            response_headers = {k.lower(): v
+                                for k, v in response.getheaders()}
+            kind = RetryPolicy.classify(response.status)
+            error = "HTTP {0}".format(response.status)
+            observe(metrics, start, response.status, body)
+        except TRANSIENT_ERRORS as e:
+            kind = TRANSIENT
+            error = "{0}: {1}".format(type(e).__name__, e)
+            observe(metrics, start)
+
+        if kind in (OK, END):
+            return response.status, response_headers, body
+
+        if kind == FAILED or attempt >= policy.retries:
+            raise DownloadError(error)
+
+        time.sleep(policy.delay(attempt))
+        attempt += 1
+
+
+def observe(metrics, start, status=None, body=b""):
+    """Registra un request (intento) en las métricas indicadas (si las hay):
+    latencia, bytes recibidos y status (o error de conexión).
+
+    Args:
+        metrics (Metrics): métricas de ejecución (o None).
+        start (float): inicio del request (time.perf_counter).
+        status (int): status de la respuesta (None ante error).
+        body (bytes): cuerpo de la respuesta."""
+
+    if metrics is None or not metrics.enabled:
+        return
+
+    metrics.observe("http_latency", time.perf_counter() - start)
+    metrics.count("http_requests")
+    metrics.count("http_bytes", len(body))
+    metrics.count("http_errors" if status is None else
+                  "http_status_{0}".format(status))
+
+
+class TokenBucket(object):
+    """Limitador de tasa (token bucket): permite, en promedio, rate requests
+    por segundo, con ráfagas de hasta capacity requests."""
+
+    def __init__(self, rate, capacity=1):
+        """Inicializa limitador.
+
+        Args:
+            rate (float): requests por segundo. Si es 0, no se limita la tasa.
+            capacity (int): cantidad máxima de tokens acumulables."""
+
+        self.__rate = rate
+        self.__capacity = capacity
+        self.__tokens = capacity
+        self.__updated = time.monotonic()
+        self.__lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Espera hasta disponer de un token, y lo consume."""
+
+        if self.__rate <= 0:
+            return
+
+        async with self.__lock:
+            while True:
+                now = time.monotonic()
+                elapsed = now - self.__updated
+                self.__tokens = min(self.__capacity,
+                                    self.__tokens + elapsed * self.__rate)
+                self.__updated = now
+
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.__tokens) / self.__rate)
+
+
+class KeepAliveConnection(object):
+    """Conexión HTTP/1.1 persistente (keep-alive) a un host. Si el servidor
+    cierra la conexión, esta se reabre en el siguiente request."""
+
+    def __init__(self, host, port=80):
+        self.__host = host
+        self.__port = port
+        self.__reader = None
+        self.__writer = None
+
+    async def __connect(self):
+        """Abre la conexión, si no está abierta."""
+        if self.__writer is None:
+            self.__reader, self.__writer = \
+                await asyncio.open_connection(self.__host, self.__port)
+
+    async def close(self):
+        """Cierra la conexión."""
+        if self.__writer is not None:
+            self.__writer.close()
+            try:
+                await self.__writer.wait_closed()
+            except OSError:
+                pass
+        self.__reader = None
+        self.__writer = None
+
+    async def __read_body(self, status, headers, method="GET"):
+        """Lee el cuerpo de la respuesta según su status y sus headers."""
+
+        reader = self.__reader
+
+        # Respuestas sin cuerpo (RFC 7230, sección 3.3.3): 1xx, 204, 304 y
+        # respuestas a HEAD. No incluyen Content-Length, por lo que no deben
+        # leerse hasta el cierre de la conexión (que, con keep-alive, no
+        # ocurre).
+        if method == "HEAD" or status < 200 or status in (204, 304):
+            return b""
+
+        # Cuerpo con transfer-encoding chunked.
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    # Trailers (se descartan).
+                    while (await reader.readline()) not in (b"\r\n", b""):
+                        pass
+                    return bytes(body)
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+
+        # Cuerpo de longitud conocida.
+        if "content-length" in headers:
+            return await reader.readexactly(int(headers["content-length"]))
+
+        # Cuerpo delimitado por el cierre de la conexión.
+        body = await reader.read()
+        await self.close()
+        return body
+
+    async def request(self, url, headers=None):
+        """Realiza request GET.
+
+        Args:
+            url (string): path (y query) a solicitar.
+            headers (dict): headers adicionales.
+
+        Returns:
+            response (tuple): (status, headers, cuerpo). Los nombres de los
+            headers se retornan en minúsculas."""
+
+        # Un intento sobre la conexión existente y, si el servidor la cerró
+        # (keep-alive vencido), otro sobre una conexión nueva.
+        for attempt in range(2):
+            reused = self.__writer is not None
+            await self.__connect()
+
+            lines = ["GET {0} HTTP/1.1".format(url),
+                     "Host: {0}".format(self.__host),
+                     "Connection: keep-alive",
+                     "Accept-Encoding: identity"]
+            for name, value in (headers or {}).items():
+                lines.append("{0}: {1}".format(name, value))
+            request = "\r\n".join(lines) + "\r\n\r\n"
+
+            try:
+                self.__writer.write(request.encode("latin-1"))
+                await self.__writer.drain()
+
+                status_line = await self.__reader.readline()
+                if not status_line:
+                    raise ConnectionResetError("Conexión cerrada.")
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+
+            break
+
+        status = int(status_line.split()[1])
+
+        response_headers = {}
+        while True:
+            line = await self.__reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        body = await self.__read_body(status, response_headers)
+
+        if response_headers.get("connection", "").lower() == "close":
+            await self.close()
+
+        return status, response_headers, body
+
+
+class Downloader(object):
+    """Descarga un conjunto de urls de un host, con una cantidad acotada de
+    requests concurrentes (una conexión keep-alive por cada una) y una tasa
+    máxima de requests por segundo."""
+
+    def __init__(self, host, concurrency=1, rate=0, port=80, policy=None,
+                 timeout=30, metrics=None):
+        """Inicializa descargador.
+
+        Args:
+            host (string): servidor.
+            concurrency (int): cantidad máxima de requests simultáneos.
+            rate (float): requests por segundo (0 para no limitar la tasa).
+            port (int): puerto del servidor.
+            policy (RetryPolicy): política de reintentos (por omisión, la
+            política por defecto).
+            timeout (float): timeout de cada request, en segundos.
+            metrics (Metrics): métricas de ejecución (ver observe)."""
+
+        self.__host = host
+        self.__port = port
+        self.__concurrency = max(1, concurrency)
+        self.__rate = rate
+        self.__policy = policy or RetryPolicy()
+        self.__timeout = timeout
+        self.__metrics = metrics
+
+    async def __fetch(self, connection, bucket, url, headers):
+        """Realiza request GET, reintentando los errores transitorios.
+
+        Returns:
+            response (tuple): (status, headers, cuerpo), con status de tipo OK
+            o END.
+
+        Raises:
+            DownloadError: si la descarga falla en forma definitiva."""
+
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            start = time.perf_counter()
+            try:
+                status, headers, body = await asyncio.wait_for(
+                    connection.request(url, headers), self.__timeout)
+                kind = RetryPolicy.classify(status)
+                error = "HTTP {0}".format(status)
+                observe(self.__metrics, start, status, body)
+            except TRANSIENT_ERRORS as e:
+                # La conexión queda en estado indeterminado: se reabre.
+                await connection.close()
+                kind = TRANSIENT
+                error = "{0}: {1}".format(type(e).__name__, e)
+                observe(self.__metrics, start)
+
+            if kind in (OK, END):
+                return status, headers, body
+
+            if kind == FAILED or attempt >= self.__policy.retries:
+                raise DownloadError(error)
+
+            await asyncio.sleep(self.__policy.delay(attempt))
+            attempt += 1
+
+    async def run(self, jobs, handler, skip=None, failure=None):
+        """Descarga las urls indicadas. Cada respuesta se entrega al handler
+        apenas se recibe (por lo que los archivos pueden escribirse a medida
+        que llegan las respuestas). Los errores transitorios se reintentan
+        según la política de reintentos; los errores definitivos se informan
+        mediante failure, sin interrumpir el resto de las descargas.
+
+        Args:
+            jobs (iterable): tuplas (key, url, headers), en el orden de des-
+            carga; headers (dict o None) son headers adicionales del request
+            (por ejemplo, condicionales).
+            handler (function): función handler(key, url, status, headers,
+            cuerpo), invocada con cada respuesta de tipo OK o END.
+            skip (function): función skip(key), invocada antes de cada request;
+            si retorna True, el request no se realiza.
+            failure (function): función failure(key, url, error), invocada con
+            cada descarga fallida."""
+
+        bucket = TokenBucket(self.__rate)
+        queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+
+        async def worker():
+            connection = KeepAliveConnection(self.__host, self.__port)
+            try:
+                while not queue.empty():
+                    key, url, headers = queue.get_nowait()
+
+                    if skip is not None and skip(key):
+                        continue
+
+                    try:
+                        status, headers, body = await self.__fetch(
+                            connection, bucket, url, headers)
+                    except DownloadError as e:
+                        if failure is not None:
+                            failure(key, url, str(e))
+                        continue
+
+                    handler(key, url, status, headers, body)
+            finally:
+                await connection.close()
+
+        workers = [asyncio.ensure_future(worker())
+                   for _ in range(self.__concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: export.py
+- Descripción: exportación de observaciones en formatos estructurados (JSON
+lines y CSV), complementaria al análisis en texto:
+    - to_jsonl (function), ver docstring.
+    - to_csv (function), ver docstring.
+    - write (function), ver docstring.
+    - export_remarks (function), ver docstring.
+    - export_sweep (function), ver docstring.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import csv
+import io
+import json
+import os
+
+
+# Campos de cada registro de observación, en orden.
+REMARK_FIELDS = ("circuit", "section", "station", "kind", "vote_type",
+                 "category", "level", "limit", "reference", "count",
+                 "remark")
+
+# Campos de cada registro de la sensibilidad a la ponderación de IQR (ver
+# VotingStationCollection.sweep): por circuito y por mesa, en orden.
+SWEEP_FIELDS = ("ponderation", "circuit", "stations", "remarked", "outliers",
+                "lower", "upper")
+SWEEP_STATION_FIELDS = ("ponderation", "circuit", "section", "station",
+                        "lower", "upper")
+
+# Archivos de exportación (en el directorio de análisis).
+JSONL_FILE = "remarks.jsonl"
+CSV_FILE = "remarks.csv"
+SWEEP_FILE = "sweep.csv"
+SWEEP_STATIONS_FILE = "sweep_stations.csv"
+
+
+def to_jsonl(records):
+    """Retorna los registros en formato JSON lines (un objeto por línea, con
+    los campos en el orden de REMARK_FIELDS).
+
+    Args:
+        records (list): registros (tuplas con los campos de REMARK_FIELDS).
+
+    Returns:
+        content (string): contenido del archivo."""
+
+    return "".join(json.dumps(dict(zip(REMARK_FIELDS, record)),
+                              ensure_ascii=False) + "\n"
+                   for record in records)
+
+
+def to_csv(records, fields=REMARK_FIELDS):
+    """Retorna los registros en formato CSV (con encabezado). Los valores
+    nulos se exportan vacíos.
+
+    Args:
+        records (list): registros (tuplas con los campos indicados).
+        fields (tuple): campos (encabezado). Por omisión, REMARK_FIELDS.
+
+    Returns:
+        content (string): contenido del archivo."""
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(fields)
+    writer.writerows(["" if value is None else value for value in record]
+                     for record in records)
+    return buffer.getvalue()
+
+
+def write(path, content):
+    """Escribe el contenido indicado (UTF-8, sin conversión de fin de línea)
+    en una única escritura, en forma atómica (archivo temporal y rename)."""
+
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8", newline="") as file:
+        file.write(content)
+    os.replace(temp, path)
+
+
+def export_remarks(records, dir):
+    """Exporta los registros de observaciones (ver VotingStationCollection.
+    remark_records) en los archivos remarks.jsonl y remarks.csv del directorio
+    indicado. Para un mismo análisis, el contenido es idéntico byte a byte en-
+    tre ejecuciones (no incluye fechas, y el orden es el de los circuitos, las
+    mesas y las verificaciones).
+
+    Args:
+        records (list): registros de observaciones.
+        dir (string): directorio de salida.
+
+    Returns:
+        paths (list): paths de los archivos generados."""
+
+    paths = [os.path.join(dir, JSONL_FILE), os.path.join(dir, CSV_FILE)]
+    write(paths[0], to_jsonl(records))
+    write(paths[1], to_csv(records))
+    return paths
+
+
+def export_sweep(summary, stations, dir):
+    """Exporta la sensibilidad a la ponderación de IQR (ver VotingStation-
+    Collection.sweep) en los archivos CSV sweep.csv (por ponderación y cir-
+    cuito) y sweep_stations.csv (mesas con valores atípicos, por ponderación)
+    del directorio indicado.
+
+    Args:
+        summary (list): registros por ponderación y circuito.
+        stations (list): registros por ponderación y mesa.
+        dir (string): directorio de salida.
+
+    Returns:
+        paths (list): paths de los archivos generados."""
+
+    paths = [os.path.join(dir, SWEEP_FILE),
+             os.path.join(dir, SWEEP_STATIONS_FILE)]
+    write(paths[0], to_csv(summary, SWEEP_FIELDS))
+    write(paths[1], to_csv(stations, SWEEP_STATION_FIELDS))
+    return paths
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: manifest.py
+- Descripción: registro (journal) de descargas de la caché web:
+    - Manifest (class), ver docstring.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+
+class Manifest(object):
+    """Registro (append-only, en formato JSON lines) de las mesas descargadas
+    en un directorio de caché web. Por cada descarga completa se registra el
+    archivo, la url, el status, el tamaño, el hash (sha256) del contenido y la
+    fecha de descarga.
+
+    Los archivos se escriben en forma atómica (archivo temporal y rename), y
+    sólo luego se registran en el manifiesto. Así, un archivo a medio escribir
+    (por ejemplo, ante una interrupción) nunca figura como descargado. Al
+    reanudar una descarga, el manifiesto se carga a memoria una única vez, y se
+    utiliza para decidir qué mesas restan descargar (sin verificar la existen-
+    cia de cada archivo).
+
+    Las entradas se cargan recién al consultarlas (ver get): el análisis, que
+    sólo lista y lee archivos, no las carga (ver files)."""
+
+    # Nombre del archivo de manifiesto.
+    filename = "manifest.jsonl"
+
+    def __init__(self, dir):
+        """Carga (o crea) el manifiesto del directorio indicado.
+
+        Args:
+            dir (string): directorio de caché web."""
+
+        self.dir = dir
+        self.path = os.path.join(dir, Manifest.filename)
+        self.__entries = None
+
+        if not os.path.exists(dir):
+            os.makedirs(dir)
+
+        if not os.path.exists(self.path):
+            self.__migrate()
+
+        self.__file = open(self.path, "a")
+
+    def __read(self):
+        """Genera las entradas del manifiesto, en el orden del archivo. Las
+        líneas inválidas (por ejemplo, una última línea truncada) se descar-
+        tan."""
+
+        file = open(self.path)
+        try:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        finally:
+            file.close()
+
+    def __load(self):
+        """Retorna las entradas del manifiesto (ante entradas repetidas, pre-
+        valece la última), cargándolas en la primera consulta."""
+
+        if self.__entries is None:
+            self.__entries = {}
+            for entry in self.__read():
+                self.__entries[entry["file"]] = entry
+
+        return self.__entries
+
+    def __migrate(self):
+        """Registra los archivos de una caché previa (sin manifiesto)."""
+
+        entries = []
+        for filename in sorted(os.listdir(self.dir)):
+            if not filename.endswith(".htm"):
+                continue
+
+            file = open(os.path.join(self.dir, filename), "rb")
+            content = file.read()
+            file.close()
+
+            entries.append(Manifest.entry(filename, "", 200, content))
+
+        self.__entries = {}
+
+        file = open(self.path, "w")
+        for entry in entries:
+            file.write(json.dumps(entry) + "\n")
+            self.__entries[entry["file"]] = entry
+        file.close()
+
+    @staticmethod
+    def digest(content):
+        """Retorna el hash (sha256) del contenido indicado."""
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def entry(filename, url, status, content, **fields):
+        """Retorna entrada de manifiesto."""
+        entry = {"file": filename, "url": url, "status": status,
+                 "size": len(content), "sha256": Manifest.digest(content),
+                 "fetched": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        entry.update(fields)
+        return entry
+
+    def __contains__(self, filename):
+        return filename in self.__load()
+
+    def __len__(self):
+        return len(self.__load())
+
+    def get(self, filename):
+        """Retorna la entrada del archivo indicado (None si no existe)."""
+        return self.__load().get(filename)
+
+    def matches(self, filename, content):
+        """Indica si el contenido es igual al registrado para el archivo."""
+        entry = self.__load().get(filename)
+        return entry is not None and \
+            entry["sha256"] == Manifest.digest(content)
+
+    def files(self):
+        """Retorna los nombres de archivo registrados. Si las entradas no
+        fueron cargadas, el manifiesto se recorre como flujo (sin cargarlas).
+        """
+        if self.__entries is not None:
+            return list(self.__entries.keys())
+        return list(dict.fromkeys(entry["file"] for entry in self.__read()))
+
+    def signature(self, filename):
+        """Retorna la firma (fecha de modificación en ns y tamaño) del archivo
+        indicado (ver ParsedCache)."""
+        stat = os.stat(os.path.join(self.dir, filename))
+        return stat.st_mtime_ns, stat.st_size
+
+    def read(self, filename):
+        """Retorna el contenido del archivo indicado."""
+        file = open(os.path.join(self.dir, filename), "rb")
+        content = file.read()
+        file.close()
+        return content
+
+    def store(self, filename, url, status, content, **fields):
+        """Escribe (en forma atómica) el archivo descargado, y lo registra.
+
+        Args:
+            filename (string): nombre del archivo (en el directorio de caché).
+            url (string): url de descarga.
+            status (int): status de la respuesta.
+            content (bytes): contenido del archivo.
+            fields (dict): campos adicionales a registrar.
+
+        Returns:
+            entry (dict): entrada registrada."""
+
+        path = os.path.join(self.dir, filename)
+        temp = path + ".tmp"
+
+        file = open(temp, "wb")
+        file.write(content)
+        file.close()
+        os.replace(temp, path)
+
+        entry = Manifest.entry(filename, url, status, content, **fields)
+        self.__file.write(json.dumps(entry) + "\n")
+        self.__file.flush()
+
+        # Si las entradas no fueron cargadas, la entrada se leerá del archivo.
+        if self.__entries is not None:
+            self.__entries[filename] = entry
+
+        return entry
+
+    def close(self):
+        """Cierra el manifiesto."""
+        self.__file.close()
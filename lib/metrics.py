@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: metrics.py
+- Descripción: métricas de ejecución por etapa (opción --profile):
+    - Metrics (class), ver docstring.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import cProfile
+import contextlib
+import json
+import os
+import time
+
+from lib import utils
+
+
+class Metrics(object):
+    """Métricas de ejecución: tiempo (wall time) e invocaciones por etapa,
+    contadores (archivos, bytes, observaciones, etc.) y muestras de valores
+    (por ejemplo, la latencia de cada request), de las que se registra la can-
+    tidad, el total, el mínimo, el máximo y los percentiles 50 y 95.
+
+    Deshabilitadas (por omisión), las etapas no se cronometran y los contado-
+    res y muestras se descartan, sin costo de registro. Para no agregar costo
+    por telegrama, las métricas se registran por etapa o por lote; sólo se mi-
+    den elementos individuales (telegramas, requests) si están habilitadas
+    (ver enabled).
+
+    Opcionalmente, las etapas indicadas como críticas (hot path) se perfilan
+    mediante cProfile; el resultado se vuelca en el archivo indicado (ver
+    pstats)."""
+
+    def __init__(self, enabled=False, dump=""):
+        """Inicializa métricas.
+
+        Args:
+            enabled (bool): indica si las métricas se registran.
+            dump (string): path del volcado de cProfile (vacío si no se per-
+            fila)."""
+
+        self.enabled = enabled or bool(dump)
+        self.dump = dump
+        self.__start = time.perf_counter()
+        self.__stages = {}
+        self.__counters = {}
+        self.__samples = {}
+        self.__profiler = cProfile.Profile() if dump else None
+
+    @contextlib.contextmanager
+    def stage(self, name, hot=False):
+        """Cronometra la etapa indicada (context manager). Las invocaciones
+        repetidas de una misma etapa se acumulan.
+
+        Args:
+            name (string): nombre de la etapa.
+            hot (bool): indica si la etapa se perfila (ver dump)."""
+
+        if not self.enabled:
+            yield
+            return
+
+        profile = hot and self.__profiler is not None
+        if profile:
+            self.__profiler.enable()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profile:
+                self.__profiler.disable()
+
+            stage = self.__stages.setdefault(name, {"seconds": 0,
+                                                    "calls": 0})
+            stage["seconds"] += elapsed
+            stage["calls"] += 1
+
+    def count(self, name, value=1):
+        """Incrementa el contador indicado."""
+        if self.enabled:
+            self.__counters[name] = self.__counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        """Registra una muestra (por ejemplo, una latencia, en segundos)."""
+        if self.enabled:
+            self.__samples.setdefault(name, []).append(value)
+
+    def seconds(self, name):
+        """Retorna el tiempo acumulado de la etapa indicada."""
+        return self.__stages.get(name, {}).get("seconds", 0)
+
+    def __summary(self, values):
+        """Retorna el resumen de una lista de muestras."""
+        ordered = sorted(values)
+        return {"count": len(ordered),
+                "total": sum(ordered),
+                "min": ordered[0],
+                "max": ordered[-1],
+                "p50": ordered[len(ordered) // 2],
+                "p95": ordered[min(len(ordered) - 1,
+                                   int(len(ordered) * 0.95))]}
+
+    def to_dict(self):
+        """Retorna las métricas registradas (serializables como JSON)."""
+        return {"seconds": time.perf_counter() - self.__start,
+                "stages": self.__stages,
+                "counters": self.__counters,
+                "samples": {name: self.__summary(values)
+                            for name, values in self.__samples.items()
+                            if values}}
+
+    def save(self, path):
+        """Escribe las métricas (JSON) en el archivo indicado y, si corres-
+        ponde, el volcado de cProfile.
+
+        Returns:
+            path (string): path del archivo de métricas (vacío si las métri-
+            cas están deshabilitadas)."""
+
+        if not self.enabled:
+            return ""
+
+        utils.makedirs(os.path.dirname(path) or ".")
+
+        file = open(path, "w")
+        json.dump(self.to_dict(), file, indent=2)
+        file.write("\n")
+        file.close()
+
+        if self.__profiler is not None:
+            self.__profiler.dump_stats(self.dump)
+
+        return path
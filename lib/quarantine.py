@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: quarantine.py
+- Descripción: registro de telegramas con error de parseo (cuarentena):
+    - Quarantine (class), ver docstring.
+    - FailureRateExceeded (class), ver docstring.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import hashlib
+import os
+import sys
+
+from lib import utils
+
+
+# Archivos de la cuarentena (en el directorio Reports): lista de telegramas
+# con error y reporte de errores (JSON lines).
+QUARANTINE_FILE = "quarantine.txt"
+ERRORS_FILE = "parse_errors.jsonl"
+
+# Código de salida de una ejecución abortada por la tasa de errores.
+ABORT_STATUS = 2
+
+# Cantidad mínima de telegramas procesados para verificar la tasa de errores
+# sobre los procesados hasta el momento (ver Quarantine.exceeded).
+MIN_SAMPLE = 100
+
+
+class FailureRateExceeded(SystemExit):
+    """Ejecución abortada por superar la tasa máxima de errores de parseo (ver
+    opción MaxFailureRate). Hereda de SystemExit, con código ABORT_STATUS."""
+
+    def __init__(self):
+        SystemExit.__init__(self, ABORT_STATUS)
+
+
+class Quarantine(object):
+    """Telegramas con error de parseo. Cada error se registra (sin detener el
+    procesamiento) en el reporte de errores, con el nombre del telegrama, la
+    excepción y un digest del traceback (hash de la pila de llamadas y el tipo
+    de excepción, sin el mensaje: errores con la misma causa comparten di-
+    gest), y el telegrama se agrega a la lista de cuarentena, que se reescribe
+    en cada ejecución.
+
+    En modo interactivo, además, se espera la confirmación del usuario luego
+    de cada error (comportamiento previo de main.py)."""
+
+    def __init__(self, dir, max_failure_rate=1.0, interactive=False,
+                 min_sample=MIN_SAMPLE):
+        """Inicializa la cuarentena (y elimina la lista de la ejecución ante-
+        rior).
+
+        Args:
+            dir (string): directorio de reportes (opción Reports).
+            max_failure_rate (float): fracción máxima de telegramas con error,
+            sobre los telegramas a procesar (ver expect) o sobre los procesa-
+            dos hasta el momento (ver processed); si se supera, la ejecución
+            se aborta (ver FailureRateExceeded).
+            interactive (bool): indica si se espera confirmación del usuario
+            luego de cada error.
+            min_sample (int): cantidad mínima de telegramas procesados para
+            verificar la tasa sobre los procesados hasta el momento."""
+
+        self.path = os.path.join(dir, QUARANTINE_FILE)
+        self.report = utils.Report(os.path.join(dir, ERRORS_FILE))
+        self.files = []
+        self.total = 0
+        self.parsed = 0
+        self.max_failure_rate = max_failure_rate
+        self.interactive = interactive
+        self.min_sample = min_sample
+        self.__file = None
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def expect(self, count):
+        """Indica la cantidad de telegramas a procesar (además de los ya in-
+        formados con error), sobre la que se calcula la tasa de errores. Hasta
+        entonces, la tasa no se verifica."""
+        self.total = len(self.files) + count
+
+    def processed(self, count=1):
+        """Informa telegramas procesados sin error, parseados o leídos de la
+        caché de parseo (la tasa de errores se verifica también sobre los
+        procesados hasta el momento, ver exceeded).
+
+        Raises:
+            FailureRateExceeded: si se supera la tasa máxima de errores."""
+
+        self.parsed += count
+        self.__check()
+
+    def add(self, filename, error):
+        """Informa un telegrama con error.
+
+        Args:
+            filename (string): nombre del telegrama.
+            error (string): traceback del error (ver traceback.format_exc).
+
+        Raises:
+            FailureRateExceeded: si se supera la tasa máxima de errores."""
+
+        lines = error.rstrip().splitlines()
+        exception = lines[-1] if lines else ""
+        stack = [line for line in lines if line.startswith("  File ")]
+        stack.append(exception.split(":", 1)[0])
+        digest = hashlib.sha1("\n".join(stack).encode()).hexdigest()[:12]
+
+        self.report.add(file=filename, exception=exception, digest=digest)
+        self.files.append(filename)
+
+        if self.__file is None:
+            utils.makedirs(os.path.dirname(self.path) or ".")
+            self.__file = open(self.path, "w")
+        self.__file.write(filename + "\n")
+        self.__file.flush()
+
+        msg = "Error al analizar el archivo {0}. Verifíquelo manualmente."
+        print(msg.format(filename))
+        if self.interactive:
+            input()
+
+        self.__check()
+
+    def __check(self):
+        """Aborta la ejecución si se superó la tasa máxima de errores."""
+
+        if self.exceeded():
+            self.close()
+            msg = "Tasa de errores de parseo superada ({0} de {1} telegramas"
+            msg += " procesados, máximo {2:.0%}): se aborta la ejecución."
+            print(msg.format(len(self.files), len(self.files) + self.parsed,
+                             self.max_failure_rate), file=sys.stderr)
+            raise FailureRateExceeded()
+
+    def exceeded(self):
+        """Indica si se superó la tasa máxima de errores: sobre los telegra-
+        mas a procesar (si se indicaron, ver expect), o sobre los procesados
+        hasta el momento, a partir de min_sample telegramas (así, la ejecu-
+        ción se aborta aunque no se conozca el total, y sin esperar a que los
+        errores superen la tasa sobre el total)."""
+
+        failures = len(self.files)
+        if self.total > 0 and failures > self.max_failure_rate * self.total:
+            return True
+
+        processed = failures + self.parsed
+        return processed >= self.min_sample and \
+            failures > self.max_failure_rate * processed
+
+    def close(self):
+        """Cierra la cuarentena e informa la cantidad de telegramas con error.
+
+        Returns:
+            count (int): cantidad de telegramas con error."""
+
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+            self.report.close()
+
+            msg = "Telegramas con error: {0} (ver {1} y {2})."
+            print(msg.format(len(self.files), self.path, self.report.path))
+
+        return len(self.files)
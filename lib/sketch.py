@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: sketch.py
+- Descripción: estimador aproximado (en memoria acotada) de cuartiles, para
+calcular límites sobre muestras de gran escala (provincia o país):
+    - TDigest (class), ver docstring.
+    - SketchStatistics (class), ver docstring.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import itertools
+import math
+
+
+class TDigest(object):
+    """Sketch t-digest (variante "merging") para estimar cuantiles de una
+    muestra que se recibe como flujo (stream), sin almacenarla: los valores se
+    resumen en a lo sumo ~compression centroides (media y peso), más un buffer
+    acotado de valores aún no combinados. Dos sketches se pueden combinar
+    (merge), por ejemplo, los calculados por distintos procesos.
+
+    Los centroides se acotan según la función de escala k(q) = compression /
+    (2 * pi) * asin(2q - 1), por lo que son más pequeños en los extremos de la
+    distribución. Así, el error de rango (en fracción de la muestra) de un
+    cuantil q queda acotado, aproximadamente, por el ancho de un centroide en
+    q:
+
+        |error| <= 2 * pi * sqrt(q * (1 - q)) / compression
+
+    Con compression = 100 (por omisión), la cota es de ~2.7% de la muestra
+    para los cuartiles 1 y 3, y de ~3.1% para la mediana. El error en valor
+    depende de la densidad de la muestra alrededor del cuantil (es menor cuanto
+    más concentrados estén los valores). El mínimo, el máximo, la cantidad y
+    la media se calculan en forma exacta."""
+
+    def __init__(self, compression=100):
+        """Inicializa sketch vacío.
+
+        Args:
+            compression (float): parámetro de compresión (delta). Mayor com-
+            presión implica más centroides (más memoria) y menor error."""
+
+        self.compression = compression
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+        # Centroides (ordenados por media) y buffer de valores sin combinar.
+        self.__means = []
+        self.__weights = []
+        self.__buffer = []
+        self.__buffer_size = max(16, int(5 * compression))
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value, weight=1):
+        """Agrega un valor (con el peso indicado) a la muestra."""
+
+        self.__buffer.append((value, weight))
+        self.count += weight
+        self.total += value * weight
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+        if len(self.__buffer) >= self.__buffer_size:
+            self.__compress()
+
+    def update(self, values):
+        """Agrega los valores indicados (iterable) a la muestra, por lotes del
+        tamaño del buffer."""
+
+        values = iter(values)
+        while True:
+            chunk = list(itertools.islice(values, self.__buffer_size))
+            if not chunk:
+                break
+
+            self.__buffer.extend((value, 1) for value in chunk)
+            self.count += len(chunk)
+            self.total += sum(chunk)
+
+            low = min(chunk)
+            high = max(chunk)
+            if self.min is None or low < self.min:
+                self.min = low
+            if self.max is None or high > self.max:
+                self.max = high
+
+            if len(self.__buffer) >= self.__buffer_size:
+                self.__compress()
+
+    def merge(self, other):
+        """Combina otro sketch con este (el resultado describe la unión de
+        ambas muestras).
+
+        Args:
+            other (TDigest): sketch a combinar."""
+
+        if other.count == 0:
+            return
+
+        other.__compress()
+        self.__buffer.extend(zip(other.__means, other.__weights))
+        self.count += other.count
+        self.total += other.total
+
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+
+        self.__compress()
+
+    def centroids(self):
+        """Retorna los centroides, como lista de tuplas (media, peso)."""
+        self.__compress()
+        return list(zip(self.__means, self.__weights))
+
+    def __k(self, q):
+        """Función de escala (k1)."""
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def __limit(self, q):
+        """Retorna el peso acumulado máximo (en fracción de la muestra) del
+        centroide que comienza en q (es decir, la inversa de k en k(q) + 1)."""
+        k = min(self.__k(q) + 1, self.compression / 4)
+        return (math.sin(k * 2 * math.pi / self.compression) + 1) / 2
+
+    def __compress(self):
+        """Combina el buffer con los centroides, respetando la cota de tamaño
+        de cada centroide."""
+
+        if not self.__buffer:
+            return
+
+        items = sorted(list(zip(self.__means, self.__weights)) +
+                       self.__buffer)
+        self.__buffer = []
+
+        means = []
+        weights = []
+        total = self.count
+
+        # Peso acumulado previo al centroide actual, y peso acumulado máximo
+        # hasta el que se extiende.
+        cumulative = 0
+        mean, weight = items[0]
+        limit = self.__limit(0) * total
+
+        for value, w in items[1:]:
+            if cumulative + weight + w <= limit:
+                # El valor se incorpora al centroide actual.
+                weight += w
+                mean += (value - mean) * w / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                cumulative += weight
+                limit = self.__limit(cumulative / total) * total
+                mean, weight = value, w
+
+        means.append(mean)
+        weights.append(weight)
+
+        self.__means = means
+        self.__weights = weights
+
+    def quantile(self, q):
+        """Retorna el valor estimado del cuantil q (entre 0 y 1), interpolando
+        linealmente entre los centros de los centroides.
+
+        Returns:
+            value (float): cuantil estimado (0 si la muestra es vacía)."""
+
+        self.__compress()
+
+        if self.count == 0:
+            return 0
+        if len(self.__means) == 1:
+            return self.__means[0]
+
+        means = self.__means
+        weights = self.__weights
+        index = q * self.count
+
+        # Extremos: interpolación entre el valor extremo y el primer (o úl-
+        # timo) centro.
+        if index <= weights[0] / 2:
+            if weights[0] <= 1:
+                return means[0]
+            return self.min + (means[0] - self.min) * index / (weights[0] / 2)
+
+        if index >= self.count - weights[-1] / 2:
+            if weights[-1] <= 1:
+                return means[-1]
+            rest = self.count - index
+            return self.max - (self.max - means[-1]) * rest / (weights[-1] / 2)
+
+        # Interpolación entre los centros de los centroides contiguos.
+        center = weights[0] / 2
+        for i in range(len(means) - 1):
+            step = (weights[i] + weights[i + 1]) / 2
+            if center + step >= index:
+                fraction = (index - center) / step
+                return means[i] + (means[i + 1] - means[i]) * fraction
+            center += step
+
+        return means[-1]
+
+
+class SketchStatistics(object):
+    """Estadísticas aproximadas de una muestra resumida en un TDigest, con la
+    misma interfaz (average, median, lower_limit y upper_limit) que Statis-
+    ticsAnalyzer.
+
+    A diferencia de StatisticsAnalyzer (que calcula q1 y q3 como medianas de
+    las sublistas menor y mayor a la mediana), los cuartiles se estiman como
+    los cuantiles 0.25, 0.5 y 0.75 de la muestra. Ambos métodos coinciden (sal-
+    vo el error del sketch) para muestras grandes y sin valores repetidos en
+    torno a los cuartiles; los límites se calculan con la misma fórmula."""
+
+    def __init__(self, digest, iqr_ponderation=1.00):
+        """Inicializa clase.
+
+        Args:
+            digest (TDigest): sketch de la muestra.
+            iqr_ponderation (float): suavizador de IQR (rango intercuartilíco).
+            Establecido, por omisión, en 1.0."""
+
+        self.__digest = digest
+        self.__iqr_ponderation = iqr_ponderation
+
+        self.__q1 = digest.quantile(0.25)
+        self.__q2 = digest.quantile(0.5)
+        self.__q3 = digest.quantile(0.75)
+        self.__qrange = self.__q3 - self.__q1
+
+    def average(self):
+        """Retorna la media (exacta) de la muestra."""
+        if self.__digest.count == 0:
+            return 0
+        return self.__digest.total / self.__digest.count
+
+    def median(self):
+        """Retorna la mediana (estimada) de la muestra."""
+        return self.__q2
+
+    def quartiles(self):
+        """Retorna los cuartiles (estimados) q1, q2 y q3."""
+        return self.__q1, self.__q2, self.__q3
+
+    def lower_limit(self):
+        """Retorna límite inferior."""
+        return self.__q1 - self.__iqr_ponderation * self.__qrange
+
+    def upper_limit(self):
+        """Retorna límite superior."""
+        return self.__q3 + self.__iqr_ponderation * self.__qrange
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: store.py
+- Descripción: almacenes de telegramas descargados (caché web). Ambos compar-
+ten la interfaz de Manifest (ver lib/manifest.py), más read y signature:
+    - PackedStore (class), ver docstring.
+    - SynchronizedStore (class), ver docstring.
+    - open_store (function), ver docstring.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import json
+import mmap
+import os
+import threading
+import zlib
+
+from lib.manifest import Manifest
+
+
+# Layouts de caché web disponibles (ver opción WebCacheLayout).
+LAYOUTS = ("directory", "packed")
+
+
+class PackedStore(object):
+    """Almacén empaquetado de telegramas: los telegramas se comprimen (zlib,
+    por registro) y se agregan a unos pocos archivos grandes (segmentos), en
+    lugar de escribirse en un archivo por mesa. La ubicación de cada telegrama
+    (segmento, offset y longitud) se registra en un índice append-only (JSON
+    lines) que, además, contiene los mismos datos que el manifiesto de la ca-
+    ché en directorio (url, status, tamaño, hash, fecha y validadores). Ante
+    entradas repetidas, prevalece la última.
+
+    Los telegramas se escriben en el segmento antes de registrarse en el índi-
+    ce, por lo que un registro a medio escribir nunca figura como descargado.
+    Las lecturas se realizan mediante mmap de los segmentos."""
+
+    # Nombre del archivo de índice.
+    filename = "index.jsonl"
+
+    # Tamaño a partir del cual se inicia un nuevo segmento (en bytes).
+    segment_size = 64 * 1024 * 1024
+
+    # Nivel de compresión (zlib).
+    level = 6
+
+    def __init__(self, dir):
+        """Carga (o crea) el almacén del directorio indicado. Si el almacén no
+        existe y el directorio contiene telegramas sueltos (archivos .htm, ver
+        Manifest), estos se importan.
+
+        Args:
+            dir (string): directorio de caché web."""
+
+        self.dir = dir
+        self.path = os.path.join(dir, PackedStore.filename)
+        self.__entries = {}
+        self.__maps = {}
+        self.__segment = None
+        self.__segment_number = 0
+
+        if not os.path.exists(dir):
+            os.makedirs(dir)
+
+        migrate = not os.path.exists(self.path)
+
+        self.__file = open(self.path, "a")
+        self.__index = open(self.path, "rb")
+        self.__load()
+
+        if migrate:
+            self.__migrate()
+
+    def __segment_path(self, number):
+        """Retorna el path del segmento indicado."""
+        return os.path.join(self.dir, "telegrams-{0:04d}.pack".format(number))
+
+    def __load(self):
+        """Carga las entradas agregadas al índice desde la última carga (por
+        este u otro proceso). Las líneas inválidas se descartan."""
+
+        while True:
+            line = self.__index.readline()
+
+            # Una última línea incompleta se relee en la siguiente carga.
+            if not line.endswith(b"\n"):
+                self.__index.seek(-len(line), os.SEEK_CUR)
+                break
+
+            try:
+                entry = json.loads(line.decode("utf-8"))
+            except ValueError:
+                continue
+            self.__entries[entry["file"]] = entry
+            self.__segment_number = max(self.__segment_number,
+                                        entry["segment"])
+
+    def __migrate(self):
+        """Importa los telegramas de una caché en directorio (con sus entradas
+        de manifiesto, si existen)."""
+
+        filenames = sorted(f for f in os.listdir(self.dir)
+                           if f.endswith(".htm"))
+        if not filenames:
+            return
+
+        manifest = Manifest(self.dir)
+        for filename in filenames:
+            entry = dict(manifest.get(filename) or {})
+            for key in ("file", "size", "sha256"):
+                entry.pop(key, None)
+            url = entry.pop("url", "")
+            status = entry.pop("status", 200)
+
+            self.store(filename, url, status, manifest.read(filename),
+                       **entry)
+        manifest.close()
+
+    def __contains__(self, filename):
+        return filename in self.__entries
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, filename):
+        """Retorna la entrada del archivo indicado (None si no existe)."""
+        return self.__entries.get(filename)
+
+    def matches(self, filename, content):
+        """Indica si el contenido es igual al registrado para el archivo."""
+        entry = self.__entries.get(filename)
+        return entry is not None and \
+            entry["sha256"] == Manifest.digest(content)
+
+    def files(self):
+        """Retorna los nombres de archivo registrados."""
+        return list(self.__entries.keys())
+
+    def signature(self, filename):
+        """Retorna la firma (derivada del hash y del tamaño del contenido) del
+        telegrama indicado (ver ParsedCache)."""
+        entry = self.__entries[filename]
+        return int(entry["sha256"][:15], 16), entry["size"]
+
+    def __map(self, number, end):
+        """Retorna el mmap del segmento indicado, que debe abarcar al menos
+        hasta el offset end (si el segmento creció, se vuelve a mapear)."""
+
+        segment = self.__maps.get(number)
+        if segment is None or len(segment) < end:
+            if segment is not None:
+                segment.close()
+
+            file = open(self.__segment_path(number), "rb")
+            segment = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            file.close()
+            self.__maps[number] = segment
+
+        return segment
+
+    def read(self, filename):
+        """Retorna el contenido (descomprimido) de la última versión del tele-
+        grama indicado (incluso si fue agregada por otro proceso, por ejemplo,
+        durante una descarga en curso).
+
+        Raises:
+            KeyError: si el telegrama no existe."""
+
+        self.__load()
+        entry = self.__entries[filename]
+
+        offset = entry["offset"]
+        end = offset + entry["length"]
+        segment = self.__map(entry["segment"], end)
+
+        return zlib.decompress(segment[offset:end])
+
+    def store(self, filename, url, status, content, **fields):
+        """Comprime y agrega el telegrama al segmento actual, y lo registra en
+        el índice.
+
+        Args:
+            filename (string): nombre del archivo (clave del telegrama).
+            url (string): url de descarga.
+            status (int): status de la respuesta.
+            content (bytes): contenido del archivo.
+            fields (dict): campos adicionales a registrar.
+
+        Returns:
+            entry (dict): entrada registrada."""
+
+        if self.__segment is None:
+            path = self.__segment_path(self.__segment_number)
+            if os.path.exists(path) and \
+               os.path.getsize(path) >= PackedStore.segment_size:
+                self.__segment_number += 1
+                path = self.__segment_path(self.__segment_number)
+            self.__segment = open(path, "ab")
+
+        data = zlib.compress(content, PackedStore.level)
+        offset = self.__segment.tell()
+        self.__segment.write(data)
+        self.__segment.flush()
+
+        entry = Manifest.entry(filename, url, status, content, **fields)
+        entry.update(segment=self.__segment_number, offset=offset,
+                     length=len(data))
+        self.__file.write(json.dumps(entry) + "\n")
+        self.__file.flush()
+        self.__entries[filename] = entry
+
+        # Inicio de un nuevo segmento en la siguiente escritura.
+        if offset + len(data) >= PackedStore.segment_size:
+            self.__segment.close()
+            self.__segment = None
+            self.__segment_number += 1
+
+        return entry
+
+    def close(self):
+        """Cierra el almacén."""
+        for segment in self.__maps.values():
+            segment.close()
+        self.__maps = {}
+
+        if self.__segment is not None:
+            self.__segment.close()
+            self.__segment = None
+        self.__file.close()
+        self.__index.close()
+
+
+class SynchronizedStore(object):
+    """Almacén compartido entre hilos (por ejemplo, el productor y el consumi-
+    dor de pipeline.py): cada operación del almacén indicado se realiza bajo un
+    lock, dado que tanto las escrituras como las lecturas (que cargan el índi-
+    ce o mapean segmentos a demanda) modifican su estado. Nota: los generado-
+    res retornados (files) se recorren fuera del lock."""
+
+    def __init__(self, store):
+        """Inicializa almacén.
+
+        Args:
+            store (Manifest o PackedStore): almacén a sincronizar."""
+        self.__store = store
+        self.__lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attribute = getattr(self.__store, name)
+        if not callable(attribute):
+            return attribute
+
+        def synchronized(*args, **kwargs):
+            with self.__lock:
+                return attribute(*args, **kwargs)
+        return synchronized
+
+    def __contains__(self, filename):
+        with self.__lock:
+            return filename in self.__store
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__store)
+
+
+def open_store(settings):
+    """Abre el almacén de telegramas de la caché web, según el layout de la
+    configuración (opción WebCacheLayout).
+
+    Returns:
+        store (Manifest o PackedStore): almacén de telegramas."""
+
+    if settings.webcache_layout == "packed":
+        return PackedStore(settings.webcache_dir)
+    return Manifest(settings.webcache_dir)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: synthetic.py
+- Descripción: generador de telegramas sintéticos, con el formato (de cuatro
+tablas) de los de resultados.gob.ar, para medir el rendimiento del analizador
+sin descargar datos reales:
+    - Anomaly (class), ver docstring.
+    - TelegramGenerator (class), ver docstring.
+    - telegram_html (function), ver docstring.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import html
+import random
+
+
+# Encabezado de las categorías (tablas 2 y 4), en el orden de VotingCatego-
+# ries.keys.
+CATEGORY_LABELS = ("Senadores Nacionales", "Diputados Nacionales",
+                   "Diputados Provinciales", "Concejales")
+
+# Filas de la tabla 2 (votos nulos, en blanco y recurridos).
+OTHER_VOTES = (("null", "Votos nulos"), ("blank", "Votos en blanco"),
+               ("appealed", "Votos recurridos"))
+
+# Estados de mesa.
+STATUS_OK = "Grabada"
+STATUS_PENDING = "Sin grabar"
+
+
+class Anomaly(object):
+    """Tipos de anomalía que el generador puede introducir en una mesa:
+    - status: mesa no grabada.
+    - impugned: votos impugnados por encima del máximo admitido.
+    - upper: votos a un partido (en una categoría) muy por encima de los del
+    resto del circuito.
+    - lower: votos a un partido (en una categoría) muy por debajo de los del
+    resto del circuito."""
+
+    status = "status"
+    impugned = "impugned"
+    upper = "upper"
+    lower = "lower"
+
+    kinds = (status, impugned, upper, lower)
+
+
+def _row(label, cells):
+    """Retorna una fila html (encabezado y celdas)."""
+    return "<tr><th>{0}</th>{1}</tr>".format(
+        html.escape(label),
+        "".join("<td>{0}</td>".format(cell) for cell in cells))
+
+
+def _counts(counts):
+    """Retorna las celdas de una fila de votos (vacías si el conteo es None).
+    """
+    return ["" if count is None else str(count) for count in counts]
+
+
+def telegram_html(province, section, circuit, station_number, status,
+                  impugned=None, votes=()):
+    """Retorna el html de un telegrama: información general (tabla 1), votos
+    nulos, en blanco y recurridos (tabla 2), votos impugnados (tabla 3) y
+    votos a partidos políticos (tabla 4).
+
+    Args:
+        province (string): nombre de la provincia.
+        section (string): sección.
+        circuit (string): circuito.
+        station_number (int): número de mesa.
+        status (string): estado de la mesa.
+        impugned (int): votos impugnados (sólo mesas grabadas).
+        votes (list): pares (nombre, conteos por categoría); primero los de
+        la tabla 2 (ver OTHER_VOTES) y luego los de los partidos.
+
+    Returns:
+        html (string): telegrama."""
+
+    header = "<tr><th></th>{0}</tr>".format(
+        "".join("<th>{0}</th>".format(label) for label in CATEGORY_LABELS))
+
+    information = "".join([
+        _row("Distrito", [html.escape(province)]),
+        _row("Sección", [html.escape(section)]),
+        _row("Circuito", [html.escape(circuit)]),
+        _row("Mesa", [station_number]),
+        _row("Estado", [status])])
+
+    other = [_row(name, _counts(counts))
+             for name, counts in votes[:len(OTHER_VOTES)]]
+    parties = [_row(name, _counts(counts))
+               for name, counts in votes[len(OTHER_VOTES):]]
+
+    tables = [information,
+              header + "".join(other),
+              _row("Votos impugnados", []) +
+              "<tr><td>{0}</td></tr>".format(
+                  "" if impugned is None else impugned),
+              header + "".join(parties)]
+
+    return ("<html><head><meta charset=\"utf-8\"><title>Telegrama</title>"
+            "</head><body>{0}</body></html>\n").format(
+                "".join("<table>{0}</table>".format(table)
+                        for table in tables))
+
+
+class TelegramGenerator(object):
+    """Generador (reproducible, según la semilla) de telegramas sintéticos.
+    Los votos de cada partido, tipo de voto y categoría siguen una distribu-
+    ción normal propia de cada circuito (con una leve variación entre catego-
+    rías), y una fracción de las mesas incluye una anomalía (ver Anomaly)."""
+
+    def __init__(self, circuits, stations, parties, anomalies=0.05,
+                 impugned_admitted=2, seed=0):
+        """Inicializa generador.
+
+        Args:
+            circuits (list): circuitos.
+            stations (int): mesas por circuito.
+            parties (list): nombres de los partidos políticos (en el orden de
+            la tabla 4).
+            anomalies (float): fracción de mesas con anomalía.
+            impugned_admitted (int): máximo admitido de votos impugnados (ver
+            opción ImpugnedVotesAdmitted).
+            seed (int): semilla del generador de números aleatorios."""
+
+        self.circuits = list(circuits)
+        self.stations = stations
+        self.parties = list(parties)
+        self.anomalies = anomalies
+        self.impugned_admitted = impugned_admitted
+        self.seed = seed
+
+        # Anomalías introducidas, como tuplas (circuito, mesa, tipo).
+        self.planted = []
+
+    def ranges(self):
+        """Retorna los rangos de mesas de cada circuito (numeración correla-
+        tiva, como en los distritos reales), como tuplas (circuito, inicio,
+        fin)."""
+        return [(circuit, i * self.stations + 1, (i + 1) * self.stations)
+                for i, circuit in enumerate(self.circuits)]
+
+    def telegrams(self):
+        """Genera los telegramas, en el orden de los circuitos y mesas.
+
+        Returns:
+            telegrams (generator): tuplas (circuito, número de mesa, html)."""
+
+        rnd = random.Random(self.seed)
+        self.planted = []
+
+        names = [name for vtype, name in OTHER_VOTES] + self.parties
+
+        for circuit, init, end in self.ranges():
+            section = "Sección {0}".format(rnd.randint(1, 8))
+
+            # Media de votos de cada tipo de voto en el circuito.
+            means = [rnd.uniform(5, 25) if i < len(OTHER_VOTES)
+                     else rnd.uniform(20, 120) for i in range(len(names))]
+
+            for number in range(init, end + 1):
+                anomaly = None
+                if rnd.random() < self.anomalies:
+                    anomaly = rnd.choice(Anomaly.kinds)
+                    self.planted.append((circuit, number, anomaly))
+
+                if anomaly == Anomaly.status:
+                    yield circuit, number, telegram_html(
+                        "Buenos Aires", section, circuit, number,
+                        STATUS_PENDING)
+                    continue
+
+                counts = [[max(0, int(rnd.gauss(mean, mean * 0.15) *
+                                      rnd.uniform(0.95, 1.05)))
+                           for _ in CATEGORY_LABELS] for mean in means]
+
+                impugned = rnd.randint(0, self.impugned_admitted)
+                if anomaly == Anomaly.impugned:
+                    impugned = self.impugned_admitted + rnd.randint(1, 10)
+                elif anomaly in (Anomaly.upper, Anomaly.lower):
+                    # Votos a un partido, en una categoría.
+                    party = rnd.randrange(len(OTHER_VOTES), len(names))
+                    category = rnd.randrange(len(CATEGORY_LABELS))
+                    if anomaly == Anomaly.upper:
+                        counts[party][category] = int(means[party] *
+                                                      rnd.uniform(3, 5))
+                    else:
+                        counts[party][category] = 0
+
+                yield circuit, number, telegram_html(
+                    "Buenos Aires", section, circuit, number, STATUS_OK,
+                    impugned, list(zip(names, counts)))
+
+    def write(self, store):
+        """Genera los telegramas y los almacena en la caché web (con los
+        mismos nombres de archivo que el requester).
+
+        Args:
+            store (Manifest o PackedStore): almacén de la caché web.
+
+        Returns:
+            count (int): cantidad de telegramas generados."""
+
+        count = 0
+        for circuit, number, content in self.telegrams():
+            filename = "{0}_{1}.htm".format(circuit, number)
+            store.store(filename, "", 200, content.encode("utf-8"))
+            count += 1
+        return count
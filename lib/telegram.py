@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: telegram.py
+- Descripción: parser rápido (lxml.etree) de telegramas con el formato de los
+de resultados.gob.ar, alternativo al de VotingStation (BeautifulSoup):
+    - TelegramFormatError (class), ver docstring.
+    - parse (function), ver docstring.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+from lxml import etree
+
+
+# String que indica estado de mesa 'grabada' en sistema.
+STATUS_OK = "grabada"
+
+# Filas (de la tabla 2) de votos nulos, en blanco y recurridos.
+OTHER_VOTES = (("null", 1), ("blank", 2), ("appealed", 3))
+
+
+class TelegramFormatError(ValueError):
+    """El html no respeta el formato (de cuatro tablas) del telegrama."""
+
+
+def _count(value):
+    """Convierte texto de celda a cantidad de votos (None si es vacía)."""
+    return int(value) if value != "" else None
+
+
+def _counts(table, row):
+    """Retorna los conteos (por categoría) de una fila de tabla parseada."""
+    cells = table[row]
+    return (_count(cells[0]), _count(cells[1]), _count(cells[2]),
+            _count(cells[3]))
+
+
+def parse(html, political_parties):
+    """Parsea un telegrama, recorriendo sus cuatro tablas una única vez.
+
+    Args:
+        html (string): página html de mesa de votación con el formato de las
+        de resultados.gob.ar.
+        political_parties (list): keys de partidos políticos, en el orden de
+        la tabla 4.
+
+    Returns:
+        record (tuple): registro de mesa de votación, con el mismo formato que
+        VotingStation.to_record.
+
+    Raises:
+        TelegramFormatError: si el html no respeta el formato esperado."""
+
+    try:
+        root = etree.HTML(html)
+    except (etree.LxmlError, ValueError) as e:
+        raise TelegramFormatError(str(e))
+
+    if root is None:
+        raise TelegramFormatError("Documento vacío.")
+
+    # Tablas como listas de filas de celdas (mismo criterio que el parseo de
+    # VotingStation: todas las celdas td de cada fila tr, sin espacios
+    # finales).
+    tables = [[["".join(td.itertext()).rstrip() for td in tr.iter("td")]
+               for tr in table.iter("tr")]
+              for table in root.iter("table")]
+
+    try:
+        # Información general (tabla 1).
+        information = tables[0]
+        section = information[1][0].strip()
+        circuit = information[2][0].strip()
+        station_number = information[3][0].strip()
+        status = information[4][0].strip().lower()
+
+        if status != STATUS_OK:
+            return (section, circuit, station_number, status, None, ())
+
+        # Votos nulos, en blanco y recurridos (tabla 2).
+        votes = [(vtype, _counts(tables[1], row))
+                 for vtype, row in OTHER_VOTES]
+
+        # Votos impugnados (primera celda de la tabla 3).
+        impugned = int([cell for row in tables[2] for cell in row][0])
+
+        # Votos a partidos políticos (tabla 4).
+        for row, pp in enumerate(political_parties, 1):
+            votes.append((pp, _counts(tables[3], row)))
+    except (IndexError, ValueError) as e:
+        raise TelegramFormatError(str(e))
+
+    return (section, circuit, station_number, status, impugned, tuple(votes))
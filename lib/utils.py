@@ -4,23 +4,369 @@
 - Nombre: utils.py
 - Descripción: Contiene funciones de utilidad:
     - cfg (function), ver docstring.
+    - Settings (class), ver docstring.
+    - load_settings (function), ver docstring.
+    - settings (function), ver docstring.
+    - parse_ranges (function), ver docstring.
+    - district_settings (function), ver docstring.
+    - Report (class), ver docstring.
     - clearscreen (function), ver docstring.
     - makedirs (function), ver docstring.
 - Autor: Agustín González.
 - Modificado: 05/11/17.
 """
 
+import json
 import os
+import time
+from collections import namedtuple
 from configparser import ConfigParser
 
 
+# Archivo de configuración.
+SETTINGS_FILE = "settings.ini"
+
+# Categorías de votación (ver analyzer.VotingCategories).
+CATEGORIES = ("national_senator", "national_deputy", "provintial_deputy",
+              "councilor")
+
+# Tipos de voto distintos de partidos políticos.
+OTHER_VOTE_TYPES = ("blank", "null")
+
+# Niveles de línea de base (muestras sobre las que se calculan los límites).
+BASELINES = ("circuit", "section", "district")
+
+# Configuración cargada (ver settings).
+_settings = {}
+
+
 def cfg():
     """Retorna configparser del script."""
     cparser = ConfigParser()
-    cparser.read("settings.ini")
+    cparser.read(SETTINGS_FILE)
     return cparser
 
 
+class Settings(namedtuple("Settings", [
+        # Sección Connection.
+        "host", "url_path_format", "province", "district", "circuits",
+        "ranges", "concurrency", "requests_per_second", "retries",
+        "backoff_base", "backoff_max", "timeout", "districts",
+        # Sección Dirs.
+        "webcache_dir", "webcache_layout", "statistics_dir", "parsed_cache",
+        "reports_dir",
+        # Sección Parser.
+        "parser_backend", "max_failure_rate",
+        # Sección PoliticalParties.
+        "party_keys", "party_values",
+        # Sección Statistics.
+        "iqr_ponderation", "impugned_votes_admitted", "upper_check",
+        "lower_check", "avoided_categories", "avoided_ranges", "engine",
+        "estimator", "compression", "baselines"])):
+    """Configuración (inmutable) del aplicativo, ya validada y convertida a
+    los tipos adecuados:
+    - circuits (tuple): circuitos a analizar.
+    - ranges (tuple): rangos de mesas, como tuplas (circuito, inicio, fin).
+    - concurrency (int): cantidad de descargas simultáneas.
+    - requests_per_second (float): tasa máxima de descarga (0, sin límite).
+    - retries (int), backoff_base, backoff_max, timeout (float): reintentos de
+    descargas fallidas, espera base y máxima entre reintentos, y timeout de
+    cada request (en segundos).
+    - districts (tuple): distritos a procesar (ver province.py), como tuplas
+    (distrito, circuitos, rangos).
+    - party_keys, party_values (tuple): keys y nombres de partidos políticos.
+    - iqr_ponderation (float), impugned_votes_admitted (int).
+    - upper_check, lower_check, avoided_categories (frozenset): tipos de voto
+    a chequear (límite superior e inferior) y categorías excluidas.
+    - avoided_ranges (tuple): rangos (range) de mesas excluidas.
+    - compression (float): compresión del estimador aproximado de cuartiles.
+    - baselines (tuple): niveles de línea de base (ver BASELINES).
+    - max_failure_rate (float): fracción máxima de telegramas con error de
+    parseo (ver lib/quarantine.py).
+    El resto de las opciones son strings."""
+
+    __slots__ = ()
+
+
+def _split(value, separator=","):
+    """Retorna tupla de items (sin espacios y no vacíos) de opción de lista."""
+    return tuple(x.strip() for x in value.split(separator) if x.strip())
+
+
+def parse_ranges(scircuits, sranges):
+    """Realiza parseo de str de config de rangos a lista.
+
+    Args:
+        scircuits (string): circuitos, separados por coma.
+        sranges (string): rangos de cada circuito, separados por coma (los
+        subrangos de un mismo circuito se separan por espacio).
+
+    Returns:
+        ranges (tuple): tuplas (circuito, inicio, fin)."""
+
+    lcircuits = _split(scircuits)
+    lranges = _split(sranges)
+
+    if(len(lcircuits) != len(lranges)):
+        exit("La cantidad de circuitos y de rangos no coincide.")
+
+    ranges = []
+    for circuit, subranges in zip(lcircuits, lranges):
+        for subrange in _split(subranges, " "):
+            splitted = subrange.split("-")
+            ranges.append((circuit, int(splitted[0]), int(splitted[1])))
+
+    return tuple(ranges)
+
+
+def load_settings(cparser):
+    """Valida y convierte la configuración leída mediante configparser.
+
+    Args:
+        cparser (ConfigParser): configuración.
+
+    Returns:
+        settings (Settings): configuración validada."""
+
+    try:
+        connection = cparser["Connection"]
+        dirs = cparser["Dirs"]
+        parties = cparser["PoliticalParties"]
+        statistics = cparser["Statistics"]
+
+        party_keys = _split(parties["Keys"])
+        party_values = _split(parties["Values"])
+
+        if len(party_keys) != len(party_values):
+            exit("La cantidad de keys y values de los partidos políticos "
+                 "especificados en el archivo de configuración no es la "
+                 "misma.")
+
+        # Tipos de voto a chequear.
+        vote_types = OTHER_VOTE_TYPES + party_keys
+        upper_check = frozenset(_split(statistics["VoteTypesUpperCheck"]))
+        lower_check = frozenset(_split(statistics["VoteTypesLowerCheck"]))
+        for vtype in upper_check | lower_check:
+            if vtype not in vote_types:
+                exit("Tipo de voto desconocido: {0}.".format(vtype))
+
+        # Categorías excluidas.
+        avoided = frozenset(_split(statistics["AvoidedCategories"]))
+        for category in avoided:
+            if category not in CATEGORIES:
+                exit("Categoría desconocida: {0}.".format(category))
+
+        # Rangos excluidos.
+        avoided_ranges = []
+        for srange in _split(statistics["AvoidedRanges"]):
+            splitted = srange.split("-")
+            avoided_ranges.append(range(int(splitted[0]), int(splitted[1])))
+
+        # Distritos: los indicados en la opción Districts (o todos los confi-
+        # gurados, si es "all"), cada uno con la sección "District NNN" con
+        # sus circuitos y rangos. Por omisión, el de la opción District.
+        district = connection["District"].strip()
+        sections = {}
+        for name in cparser.sections():
+            if name.startswith("District "):
+                sections[name.split(None, 1)[1].strip()] = cparser[name]
+
+        sdistricts = connection.get("Districts", "").strip()
+        if sdistricts.lower() == "all":
+            names = sorted(sections)
+        else:
+            names = _split(sdistricts) or (district,)
+
+        districts = []
+        for name in names:
+            if name in sections:
+                section = sections[name]
+                districts.append((name, _split(section["Circuits"]),
+                                  parse_ranges(section["Circuits"],
+                                               section["Ranges"])))
+            elif name == district:
+                districts.append((name, _split(connection["Circuits"]),
+                                  parse_ranges(connection["Circuits"],
+                                               connection["Ranges"])))
+            else:
+                exit("Falta la sección [District {0}] en el archivo de "
+                     "configuración.".format(name))
+
+        if not districts:
+            exit("No se ha configurado ningún distrito.")
+
+        # Concurrencia y tasa de descarga.
+        concurrency = int(connection.get("Concurrency", "1"))
+        requests_per_second = float(connection.get("RequestsPerSecond", "10"))
+        if concurrency < 1 or requests_per_second < 0:
+            exit("Las opciones Concurrency y RequestsPerSecond deben ser "
+                 "mayores a 0.")
+
+        # Reintentos de descarga.
+        retries = int(connection.get("Retries", "5"))
+        backoff_base = float(connection.get("BackoffBase", "0.5"))
+        backoff_max = float(connection.get("BackoffMax", "30"))
+        timeout = float(connection.get("Timeout", "30"))
+        if min(retries, backoff_base, backoff_max) < 0 or timeout <= 0:
+            exit("Las opciones Retries, BackoffBase, BackoffMax y Timeout no "
+                 "pueden ser negativas.")
+
+        # Motor de estadísticas y parser.
+        engine = statistics.get("Engine", "python").strip().lower()
+        if engine not in ("python", "numpy"):
+            exit("Motor de estadísticas desconocido: {0}.".format(engine))
+
+        # Layout de la caché web.
+        layout = dirs.get("WebCacheLayout", "directory").strip().lower()
+        if layout not in ("directory", "packed"):
+            exit("Layout de caché web desconocido: {0}.".format(layout))
+
+        # Estimador de cuartiles ("exact" o "tdigest", ver lib/sketch.py).
+        estimator = statistics.get("Estimator", "exact").strip().lower()
+        if estimator not in ("exact", "tdigest"):
+            exit("Estimador de cuartiles desconocido: {0}.".format(estimator))
+
+        compression = float(statistics.get("Compression", "100"))
+        if compression <= 0:
+            exit("La opción Compression debe ser mayor a 0.")
+
+        # Niveles de línea de base (sin repetidos, en el orden indicado).
+        baselines = tuple(dict.fromkeys(
+            level.lower() for level in _split(statistics.get("Baselines",
+                                                             "circuit"))))
+        for level in baselines:
+            if level not in BASELINES:
+                exit("Nivel de línea de base desconocido: {0}.".format(level))
+        if not baselines:
+            exit("La opción Baselines no puede estar vacía.")
+
+        backend = cparser.get("Parser", "Backend", fallback="lxml")
+        backend = backend.strip().lower()
+        if backend not in ("lxml", "bs4"):
+            exit("Parser desconocido: {0}.".format(backend))
+
+        max_failure_rate = cparser.getfloat("Parser", "MaxFailureRate",
+                                            fallback=0.05)
+        if not 0 <= max_failure_rate <= 1:
+            exit("La opción MaxFailureRate debe estar entre 0 y 1.")
+
+        return Settings(
+            host=connection["Host"].strip(),
+            url_path_format=connection["URLPathFormat"].strip(),
+            province=connection["Province"].strip(),
+            district=district,
+            circuits=_split(connection["Circuits"]),
+            ranges=parse_ranges(connection["Circuits"], connection["Ranges"]),
+            concurrency=concurrency,
+            requests_per_second=requests_per_second,
+            retries=retries,
+            backoff_base=backoff_base,
+            backoff_max=backoff_max,
+            timeout=timeout,
+            districts=tuple(districts),
+            webcache_dir=dirs["WebCache"].strip(),
+            webcache_layout=layout,
+            statistics_dir=dirs["Statistics"].strip(),
+            parsed_cache=dirs.get("ParsedCache", "").strip(),
+            reports_dir=dirs.get("Reports", "output/reports").strip(),
+            parser_backend=backend,
+            max_failure_rate=max_failure_rate,
+            party_keys=party_keys,
+            party_values=party_values,
+            iqr_ponderation=float(statistics["IqrPonderation"]),
+            impugned_votes_admitted=int(statistics["ImpugnedVotesAdmitted"]),
+            upper_check=upper_check,
+            lower_check=lower_check,
+            avoided_categories=avoided,
+            avoided_ranges=tuple(avoided_ranges),
+            engine=engine,
+            estimator=estimator,
+            compression=compression,
+            baselines=baselines)
+    except KeyError as e:
+        exit("Falta la opción {0} en el archivo de configuración.".format(e))
+    except ValueError as e:
+        exit("Valor inválido en el archivo de configuración: {0}".format(e))
+
+
+def district_settings(settings, district):
+    """Retorna la configuración de un único distrito (shard), con directorios
+    de salida propios: un subdirectorio (con el nombre del distrito) de los
+    directorios de caché web, de análisis y de reportes, y una caché de tele-
+    gramas parseados por distrito.
+
+    Args:
+        settings (Settings): configuración (ver opción Districts).
+        district (string): distrito.
+
+    Returns:
+        settings (Settings): configuración del distrito."""
+
+    for name, circuits, ranges in settings.districts:
+        if name == district:
+            break
+    else:
+        exit("Distrito no configurado: {0}.".format(district))
+
+    parsed_cache = settings.parsed_cache
+    if parsed_cache:
+        base, extension = os.path.splitext(parsed_cache)
+        parsed_cache = base + "-" + district + extension
+
+    return settings._replace(
+        district=district,
+        circuits=circuits,
+        ranges=ranges,
+        districts=((district, circuits, ranges),),
+        webcache_dir=os.path.join(settings.webcache_dir, district),
+        statistics_dir=os.path.join(settings.statistics_dir, district),
+        reports_dir=os.path.join(settings.reports_dir, district),
+        parsed_cache=parsed_cache)
+
+
+def settings(path=SETTINGS_FILE):
+    """Retorna la configuración del aplicativo (ver Settings). El archivo se
+    lee y valida una única vez por proceso."""
+    if path not in _settings:
+        cparser = ConfigParser()
+        cparser.read(path)
+        _settings[path] = load_settings(cparser)
+    return _settings[path]
+
+
+class Report(object):
+    """Reporte (JSON lines) que se escribe a medida que se agregan registros,
+    de modo que su contenido no se pierde si la ejecución se interrumpe. El
+    archivo sólo se crea al agregar el primer registro."""
+
+    def __init__(self, path):
+        """Inicializa reporte.
+
+        Args:
+            path (string): path del archivo de reporte."""
+        self.path = path
+        self.count = 0
+        self.__file = None
+
+    def add(self, **fields):
+        """Agrega un registro (con la fecha y hora actual) al reporte."""
+        if self.__file is None:
+            makedirs(os.path.dirname(self.path) or ".")
+            self.__file = open(self.path, "a")
+
+        record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        record.update(fields)
+        self.__file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.__file.flush()
+        self.count += 1
+
+    def close(self):
+        """Cierra el reporte."""
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
 def clearscreen():
     """Limpia pantalla de forma estándar."""
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: vectorized.py
+- Descripción: motor alternativo (vectorizado con NumPy) para el análisis de
+cuartiles de las mesas de votación:
+    - QuartileSummary (class), ver docstring.
+    - VectorizedStatistics (class), ver docstring.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import numpy as np
+
+
+# Valor utilizado, en el arreglo de conteos, para indicar votos no cargados.
+MISSING = -1
+
+
+class QuartileSummary(object):
+    """Resumen de estadísticas de una muestra, con la misma interfaz (average,
+    median, lower_limit y upper_limit) que StatisticsAnalyzer."""
+
+    __slots__ = ("__average", "__q1", "__q2", "__q3", "__lower", "__upper")
+
+    def __init__(self, average, q1, q2, q3, lower, upper):
+        self.__average = average
+        self.__q1 = q1
+        self.__q2 = q2
+        self.__q3 = q3
+        self.__lower = lower
+        self.__upper = upper
+
+    def average(self):
+        """Retorna la media de la muestra."""
+        return self.__average
+
+    def median(self):
+        """Retorna la mediana (q2) de la muestra."""
+        return self.__q2
+
+    def quartiles(self):
+        """Retorna los cuartiles q1, q2 y q3 de la muestra."""
+        return self.__q1, self.__q2, self.__q3
+
+    def lower_limit(self):
+        """Retorna límite inferior."""
+        return self.__lower
+
+    def upper_limit(self):
+        """Retorna límite superior."""
+        return self.__upper
+
+
+class VectorizedStatistics(object):
+    """Calcula, para todos los grupos (circuitos) a la vez, los cuartiles y los
+    límites inferior y superior de cada tipo de voto y categoría.
+
+    Los conteos se reciben en un único arreglo de enteros de forma (mesas x
+    tipos de voto x categorías), junto con una columna de etiquetas que indica
+    el grupo de cada mesa. Los votos no cargados se indican con MISSING.
+
+    Los cuartiles se calculan con el mismo método que StatisticsAnalyzer (se
+    divide la muestra según la mediana, excluyendo los valores iguales a esta),
+    incluyendo sus particularidades: la "mediana" de una lista de dos elementos
+    es el cociente entre ambos, el índice central de listas impares se calcula
+    con redondeo bancario y, si una sublista resulta vacía, su mediana es la de
+    la muestra completa. De este modo, los límites obtenidos son idénticos."""
+
+    def __init__(self, counts, labels, iqr_ponderation=1.00):
+        """Inicializa y realiza el cálculo.
+
+        Args:
+            counts (numpy.ndarray): conteos, de forma (mesas x tipos de voto x
+            categorías).
+            labels (numpy.ndarray): grupo (entero de 0 a G-1) de cada mesa.
+            iqr_ponderation (float): suavizador de IQR (rango intercuartilíco).
+            Establecido, por omisión, en 1.0."""
+
+        self.__counts = np.asarray(counts)
+        self.__labels = np.asarray(labels, dtype=np.int64)
+        self.__iqr_ponderation = iqr_ponderation
+
+        nstations, nvtypes, ncategories = self.__counts.shape
+        ngroups = int(self.__labels.max()) + 1 if nstations else 0
+        self.__shape = (ngroups, nvtypes, ncategories)
+
+        self.__calculate()
+
+    def __median(self, values, starts, sizes, fallback):
+        """Calcula, para cada segmento de values (ordenado), la mediana según
+        el método de StatisticsAnalyzer.median.
+
+        Args:
+            values (numpy.ndarray): valores ordenados por segmento (con relleno
+            de dos posiciones al final, para indexar sin desbordes).
+            starts (numpy.ndarray): inicio de cada segmento.
+            sizes (numpy.ndarray): tamaño de cada segmento.
+            fallback (numpy.ndarray): mediana a usar en segmentos vacíos.
+
+        Returns:
+            medians (numpy.ndarray): mediana de cada segmento."""
+
+        # Índice central (round de NumPy, como el de Python, es bancario).
+        middle = np.maximum(np.round(sizes / 2).astype(np.int64) - 1, 0)
+
+        first = values[starts]
+        second = values[starts + 1]
+        center = values[starts + middle]
+        after = values[starts + middle + 1]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pair = first / second
+
+        medians = np.where(sizes % 2 == 0, (center + after) / 2, center)
+        medians = np.where(sizes == 2, pair, medians)
+        medians = np.where(sizes == 1, first, medians)
+        medians = np.where(sizes == 0, fallback, medians)
+
+        return medians
+
+    def __calculate(self):
+        """Realiza el cálculo de cuartiles, límites y medias de cada grupo."""
+
+        nstations, nvtypes, ncategories = self.__counts.shape
+        ncells = nvtypes * ncategories
+        nsegments = self.__shape[0] * ncells
+
+        # Segmento (grupo, tipo de voto, categoría) de cada conteo.
+        counts = self.__counts.reshape(nstations, ncells)
+        segments = self.__labels[:, None] * ncells + np.arange(ncells)
+
+        valid = counts != MISSING
+        values = counts[valid].astype(np.int64)
+        segments = segments[valid]
+
+        # Orden por segmento y, dentro de cada uno, por valor. Dado que los
+        # conteos son enteros no negativos, ambos se combinan en una única
+        # clave entera (segmento * base + valor), lo que permite un solo sort.
+        base = int(values.max()) + 2 if values.size else 2
+        keys = np.sort(segments * base + values)
+        segments = keys // base
+        values = (keys - segments * base).astype(np.float64)
+
+        sizes = np.bincount(segments, minlength=nsegments)
+        starts = np.cumsum(sizes) - sizes
+        sums = np.bincount(segments, weights=values, minlength=nsegments)
+
+        padded = np.concatenate((values, np.zeros(2)))
+
+        # Segundo cuartil (mediana de la muestra completa, 0 si es vacía).
+        q2 = self.__median(padded, starts, sizes, np.zeros(nsegments))
+
+        # Búsqueda binaria, sobre las claves ordenadas, de los valores menores
+        # y mayores a q2 de cada segmento.
+        pivots = np.arange(nsegments) * base + q2
+
+        with np.errstate(invalid="ignore"):
+            left = np.searchsorted(keys, pivots, side="left")
+            right = np.searchsorted(keys, pivots, side="right")
+
+        # Primer y tercer cuartil (medianas de las sublistas).
+        q1 = self.__median(padded, starts, left - starts, q2)
+        q3 = self.__median(padded, right, starts + sizes - right, q2)
+
+        qrange = q3 - q1
+
+        shape = self.__shape
+        self.sizes = sizes.reshape(shape)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.average = (sums / sizes).reshape(shape)
+        self.q1 = q1.reshape(shape)
+        self.q2 = q2.reshape(shape)
+        self.q3 = q3.reshape(shape)
+        self.lower = (q1 - self.__iqr_ponderation * qrange).reshape(shape)
+        self.upper = (q3 + self.__iqr_ponderation * qrange).reshape(shape)
+
+    def lower_mask(self):
+        """Retorna máscara (mesas x tipos de voto x categorías) de los conteos
+        por debajo del límite inferior de su grupo."""
+        valid = self.__counts != MISSING
+        return valid & (self.__counts < self.lower[self.__labels])
+
+    def upper_mask(self):
+        """Retorna máscara (mesas x tipos de voto x categorías) de los conteos
+        por encima del límite superior de su grupo."""
+        valid = self.__counts != MISSING
+        return valid & (self.__counts > self.upper[self.__labels])
+
+    def summary(self, group, vtype_index, category_index):
+        """Retorna las estadísticas de un grupo, tipo de voto y categoría.
+
+        Args:
+            group (int): índice de grupo.
+            vtype_index (int): índice de tipo de voto.
+            category_index (int): índice de categoría.
+
+        Returns:
+            summary (QuartileSummary): estadísticas del grupo."""
+
+        index = (group, vtype_index, category_index)
+        return QuartileSummary(float(self.average[index]),
+                               float(self.q1[index]), float(self.q2[index]),
+                               float(self.q3[index]),
+                               float(self.lower[index]),
+                               float(self.upper[index]))
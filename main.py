@@ -1,93 +1,458 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""
-- Nombre: main.py
-- Descripción: ejecuta el analizador de mesas de votación. Nota: es requisito
-previo que exista la caché de response (WebCache). Para ello, antes de ejecutar
-este archivo, se necesita haber ejecutado el script "requester.py".
-- Autor: Agustín González.
-- Modificado: 26/10/17
-"""
-
-import os
-import sys
-import traceback
-
-from lib import utils
-from lib.analyzer import VotingStation, VotingStationCollection
-
-
-def main(args):
-    """Punto de entrada."""
-
-    utils.clearscreen()
-
-    # Lectura de configuración
-    cfg = utils.cfg()
-    webcachedir = cfg["Dirs"]["WebCache"]
-
-    # Rangos excluidos.
-    cavoided_ranges = cfg["Statistics"]["AvoidedRanges"].split(",")
-    avoided_ranges = []
-    for srange in cavoided_ranges:
-        splitted = srange.split("-")
-        avoided_range = range(int(splitted[0]), int(splitted[1]))
-        avoided_ranges.append(avoided_range)
-
-    # Filenames.
-    filenames = next(os.walk(webcachedir))[2]
-
-    # Mesas de votación.
-    voting_tables = []
-
-    print("Analizando archivos...\n")
-
-    # Si no existe directorio...
-    if not os.path.exists(webcachedir):
-        msg = "No se ha encontrado el directorio caché, por favor ejecute el "
-        msg += "script 'request.py'."
-        print(msg)
-        exit(1)
-
-    # Examinación de archivos.
-    for filename in filenames:
-        try:
-            # Número de mesa de votación.
-            vtnumber = int(filename.split("_")[1].replace(".htm", ""))
-
-            # Análisis de exclusión de análisis.
-            avoid = False
-            for avoided_range in avoided_ranges:
-                if vtnumber in avoided_range:
-                    # Se continúa examinando el siguiente elemento.
-                    continue
-
-            # Si la mesa se debe excluir del análisis.
-            if avoid:
-                continue
-
-            # Apertura de archivo.
-            path = webcachedir + "/" + filename
-            file = open(path)
-            html = file.read()
-            file.close()
-
-            # Parsing y append.
-            vtable = VotingStation(html)
-            voting_tables.append(vtable)
-        except:
-            traceback.print_exc()
-
-            msg = "Error al analiar el archivo {0}. Verifíquelo manualmente."
-            print(msg.format(filename))
-            input()
-
-    # Analizador de mesas de votación.
-    collection = VotingStationCollection(voting_tables)
-    collection.print_analysis()
-    collection.save_analysis()
-
-
-# Entrada de aplicación.
-if __name__ == "__main__":
-    sys.exit(main(sys.argv))
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: main.py
+- Descripción: ejecuta el analizador de mesas de votación. Nota: es requisito
+previo que exista la caché de response (WebCache). Para ello, antes de ejecutar
+este archivo, se necesita haber ejecutado el script "requester.py".
+Uso:
+    python3 main.py [--jobs N] [--no-cache] [--batch] [--profile]
+        [--cprofile archivo]
+Con --jobs, el parseo de los telegramas se distribuye entre N procesos. Los
+telegramas parseados se almacenan en la caché indicada en la opción ParsedCache
+(sección Dirs), por lo que sólo se parsean los archivos nuevos o modificados
+(salvo que se indique --no-cache). Los telegramas se leen del almacén de la
+caché web (en directorio o empaquetado, ver opción WebCacheLayout). Con
+--profile, se registran métricas por etapa (ver lib/metrics.py) en el archivo
+metrics_main.json (directorio Reports); con --cprofile, además, se vuelca el
+perfil (cProfile) del parseo, el análisis y la escritura del análisis.
+Los telegramas se procesan como flujo (ver ingest): cada telegrama se lee, se
+parsea y se descarta (junto con su árbol html) antes de procesar el siguiente,
+y a la colección sólo llegan los conteos extraídos, por lo que la memoria no
+crece con el tamaño de la caché web.
+Los telegramas con error de parseo se registran en la cuarentena (ver lib/qua-
+rantine.py) y se omiten del análisis; por omisión, se espera la confirmación
+del usuario luego de cada error, salvo con --batch (ejecución desatendida). El
+código de salida es 1 si algún telegrama tuvo error, y 2 si la ejecución se
+abortó por superar la tasa máxima de errores (opción MaxFailureRate).
+- Autor: Agustín González.
+- Modificado: 26/10/17
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import traceback
+from collections import deque
+from functools import partial
+
+from lib import utils
+from lib.analyzer import VotingStation, VotingStationCollection
+from lib.cache import ParsedCache
+from lib.metrics import Metrics
+from lib.quarantine import Quarantine
+from lib.store import open_store
+
+
+# Cantidad de lotes (chunks) por proceso en el que se divide el parseo, y ta-
+# maño máximo de cada lote (telegramas).
+CHUNKS_PER_JOB = 4
+MAX_CHUNK = 256
+
+# Lotes en curso (enviados y no consumidos) por proceso de parseo.
+INFLIGHT_PER_JOB = 2
+
+# Cantidad de registros parseados por escritura en la caché de parseo.
+CACHE_BATCH = 500
+
+# Almacén de la caché web de cada proceso de parseo (ver init_worker).
+_store = None
+
+
+def parse_args(args):
+    """Parsea argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Analizador de mesas de "
+                                     "votación.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="cantidad de procesos de parseo (por omisión, 1)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="no utiliza la caché de telegramas parseados")
+    parser.add_argument("--batch", action="store_true",
+                        help="no espera confirmación ante errores de parseo")
+    parser.add_argument("--profile", action="store_true",
+                        help="registra métricas por etapa (JSON)")
+    parser.add_argument("--cprofile", default="",
+                        help="archivo de volcado de cProfile (implica "
+                        "--profile)")
+    return parser.parse_args(args[1:])
+
+
+def open_cache(settings):
+    """Abre la caché de telegramas parseados de la configuración. Los regis-
+    tros dependen de las keys de partidos políticos y, las firmas, del layout
+    de la caché web."""
+    fingerprint = ",".join(settings.party_keys) + ":" + \
+        settings.webcache_layout
+    return ParsedCache(settings.parsed_cache, fingerprint)
+
+
+def init_worker(settings):
+    """Inicializa un proceso de parseo (abre el almacén de la caché web)."""
+    global _store
+    _store = open_store(settings)
+
+
+def parse_file(filename, settings, store=None, timings=None):
+    """Parsea el telegrama indicado.
+
+    Args:
+        filename (string): nombre del telegrama en la caché web.
+        settings (Settings): configuración.
+        store (Manifest o PackedStore): almacén de la caché web. Por omisión,
+        el del proceso de parseo (ver init_worker).
+        timings (list): si se indica, se le agregan los bytes leídos y los
+        segundos de lectura y de parseo (ver profile_file).
+
+    Returns:
+        result (tuple): (registro de mesa de votación, error). Si el parseo
+        falla, el registro es None y el error contiene el traceback."""
+
+    start = time.perf_counter()
+    content = b""
+    read = None
+    try:
+        content = (_store if store is None else store).read(filename)
+        read = time.perf_counter()
+
+        # Decodificación equivalente a la lectura del archivo en modo texto.
+        html = io.TextIOWrapper(io.BytesIO(content)).read()
+
+        result = VotingStation.parse_record(html, settings), None
+    except Exception:
+        result = None, traceback.format_exc()
+
+    if timings is not None:
+        end = time.perf_counter()
+        read = end if read is None else read
+        timings.extend((len(content), read - start, end - read))
+
+    return result
+
+
+def profile_file(filename, settings, store=None):
+    """Parsea el telegrama indicado (ver parse_file), midiendo la lectura y el
+    parseo (ver opción --profile).
+
+    Returns:
+        result (tuple): (registro de mesa de votación, error, (bytes leídos,
+        segundos de lectura, segundos de parseo))."""
+
+    timings = []
+    record, error = parse_file(filename, settings, store, timings)
+    return record, error, tuple(timings)
+
+
+def parse_chunk(filenames, settings, function=parse_file):
+    """Parsea un lote de telegramas en un proceso de parseo (ver parse_files).
+    """
+    return [function(filename, settings) for filename in filenames]
+
+
+def parse_files(filenames, jobs, settings, store, function=parse_file):
+    """Parsea los telegramas indicados, en el proceso actual o distribuyendo
+    el trabajo (en lotes) entre varios procesos.
+
+    Args:
+        filenames (list): nombres de los telegramas en la caché web.
+        jobs (int): cantidad de procesos.
+        settings (Settings): configuración (se transfiere a los procesos ya
+        validada, por lo que estos no leen el archivo de configuración).
+        store (Manifest o PackedStore): almacén de la caché web (cada proceso
+        abre el suyo).
+        function (function): función de parseo (parse_file o profile_file).
+
+    Returns:
+        results (generator): resultados de function, en el orden de filena-
+        mes. Los resultados se generan a medida que se completan; con varios
+        procesos, sólo se envían unos pocos lotes por proceso a la vez, por
+        lo que los resultados pendientes de consumir no se acumulan."""
+
+    if jobs <= 1:
+        yield from map(partial(function, settings=settings, store=store),
+                       filenames)
+        return
+
+    # Importación diferida (sólo con varios procesos).
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, min(len(filenames) // (jobs * CHUNKS_PER_JOB),
+                           MAX_CHUNK))
+    pending = deque()
+    with ProcessPoolExecutor(jobs, initializer=init_worker,
+                             initargs=(settings,)) as executor:
+        for i in range(0, len(filenames), chunksize):
+            pending.append(executor.submit(parse_chunk,
+                                           filenames[i:i + chunksize],
+                                           settings, function))
+            if len(pending) >= jobs * INFLIGHT_PER_JOB:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+
+
+def ingest(filenames, toparse, jobs, settings, store, cache=None,
+           signatures=None, metrics=None, quarantine=None):
+    """Genera (como flujo) los registros de los telegramas indicados: los de
+    los telegramas a parsear se parsean (ver parse_files) y, el resto, se leen
+    de la caché de parseo. Cada telegrama (y su árbol html) se descarta luego
+    de extraer su registro, y los registros parseados se almacenan en la caché
+    por lotes, por lo que la memoria utilizada no depende de la cantidad de
+    telegramas.
+
+    Args:
+        filenames (list): nombres de los telegramas a analizar.
+        toparse (list): telegramas a parsear (en el orden de filenames; el
+        resto se lee de la caché).
+        jobs (int): cantidad de procesos de parseo.
+        settings (Settings): configuración.
+        store (Manifest o PackedStore): almacén de la caché web.
+        cache (ParsedCache): caché de telegramas parseados (None si no se uti-
+        liza).
+        signatures (dict): firmas de los telegramas a parsear (para la caché).
+        metrics (Metrics): métricas de ejecución.
+        quarantine (Quarantine): cuarentena de telegramas con error.
+
+    Returns:
+        records (generator): tuplas (filename, registro). Los telegramas con
+        error de parseo se informan (en la cuarentena) y se omiten."""
+
+    metrics = metrics or Metrics()
+    quarantine = quarantine or Quarantine(settings.reports_dir,
+                                          settings.max_failure_rate)
+
+    # Con --profile, se mide la lectura y el parseo de cada telegrama.
+    function = profile_file if metrics.enabled else parse_file
+    results = parse_files(toparse, jobs, settings, store, function)
+
+    toparse = set(toparse)
+    parsed = []
+
+    for filename in filenames:
+        # Si el telegrama no cambió, se reutiliza el registro cacheado.
+        if filename not in toparse:
+            quarantine.processed()
+            yield filename, cache.get(filename)
+            continue
+
+        result = next(results)
+        record, error = result[:2]
+
+        if metrics.enabled:
+            size, read, parse = result[2]
+            metrics.count("files_read")
+            metrics.count("bytes_read", size)
+            metrics.count("read_seconds", read)
+            metrics.observe("parse_seconds", parse)
+
+        if error:
+            metrics.count("parse_errors")
+            print(error, end="", file=sys.stderr)
+            quarantine.add(filename, error)
+            continue
+
+        quarantine.processed()
+
+        if cache:
+            parsed.append((filename, signatures[filename], record))
+            if len(parsed) >= CACHE_BATCH:
+                with metrics.stage("cache_store"):
+                    cache.store(parsed)
+                parsed = []
+
+        yield filename, record
+
+    if cache and parsed:
+        with metrics.stage("cache_store"):
+            cache.store(parsed)
+
+
+def read_records(settings, jobs=1, use_cache=True, metrics=None,
+                 quarantine=None):
+    """Genera (como flujo, ver ingest) los registros de los telegramas de la
+    caché web a analizar, parseando (según corresponda) los nuevos o modifi-
+    cados, y actualiza la caché de telegramas parseados.
+
+    Args:
+        settings (Settings): configuración.
+        jobs (int): cantidad de procesos de parseo.
+        use_cache (bool): indica si se utiliza la caché de telegramas parsea-
+        dos.
+        metrics (Metrics): métricas de ejecución (por omisión, deshabilita-
+        das).
+        quarantine (Quarantine): cuarentena de telegramas con error (por omi-
+        sión, no interactiva).
+
+    Returns:
+        records (generator): registros de mesas de votación, en el orden de
+        los telegramas."""
+
+    metrics = metrics or Metrics()
+    quarantine = quarantine or Quarantine(settings.reports_dir,
+                                          settings.max_failure_rate)
+    webcachedir = settings.webcache_dir
+
+    # Rangos excluidos.
+    avoided_ranges = settings.avoided_ranges
+
+    # Si no existe directorio...
+    if not os.path.exists(webcachedir):
+        msg = "No se ha encontrado el directorio caché, por favor ejecute el "
+        msg += "script 'request.py'."
+        print(msg)
+        exit(1)
+
+    # Almacén de la caché web, y filenames (sólo telegramas).
+    with metrics.stage("list"):
+        store = open_store(settings)
+        filenames = [f for f in store.files() if f.endswith(".htm")]
+    metrics.count("files_listed", len(filenames))
+
+    # Caché de telegramas parseados (se cargan sólo las firmas; los regis-
+    # tros se leen a medida que se analizan).
+    cache = None
+    cached = {}
+    if settings.parsed_cache and use_cache:
+        with metrics.stage("cache_load"):
+            cache = open_cache(settings)
+            cached = cache.signatures()
+
+    # Telegramas a analizar, firmas y telegramas a parsear (nuevos o modifi-
+    # cados).
+    toanalyze = []
+    signatures = {}
+    toparse = []
+
+    # Examinación de archivos.
+    with metrics.stage("examine"):
+        for filename in filenames:
+            try:
+                # Número de mesa de votación.
+                vtnumber = int(filename.split("_")[1].replace(".htm", ""))
+
+                # Análisis de exclusión de análisis.
+                avoid = False
+                for avoided_range in avoided_ranges:
+                    if vtnumber in avoided_range:
+                        # Se continúa examinando el siguiente elemento.
+                        continue
+
+                # Si la mesa se debe excluir del análisis.
+                if avoid:
+                    continue
+
+                toanalyze.append(filename)
+
+                if cache:
+                    signature = store.signature(filename)
+
+                    # Si el telegrama no cambió, se reutiliza el registro
+                    # cacheado.
+                    if cached.get(filename) == signature:
+                        continue
+
+                    signatures[filename] = signature
+
+                toparse.append(filename)
+            except:
+                error = traceback.format_exc()
+                print(error, end="", file=sys.stderr)
+                quarantine.add(filename, error)
+
+    cached = None
+
+    # La tasa de errores se calcula sobre todos los telegramas a analizar
+    # (los cacheados también cuentan como procesados, ver ingest).
+    quarantine.expect(len(toanalyze))
+    metrics.count("files_cached", len(toanalyze) - len(toparse))
+    metrics.count("files_to_parse", len(toparse))
+
+    # Ingesta (en el orden de los telegramas).
+    with metrics.stage("parse", hot=True):
+        for filename, record in ingest(toanalyze, toparse, jobs, settings,
+                                       store, cache, signatures, metrics,
+                                       quarantine):
+            yield record
+
+    store.close()
+    quarantine.close()
+
+    # Depuración de caché.
+    if cache:
+        with metrics.stage("cache_store"):
+            cache.prune(filenames)
+            cache.close()
+
+
+def analyze(settings, jobs=1, use_cache=True, metrics=None,
+            quarantine=None):
+    """Parsea (según corresponda) y analiza los telegramas de la caché web.
+
+    Args:
+        settings (Settings): configuración.
+        jobs (int): cantidad de procesos de parseo.
+        use_cache (bool): indica si se utiliza la caché de telegramas parsea-
+        dos.
+        metrics (Metrics): métricas de ejecución (por omisión, deshabilita-
+        das).
+        quarantine (Quarantine): cuarentena de telegramas con error (por omi-
+        sión, no interactiva).
+
+    Returns:
+        collection (VotingStationCollection): colección analizada."""
+
+    metrics = metrics or Metrics()
+
+    print("Analizando archivos...\n")
+
+    # Mesas de votación: a la colección sólo llegan los conteos extraídos.
+    voting_tables = [VotingStation.from_record(record) for record
+                     in read_records(settings, jobs, use_cache, metrics,
+                                     quarantine)]
+
+    # Análisis de mesas de votación.
+    with metrics.stage("analysis", hot=True):
+        collection = VotingStationCollection(voting_tables, settings)
+
+    metrics.count("stations", len(voting_tables))
+    for name, value in collection.metrics().items():
+        metrics.count(name, value)
+
+    return collection
+
+
+def main(args):
+    """Punto de entrada."""
+
+    options = parse_args(args)
+
+    utils.clearscreen()
+
+    # Lectura de configuración
+    settings = utils.settings()
+
+    metrics = Metrics(options.profile, options.cprofile)
+    quarantine = Quarantine(settings.reports_dir, settings.max_failure_rate,
+                            not options.batch)
+
+    collection = analyze(settings, options.jobs, not options.no_cache,
+                         metrics, quarantine)
+
+    with metrics.stage("report", hot=True):
+        collection.print_analysis()
+        collection.save_analysis()
+
+    path = metrics.save(os.path.join(settings.reports_dir,
+                                     "metrics_main.json"))
+    if path:
+        print("Métricas: {0}.".format(path))
+
+    if quarantine.files:
+        return 1
+
+
+# Entrada de aplicación.
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
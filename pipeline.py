@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: pipeline.py
+- Descripción: ejecuta, en forma solapada, la descarga, el parseo y el análisis
+de las mesas de votación (productor/consumidor). El motor asíncrono de descar-
+ga (productor) almacena cada telegrama en la caché web y lo encola en una cola
+acotada; el consumidor distribuye el parseo entre los procesos indicados y,
+apenas se completa el rango de mesas de un circuito (todas sus mesas descarga-
+das y parseadas, o inexistentes), agrega sus mesas a la colección y emite el
+análisis del circuito. Así, el primer resultado se obtiene luego de completar
+el primer circuito (y no luego de la descarga completa).
+Uso:
+    python3 pipeline.py [--jobs N] [--queue N] [--refresh] [--batch]
+Las mesas ya descargadas (según el manifiesto) no se vuelven a solicitar, sal-
+vo que se indique --refresh (ver requester.py). Los telegramas con error de
+parseo se registran en la cuarentena (ver lib/quarantine.py), como en main.py.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import argparse
+import asyncio
+import queue
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures import FIRST_COMPLETED
+
+import requester
+from lib import utils
+from lib.analyzer import VotingStation, VotingStationCollection
+from lib.download import Downloader
+from lib.quarantine import Quarantine
+from lib.store import SynchronizedStore, open_store
+from main import init_worker, open_cache, parse_file
+
+
+# Mensajes del productor: telegrama a parsear, registro ya parseado (de la ca-
+# ché de telegramas parseados) y mesa sin telegrama (inexistente, fallida o
+# posterior al fin del rango).
+STATION = "station"
+RECORD = "record"
+DONE = "done"
+
+# Tamaño por defecto de la cola de telegramas descargados.
+QUEUE_SIZE = 64
+
+
+def parse_args(args):
+    """Parsea argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Descarga y análisis de "
+                                     "mesas de votación (solapados).")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="cantidad de procesos de parseo (por omisión, 1)")
+    parser.add_argument("--queue", type=int, default=QUEUE_SIZE,
+                        help="tamaño máximo de la cola de telegramas "
+                        "(por omisión, {0})".format(QUEUE_SIZE))
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-consulta (con requests condicionales) las "
+                        "mesas ya descargadas")
+    parser.add_argument("--batch", action="store_true",
+                        help="no espera confirmación ante errores de parseo")
+    return parser.parse_args(args[1:])
+
+
+def produce(settings, vtranges, store, cached, report, channel, refresh):
+    """Descarga las mesas de los rangos indicados (motor asíncrono), y encola
+    un mensaje (tipo, (circuito, archivo), dato) por cada mesa. Si la cola está
+    llena, la descarga se detiene hasta que el consumidor la libere. Al fina-
+    lizar, encola None.
+
+    Args:
+        settings (Settings): configuración.
+        vtranges (list): rangos de mesas (VotingStationRange).
+        store (Manifest o PackedStore): almacén de la caché web.
+        cached (dict): registros parseados vigentes, por archivo.
+        report (Report): reporte de descargas fallidas.
+        channel (Queue): cola acotada de mensajes.
+        refresh (bool): re-consulta de mesas ya descargadas."""
+
+    def stored(circuit, filename):
+        """Encola una mesa almacenada en la caché web."""
+        key = (circuit, filename)
+        if filename in cached:
+            channel.put((RECORD, key, cached[filename]))
+        else:
+            channel.put((STATION, key, filename))
+
+    jobs = []
+    for index, vtrange in enumerate(vtranges):
+        for vtnumber in range(vtrange.init, vtrange.end+1):
+            circuit = vtrange.circuit
+            filename = requester.build_filename(circuit, vtnumber)
+
+            # Mesas ya descargadas (sin re-consulta): directo al consumidor.
+            if filename in store and not refresh:
+                stored(circuit, filename)
+                continue
+
+            url = requester.build_url(settings.url_path_format,
+                                      settings.province, settings.district,
+                                      circuit, str(vtnumber))
+            headers = requester.conditional_headers(store.get(filename))
+            jobs.append(((index, vtnumber, filename), url, headers))
+
+    # Primera mesa inexistente (404) de cada rango (ver requester).
+    ended = {}
+
+    def skip(key):
+        index, vtnumber, filename = key
+        if index in ended and vtnumber > ended[index]:
+            channel.put((DONE, (vtranges[index].circuit, filename), None))
+            return True
+        return False
+
+    def handler(key, url, status, headers, body):
+        index, vtnumber, filename = key
+        circuit = vtranges[index].circuit
+
+        if status == 404:
+            ended[index] = min(vtnumber, ended.get(index, vtnumber))
+            channel.put((DONE, (circuit, filename), None))
+            return
+
+        if requester.save(store, filename, url, status, headers,
+                          body) == requester.CHANGED:
+            cached.pop(filename, None)
+
+        # Las mesas sin cambios (re-consulta) se encolan igual, dado que for-
+        # man parte del circuito.
+        if filename in store:
+            stored(circuit, filename)
+        else:
+            channel.put((DONE, (circuit, filename), None))
+
+    def failure(key, url, error):
+        index, vtnumber, filename = key
+        circuit = vtranges[index].circuit
+        print("Error al obtener la mesa {0}: {1}".format(vtnumber, error))
+        report.add(circuit=circuit, station=vtnumber, url=url, error=error)
+
+        # Si existe una versión previa, se analiza esa.
+        if filename in store:
+            stored(circuit, filename)
+        else:
+            channel.put((DONE, (circuit, filename), None))
+
+    try:
+        downloader = Downloader(settings.host, settings.concurrency,
+                                settings.requests_per_second,
+                                policy=requester.retry_policy(settings),
+                                timeout=settings.timeout)
+        asyncio.run(downloader.run(jobs, handler, skip, failure))
+    finally:
+        channel.put(None)
+
+
+def main(args):
+    """Punto de entrada."""
+
+    options = parse_args(args)
+
+    utils.clearscreen()
+
+    # Lectura de configuración.
+    settings = utils.settings()
+    vtranges = requester.to_ranges(settings.ranges)
+
+    # Almacén de la caché web (compartido entre el productor y el consumidor)
+    # y reporte de descargas fallidas.
+    store = SynchronizedStore(open_store(settings))
+    report = requester.failures_report(settings)
+
+    # Caché de telegramas parseados: sólo se reutilizan los registros de los
+    # archivos que no cambiaron.
+    cache = None
+    cached = {}
+    if settings.parsed_cache:
+        cache = open_cache(settings)
+        for filename, (signature, record) in cache.load().items():
+            try:
+                if filename in store and \
+                   store.signature(filename) == signature:
+                    cached[filename] = record
+            except OSError:
+                continue
+
+    # Cantidad de mesas pendientes por circuito (una por mesa de cada rango).
+    remaining = {}
+    for vtrange in vtranges:
+        count = vtrange.end - vtrange.init + 1
+        remaining[vtrange.circuit] = remaining.get(vtrange.circuit, 0) + count
+
+    # Telegramas con error de parseo (la tasa se calcula sobre el total de
+    # mesas de los rangos).
+    quarantine = Quarantine(settings.reports_dir, settings.max_failure_rate,
+                            not options.batch)
+    quarantine.expect(sum(remaining.values()))
+
+    # Telegramas (archivo, resultado) por circuito.
+    results = {circuit: [] for circuit in remaining}
+
+    # Registros nuevos a almacenar en la caché de parseo.
+    parsed = []
+
+    collection = VotingStationCollection([], settings)
+
+    def complete(circuit):
+        """Agrega las mesas del circuito completo a la colección, y emite su
+        análisis. Con líneas de base de sección o distrito, la actualización
+        reanaliza los circuitos previos, por lo que también se reescriben sus
+        análisis (la exportación estructurada se escribe al finalizar)."""
+
+        vstations = []
+        for filename, future in results.pop(circuit):
+            record, error = future.result()
+
+            if error:
+                print(error, end="", file=sys.stderr)
+                quarantine.add(filename, error)
+                continue
+
+            quarantine.processed()
+            if filename not in cached:
+                parsed.append((filename, store.signature(filename), record))
+
+            vstations.append(VotingStation.from_record(record))
+
+        diff = collection.update(vstations)
+        collection.print_analysis(circuits=[circuit])
+        collection.save_analysis(list(dict.fromkeys([circuit] +
+                                                    diff.circuits)),
+                                 remarks=False)
+
+        msg = "Circuito {0} completo: {1} mesas analizadas.\n"
+        print(msg.format(circuit, len(vstations)))
+
+    # Cola acotada entre descarga (productor) y parseo (consumidor).
+    channel = queue.Queue(max(1, options.queue))
+
+    # Error del productor (se relanza luego de finalizar el consumo).
+    errors = []
+
+    def producer_main():
+        """Ejecuta el productor, registrando su error (si lo hubiera)."""
+        try:
+            produce(settings, vtranges, store, cached, report, channel,
+                    options.refresh)
+        except Exception as e:
+            errors.append(e)
+
+    producer = threading.Thread(target=producer_main, daemon=True)
+
+    executor = None
+    if options.jobs > 1:
+        executor = ProcessPoolExecutor(options.jobs, initializer=init_worker,
+                                       initargs=(settings,))
+
+    # Parseos en curso (acotados; sino, la cola se vaciaría hacia el executor).
+    inflight = set()
+
+    producer.start()
+    try:
+        while True:
+            message = channel.get()
+            if message is None:
+                break
+
+            kind, (circuit, filename), data = message
+
+            if kind == STATION:
+                inflight = {f for f in inflight if not f.done()}
+                if len(inflight) >= options.queue:
+                    wait(inflight, return_when=FIRST_COMPLETED)
+
+                if executor is not None:
+                    future = executor.submit(parse_file, data, settings)
+                else:
+                    future = Future()
+                    future.set_result(parse_file(data, settings, store))
+                results[circuit].append((filename, future))
+                inflight.add(future)
+            elif kind == RECORD:
+                future = Future()
+                future.set_result((data, None))
+                results[circuit].append((filename, future))
+
+            remaining[circuit] -= 1
+            if remaining[circuit] == 0:
+                complete(circuit)
+
+        producer.join()
+
+        # Circuitos no completados (por ejemplo, si el productor falló).
+        incomplete = [circuit for circuit, count in remaining.items()
+                      if count > 0]
+        if incomplete:
+            msg = "Circuitos no completados (no analizados): {0}."
+            print(msg.format(", ".join(incomplete)), file=sys.stderr)
+
+        if errors:
+            raise errors[0]
+
+        collection.export_remarks()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+        store.close()
+        report.close()
+        quarantine.close()
+
+        if cache:
+            cache.store(parsed)
+            cache.close()
+
+    if report.count > 0:
+        msg = "Descargas fallidas: {0} (ver {1})."
+        print(msg.format(report.count, report.path))
+
+    if report.count > 0 or quarantine.files or incomplete:
+        return 1
+
+
+# Entrada de aplicación.
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
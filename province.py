@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: province.py
+- Descripción: ejecuta la descarga y el análisis de varios distritos (o de toda
+la provincia), tratando a cada distrito como un shard independiente. Los dis-
+tritos se distribuyen entre los procesos indicados; cada proceso descarga y
+analiza un único distrito por vez (y se reinicia al finalizarlo), por lo que la
+memoria de cada proceso queda acotada a la de un distrito. Los resultados de
+cada distrito se escriben en un subdirectorio (con el nombre del distrito) de
+los directorios de caché web, de análisis y de reportes; la salida de consola
+de cada distrito, en el archivo "log.txt" de su directorio de reportes.
+Uso:
+    python3 province.py [--workers N] [--districts D1,D2] [--no-download]
+        [--refresh]
+Los distritos a procesar son los de la opción Districts (sección Connection),
+salvo que se indique --districts. Al finalizar, se emite un resumen provincial
+(mesas analizadas y con observaciones, por distrito y circuito), que se escribe
+en el archivo "summary.txt" del directorio de análisis.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import argparse
+import contextlib
+import multiprocessing
+import os
+import sys
+import traceback
+
+import requester
+from lib import utils
+from main import analyze
+
+
+# Nombre del archivo de resumen provincial (en el directorio de análisis).
+SUMMARY_FILE = "summary.txt"
+
+# Nombre del archivo de salida de consola de cada distrito (en su directorio
+# de reportes).
+LOG_FILE = "log.txt"
+
+
+def parse_args(args):
+    """Parsea argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Descarga y análisis de "
+                                     "mesas de votación, por distrito.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="cantidad de distritos procesados en paralelo "
+                        "(por omisión, 1)")
+    parser.add_argument("--districts",
+                        help="distritos a procesar, separados por coma (por "
+                        "omisión, los de la opción Districts)")
+    parser.add_argument("--no-download", action="store_true",
+                        help="analiza la caché web existente, sin descargar")
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-consulta (con requests condicionales) las "
+                        "mesas ya descargadas")
+    return parser.parse_args(args[1:])
+
+
+def run_district(settings, download=True, refresh=False):
+    """Descarga (según corresponda) y analiza un distrito. La salida de con-
+    sola se redirige al archivo de log del distrito.
+
+    Args:
+        settings (Settings): configuración del distrito (ver district_set-
+        tings).
+        download (bool): indica si se descargan las mesas del distrito.
+        refresh (bool): re-consulta de mesas ya descargadas.
+
+    Returns:
+        result (tuple): (distrito, resumen por circuito (ver VotingStationCol-
+        lection.summary), descargas fallidas, error). Si el procesamiento del
+        distrito falla, el resumen es None y el error contiene el traceback."""
+
+    if not os.path.exists(settings.reports_dir):
+        os.makedirs(settings.reports_dir)
+
+    failures = 0
+    log = open(os.path.join(settings.reports_dir, LOG_FILE), "w")
+    try:
+        with contextlib.redirect_stdout(log):
+            if download:
+                changed, report = requester.run(settings, refresh)
+                failures = report.count
+
+            collection = analyze(settings)
+            collection.save_analysis()
+
+        return settings.district, collection.summary(), failures, None
+    except (Exception, SystemExit):
+        return settings.district, None, failures, traceback.format_exc()
+    finally:
+        log.close()
+
+
+def shard(arguments):
+    """Procesa un shard (ver run_district), con argumentos empaquetados."""
+    return run_district(*arguments)
+
+
+def format_summary(results):
+    """Retorna el resumen provincial, como lista de líneas.
+
+    Args:
+        results (list): resultados de run_district, en el orden de los dis-
+        tritos."""
+
+    lines = []
+    stations = 0
+    remarked = 0
+    failed = []
+
+    for district, summary, failures, error in results:
+        if summary is None:
+            lines.append("Distrito {0}: error (ver log).".format(district))
+            failed.append(district)
+            continue
+
+        dstations = sum(count for circuit, count, remarks in summary)
+        dremarked = sum(remarks for circuit, count, remarks in summary)
+        stations += dstations
+        remarked += dremarked
+
+        msg = "Distrito {0}: {1} mesas analizadas, {2} con observaciones."
+        if failures:
+            msg += " Descargas fallidas: {3}."
+        lines.append(msg.format(district, dstations, dremarked, failures))
+
+        for circuit, count, remarks in summary:
+            msg = "    Circuito {0}: {1} mesas analizadas, {2} con observa"
+            msg += "ciones."
+            lines.append(msg.format(circuit, count, remarks))
+
+    msg = "Total: {0} mesas analizadas, {1} con observaciones, en {2} "
+    msg += "distritos."
+    lines.append(msg.format(stations, remarked, len(results) - len(failed)))
+
+    if failed:
+        lines.append("Distritos con error: {0}.".format(", ".join(failed)))
+
+    return lines
+
+
+def main(args):
+    """Punto de entrada."""
+
+    options = parse_args(args)
+
+    utils.clearscreen()
+
+    # Lectura de configuración.
+    settings = utils.settings()
+
+    if options.districts:
+        districts = []
+        for district in options.districts.split(","):
+            if district.strip() and district.strip() not in districts:
+                districts.append(district.strip())
+    else:
+        districts = [district for district, circuits, ranges
+                     in settings.districts]
+
+    # Configuración de cada distrito (shard).
+    shards = [(utils.district_settings(settings, district),
+               not options.no_download, options.refresh)
+              for district in districts]
+
+    print("Procesando {0} distritos...\n".format(len(shards)))
+
+    # Cada proceso atiende un único distrito (maxtasksperchild), por lo que
+    # la memoria de un distrito se libera al finalizarlo.
+    results = {}
+    if options.workers > 1:
+        pool = multiprocessing.Pool(min(options.workers, len(shards)),
+                                    maxtasksperchild=1)
+        try:
+            for result in pool.imap_unordered(shard, shards):
+                results[result[0]] = result
+                print("Distrito {0} finalizado.".format(result[0]))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for arguments in shards:
+            result = shard(arguments)
+            results[result[0]] = result
+            print("Distrito {0} finalizado.".format(result[0]))
+
+    # Resumen provincial (en el orden de los distritos).
+    results = [results[district] for district in districts]
+    for district, summary, failures, error in results:
+        if error:
+            print(error, end="", file=sys.stderr)
+
+    lines = format_summary(results)
+
+    if not os.path.exists(settings.statistics_dir):
+        os.makedirs(settings.statistics_dir)
+
+    file = open(os.path.join(settings.statistics_dir, SUMMARY_FILE), "w")
+    file.write("\n".join(lines) + "\n")
+    file.close()
+
+    print("\n" + "\n".join(lines))
+
+    if any(error or failures for district, summary, failures, error
+           in results):
+        return 1
+
+
+# Entrada de aplicación.
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -4,18 +4,49 @@
 - Nombre: requester.py
 - Descripción: obtiene el conjunto de documentos html, según los parámetros de
 la sección "Connection", para luego almacenarlos en el directorio (WebCache)
-especificado en el archivo de configuración.
+especificado en el archivo de configuración. Por omisión, las mesas se descar-
+gan de a una (con una pausa entre requests); si la opción Concurrency es mayor
+a 1, se utiliza el motor asíncrono (ver lib/download.py), con hasta Concurren-
+cy requests simultáneos y a lo sumo RequestsPerSecond requests por segundo.
+Los errores transitorios se reintentan (ver opción Retries); las descargas que
+fallan en forma definitiva se registran en el reporte download_failures.jsonl
+(directorio Reports), sin interrumpir la ejecución. Las descargas completas se
+registran en el manifiesto de la caché web (ver lib/manifest.py), que se uti-
+liza para decidir qué mesas restan descargar. Con la opción WebCacheLayout =
+packed, los telegramas se almacenan empaquetados (ver lib/store.py).
+
+Con la opción --refresh (re-consulta durante el escrutinio), las mesas ya des-
+cargadas se vuelven a solicitar mediante requests condicionales (If-None-Match
+e If-Modified-Since, según los validadores ETag y Last-Modified registrados en
+el manifiesto): las respuestas 304 (y las de contenido idéntico) se consideran
+sin cambios, y sólo se reescriben los telegramas modificados. En ambos modos,
+las mesas escritas en la ejecución se listan en changed_stations.txt (direc-
+torio Reports), para que el análisis posterior sepa qué mesas rehacer.
+
+Con la opción --profile, se registran métricas por etapa y de cada request
+(latencia, bytes y status, ver lib/metrics.py) en el archivo
+metrics_requester.json (directorio Reports); con --cprofile, además, se vuelca
+el perfil (cProfile) de la descarga.
 - Autor: Agustín González.
 - Modificado: 05/11/17
 """
 
+import argparse
+import asyncio
 import os
 import sys
 import time
-import http.client
 from lib import utils
+from lib.download import Downloader, DownloadError, RetryPolicy, fetch
+from lib.metrics import Metrics
+from lib.store import open_store
 
 
+# Mesas sin cambios (ver save).
+UNCHANGED = "unchanged"
+# Mesas nuevas o modificadas (ver save).
+CHANGED = "changed"
+
 
 class VotingStationRange(object):
     """Rango de mesas de circuito."""
@@ -28,34 +59,14 @@ class VotingStationRange(object):
 
 def parse_ranges(scircuits, sranges):
     """Realiza parseo de str de config de rangos a lista."""
+    return to_ranges(utils.parse_ranges(scircuits, sranges))
 
-    lcircuits = [x.strip() for x in scircuits.split(",")]
-    lranges = [x.strip() for x in sranges.split(",")]
-
-    if(len(lcircuits) != len(lranges)):
-        exit("La cantidad de circuitos y de rangos no coincide.")
-
-    # Lista de objetos.
-    ranges = []
-
-    # Recorrida de circuitos.
-    for circuit in lcircuits:
-        # Pop de ranges y split para obtención de subrangos.
-        subranges = lranges.pop(0).split(" ")
-
-        # Exploración de subrangos
-        for subrange in subranges:
-            splitted = subrange.split("-")
-            init = int(splitted[0])
-            end = int(splitted[1])
-
-            # Creación de vtrange.
-            vtrange = VotingStationRange(circuit, init, end)
-
-            # Append a list.
-            ranges.append(vtrange)
 
-    return ranges
+def to_ranges(ranges):
+    """Convierte tuplas (circuito, inicio, fin) de la configuración a lista
+    de VotingStationRange."""
+    return [VotingStationRange(circuit, init, end)
+            for circuit, init, end in ranges]
 
 
 def build_url(url_path_format, province, district, circuit, vtnumber):
@@ -72,87 +83,306 @@ def build_url(url_path_format, province, district, circuit, vtnumber):
     return url
 
 
-def save(html, path):
-    """Almacena html en path indicado."""
-    fhtml = open(path, "w")
-    fhtml.write(html)
-    fhtml.close()
+def build_filename(circuit, vtnumber):
+    """Retorna nombre de archivo (en la caché web) de la mesa indicada."""
+    return str(circuit) + "_" + str(vtnumber) + ".htm"
 
 
-def main(args):
-    utils.clearscreen()
+def failures_report(settings):
+    """Retorna el reporte de descargas fallidas."""
+    return utils.Report(settings.reports_dir + "/download_failures.jsonl")
 
-    # Lectura de configuración
-    cfg = utils.cfg()
 
-    section = "Connection"
-    # Host.
-    host = cfg[section]["Host"]
+def retry_policy(settings):
+    """Retorna la política de reintentos de la configuración."""
+    return RetryPolicy(settings.retries, settings.backoff_base,
+                       settings.backoff_max)
 
-    # URL.
-    url_path_format = cfg[section]["URLPathFormat"]
 
-    # Prov. number
-    province = cfg[section]["Province"]
+def conditional_headers(entry):
+    """Retorna los headers de request condicional (If-None-Match e If-Modi-
+    fied-Since) según los validadores de la entrada de manifiesto indicada."""
 
-    # Distrito.
-    district = cfg[section]["District"]
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
 
-    # Rangos de mesa por circuito.
-    vtranges = parse_ranges(cfg[section]["Circuits"],
-                            cfg[section]["Ranges"])
 
-    # Directorio.
-    dir = cfg["Dirs"]["WebCache"]
+def save(store, filename, url, status, headers, body):
+    """Almacena la respuesta de una mesa, sólo si su contenido cambió.
+
+    Args:
+        store (Manifest o PackedStore): almacén de la caché web.
+        filename (string): nombre de archivo de la mesa.
+        url (string): url de descarga.
+        status (int): status de la respuesta (200 o 304).
+        headers (dict): headers de la respuesta.
+        body (bytes): cuerpo de la respuesta.
+
+    Returns:
+        result (string): UNCHANGED (respuesta 304, o contenido idéntico al
+        registrado) o CHANGED (mesa nueva o modificada)."""
+
+    if status == 304 or store.matches(filename, body):
+        return UNCHANGED
 
-    # Creación de directorio (si no existe no lo vuelve a crear.)
-    utils.makedirs(dir)
+    # Validadores para requests condicionales posteriores.
+    validators = {}
+    if "etag" in headers:
+        validators["etag"] = headers["etag"]
+    if "last-modified" in headers:
+        validators["last_modified"] = headers["last-modified"]
+
+    store.store(filename, url, status, body, **validators)
+    return CHANGED
+
+
+def save_changed(settings, changed):
+    """Escribe la lista de mesas (archivos) escritas en la ejecución.
+
+    Returns:
+        path (string): path del archivo generado."""
+
+    utils.makedirs(settings.reports_dir)
+    path = os.path.join(settings.reports_dir, "changed_stations.txt")
+    file = open(path, "w")
+    for filename in changed:
+        file.write(filename + "\n")
+    file.close()
+    return path
+
+
+def download(settings, vtranges, store, report, refresh=False,
+             metrics=None):
+    """Descarga las mesas de los rangos indicados, de a una.
+
+    Args:
+        settings (Settings): configuración.
+        vtranges (list): rangos de mesas (VotingStationRange).
+        store (Manifest o PackedStore): almacén de la caché web.
+        report (Report): reporte de descargas fallidas.
+        refresh (bool): si es True, las mesas ya descargadas se re-consultan
+        mediante requests condicionales.
+        metrics (Metrics): métricas de ejecución (ver lib/download.py).
+
+    Returns:
+        changed (list): archivos de las mesas nuevas o modificadas."""
+
+    host = settings.host
+    url_path_format = settings.url_path_format
+    province = settings.province
+    district = settings.district
+    policy = retry_policy(settings)
+    changed = []
 
     # Recorrida de rangos de mesa.
     for vtrange in vtranges:
         # Recorrida de mesas.
         for vtnumber in range(vtrange.init, vtrange.end+1):
 
-            # 1. Verificación de existencia de path.
+            # 1. Verificación de descarga previa (según manifiesto).
             print("Mesa {0} - ".format(vtnumber), end="")
             circuit = vtrange.circuit
-            path = dir + "/" + str(circuit) + "_" + str(vtnumber) + ".htm"
-            os.path.exists(dir)
+            filename = build_filename(circuit, vtnumber)
 
-            # Si existe el path.
-            if os.path.exists(path):
+            # Si ya fue descargada (y no se re-consulta).
+            if filename in store and not refresh:
                 print("Ya existe en caché.")
                 # No se realiza conexión.
                 continue
 
-            # 2. Request a host.
-            connection = http.client.HTTPConnection(host, 80)
-            connection.connect()
-
+            # 2. Request a host (con reintentos).
             url = build_url(url_path_format, province, district,
                             circuit, str(vtnumber))
-            connection.request("GET", url)
 
             # 3. Get de response.
             print("Obteniendo: " + url)
-            response = connection.getresponse()
+            try:
+                headers = conditional_headers(store.get(filename))
+                status, headers, body = fetch(host, url, policy,
+                                              settings.timeout,
+                                              headers=headers,
+                                              metrics=metrics)
+            except DownloadError as e:
+                print("Error al obtener la mesa {0}: {1}".format(vtnumber, e))
+                report.add(circuit=circuit, station=vtnumber, url=url,
+                           error=str(e))
+                continue
 
-            # 4. Verificación de status.
-            if(response.status == 404):
+            # 4. Verificación de status (404: fin del rango).
+            if(status == 404):
                 msg = "No existe response a partir de la mesa {0}."
                 print(msg.format(vtnumber))
-                input("Presione ENTER para continuar...")
                 break
 
-            # 5. HTML (se utiliza decode, ya que read retorna bytes).
-            html = response.read().decode("utf-8")
-
-            # 6. Save de html en path circuit_vtnumber
-            save(html, path)
+            # 5. Save (atómico) de html en path circuit_vtnumber, y registro
+            # en manifiesto (sólo si cambió).
+            if save(store, filename, url, status, headers,
+                    body) == CHANGED:
+                changed.append(filename)
+            else:
+                print("Mesa {0} - Sin cambios.".format(vtnumber))
 
-            # 7. Sleep para evitar posible baneo de IP.
+            # 6. Sleep para evitar posible baneo de IP.
             time.sleep(0.1)
 
+    return changed
+
+
+def download_async(settings, vtranges, store, report, refresh=False,
+                   metrics=None):
+    """Descarga las mesas de los rangos indicados mediante el motor asíncro-
+    no: hasta settings.concurrency requests simultáneos (sobre conexiones
+    keep-alive) y a lo sumo settings.requests_per_second requests por segun-
+    do. Cada html se almacena apenas se recibe. Argumentos y retorno, ídem
+    download."""
+
+    # Mesas a descargar: ((índice de rango, mesa, archivo), url, headers).
+    jobs = []
+    changed = []
+    for index, vtrange in enumerate(vtranges):
+        for vtnumber in range(vtrange.init, vtrange.end+1):
+            circuit = vtrange.circuit
+            filename = build_filename(circuit, vtnumber)
+
+            if filename in store and not refresh:
+                print("Mesa {0} - Ya existe en caché.".format(vtnumber))
+                continue
+
+            url = build_url(settings.url_path_format, settings.province,
+                            settings.district, circuit, str(vtnumber))
+            headers = conditional_headers(store.get(filename))
+            jobs.append(((index, vtnumber, filename), url, headers))
+
+    # Primera mesa inexistente (404) de cada rango: las mesas posteriores del
+    # rango no se solicitan.
+    ended = {}
+
+    def skip(key):
+        index, vtnumber, filename = key
+        return index in ended and vtnumber > ended[index]
+
+    def handler(key, url, status, headers, body):
+        index, vtnumber, filename = key
+        print("Mesa {0} - Obtenido: {1}".format(vtnumber, url))
+
+        if status == 404:
+            msg = "No existe response a partir de la mesa {0}."
+            print(msg.format(vtnumber))
+            ended[index] = min(vtnumber, ended.get(index, vtnumber))
+            return
+
+        if save(store, filename, url, status, headers, body) == CHANGED:
+            changed.append(filename)
+        else:
+            print("Mesa {0} - Sin cambios.".format(vtnumber))
+
+    def failure(key, url, error):
+        index, vtnumber, filename = key
+        print("Error al obtener la mesa {0}: {1}".format(vtnumber, error))
+        report.add(circuit=vtranges[index].circuit, station=vtnumber, url=url,
+                   error=error)
+
+    downloader = Downloader(settings.host, settings.concurrency,
+                            settings.requests_per_second,
+                            policy=retry_policy(settings),
+                            timeout=settings.timeout, metrics=metrics)
+    asyncio.run(downloader.run(jobs, handler, skip, failure))
+
+    # Orden de rangos y mesas (independiente del orden de llegada).
+    order = {key[2]: i for i, (key, url, headers) in enumerate(jobs)}
+    return sorted(changed, key=order.get)
+
+
+def parse_args(args):
+    """Parsea argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Descarga de telegramas.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-consulta (con requests condicionales) las "
+                        "mesas ya descargadas")
+    parser.add_argument("--profile", action="store_true",
+                        help="registra métricas por etapa y de cada request "
+                        "(JSON)")
+    parser.add_argument("--cprofile", default="",
+                        help="archivo de volcado de cProfile (implica "
+                        "--profile)")
+    return parser.parse_args(args[1:])
+
+
+def run(settings, refresh=False, metrics=None):
+    """Descarga las mesas de la configuración indicada.
+
+    Args:
+        settings (Settings): configuración.
+        refresh (bool): re-consulta de mesas ya descargadas.
+        metrics (Metrics): métricas de ejecución (por omisión, deshabilita-
+        das).
+
+    Returns:
+        result (tuple): (mesas nuevas o modificadas, reporte de descargas
+        fallidas)."""
+
+    metrics = metrics or Metrics()
+
+    # Rangos de mesa por circuito.
+    vtranges = to_ranges(settings.ranges)
+
+    # Almacén de la caché web, según el layout de la configuración (crea el
+    # directorio, si no existe).
+    with metrics.stage("open_store"):
+        store = open_store(settings)
+    metrics.count("stations_stored", len(store))
+
+    # Reporte de descargas fallidas.
+    report = failures_report(settings)
+
+    with metrics.stage("download", hot=True):
+        if settings.concurrency > 1:
+            changed = download_async(settings, vtranges, store, report,
+                                     refresh, metrics)
+        else:
+            changed = download(settings, vtranges, store, report, refresh,
+                               metrics)
+
+    store.close()
+    report.close()
+    metrics.count("stations_changed", len(changed))
+    metrics.count("download_failures", report.count)
+
+    # Lista de mesas nuevas o modificadas.
+    path = save_changed(settings, changed)
+    print("Mesas nuevas o modificadas: {0} (ver {1}).".format(len(changed),
+                                                             path))
+
+    return changed, report
+
+
+def main(args):
+    options = parse_args(args)
+
+    utils.clearscreen()
+
+    # Lectura de configuración
+    settings = utils.settings()
+
+    metrics = Metrics(options.profile, options.cprofile)
+
+    changed, report = run(settings, options.refresh, metrics)
+
+    path = metrics.save(os.path.join(settings.reports_dir,
+                                     "metrics_requester.json"))
+    if path:
+        print("Métricas: {0}.".format(path))
+
+    if report.count > 0:
+        msg = "Descargas fallidas: {0} (ver {1})."
+        print(msg.format(report.count, report.path))
+        return 1
+
 
 # Entrada de aplicación.
 if __name__ == "__main__":
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: conftest.py
+- Descripción: configuración común de las pruebas (pytest). Las pruebas se
+ejecutan desde el directorio del analizador (la configuración se lee de
+settings.ini, ver lib/utils.py), por lo que este se agrega al path de módulos.
+Uso:
+    python3 -m pytest tests
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmark import synthetic_records  # noqa: E402
+from lib import utils  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def root_dir(monkeypatch):
+    """Ejecuta cada prueba desde el directorio del analizador."""
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture(scope="session")
+def settings():
+    """Configuración del analizador (settings.ini)."""
+    return utils.settings(os.path.join(ROOT, utils.SETTINGS_FILE))
+
+
+@pytest.fixture(scope="session")
+def records(settings):
+    """Registros de mesas sintéticas (4000 mesas en 16 circuitos)."""
+    return synthetic_records(settings, 4000, 16)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: test_baselines.py
+- Descripción: pruebas de las líneas de base (opción Baselines): el motor
+numpy debe obtener las mismas observaciones que el motor python, con una y
+con todas las líneas de base.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import pytest
+
+from benchmark import analyze_records
+from lib import utils
+
+pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("baselines", [("circuit",), utils.BASELINES])
+def test_engines(settings, records, baselines):
+    """Ambos motores obtienen las mismas observaciones."""
+
+    remarks = [analyze_records(records, settings._replace(
+        baselines=baselines, engine=engine, estimator="exact")
+    ).remark_records() for engine in ("python", "numpy")]
+
+    assert remarks[0] == remarks[1]
+    assert any(record[6] for record in remarks[0])
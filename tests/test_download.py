@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: test_download.py
+- Descripción: pruebas del motor de descarga asíncrono (ver lib/download.py).
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import asyncio
+import time
+
+from benchmark import refresh_local
+
+
+def test_not_modified():
+    """Las re-consultas condicionales respondidas con 304 Not Modified, sin
+    Content-Length y en conexiones keep-alive, se procesan sin esperar el
+    cierre de la conexión (es decir, antes del timeout)."""
+
+    requests, timeout = 200, 2
+
+    start = time.perf_counter()
+    statuses, failures = asyncio.run(refresh_local(requests, 4, timeout))
+    seconds = time.perf_counter() - start
+
+    assert failures == []
+    assert statuses == [304] * requests
+    assert seconds < timeout
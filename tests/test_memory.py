@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: test_memory.py
+- Descripción: pruebas de la memoria de las mesas de votación y de la in-
+gesta, medida mediante tracemalloc.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import pickle
+import subprocess
+import tracemalloc
+
+import pytest
+
+from benchmark import circuit_names, legacy_station, measure_ingest
+from lib.analyzer import VotingStation
+from lib.store import open_store
+from lib.synthetic import TelegramGenerator
+
+# Reducción mínima de la memoria por mesa respecto de la representación pre-
+# via (ver benchmark.legacy_station).
+RATIO = 10
+
+# Crecimiento máximo (en bytes por mesa agregada) de la memoria transitoria
+# de la ingesta: un telegrama sintético ocupa unos 1400 bytes, y sólo se ad-
+# mite el crecimiento de los nombres de archivo y sus firmas.
+INGEST_LIMIT = 512
+
+
+def station_memory(cls, blobs):
+    """Retorna la memoria por mesa de las mesas cargadas desde los registros
+    serializados indicados."""
+
+    tracemalloc.start()
+    try:
+        vstations = [cls.from_record(pickle.loads(blob)) for blob in blobs]
+        return tracemalloc.get_traced_memory()[0] / len(vstations)
+    finally:
+        tracemalloc.stop()
+
+
+def test_station_memory(records):
+    """La mesa compacta ocupa al menos RATIO veces menos memoria que la
+    representación previa."""
+
+    try:
+        LegacyStation = legacy_station()
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip("representación previa no disponible (repositorio git)")
+
+    # Registros serializados (como en la caché de registros parseados), para
+    # que las mesas no compartan strings con los registros.
+    blobs = [pickle.dumps(record) for record in records]
+
+    legacy = station_memory(LegacyStation, blobs)
+    assert legacy / station_memory(VotingStation, blobs) >= RATIO
+
+
+def test_ingest_memory(settings, tmp_path):
+    """La memoria transitoria de la ingesta (sin y con caché de parseo) no
+    crece con la cantidad de telegramas."""
+
+    sizes = (1000, 4000)
+    transient = {}
+
+    for nstations in sizes:
+        temp = tmp_path / str(nstations)
+        dsettings = settings._replace(
+            webcache_dir=str(temp / "response"),
+            parsed_cache=str(temp / "parsed.sqlite"))
+
+        generator = TelegramGenerator(circuit_names(nstations // 250), 250,
+                                      settings.party_values)
+        store = open_store(dsettings)
+        generator.write(store)
+        store.close()
+
+        for run in ("cold", "warm"):
+            retained, extra = measure_ingest(dsettings, 1)
+            transient.setdefault(run, []).append(extra)
+
+    for run, values in transient.items():
+        growth = (values[-1] - values[0]) / (sizes[-1] - sizes[0])
+        assert growth <= INGEST_LIMIT, run
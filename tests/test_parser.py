@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: test_parser.py
+- Descripción: pruebas de los parsers de telegramas, la mesa compacta y la
+ingesta como flujo, con los telegramas de referencia de fixtures/telegrams
+(con el formato de las páginas del sitio) y sus registros esperados (archivo
+records.json).
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import json
+import os
+import shutil
+
+import pytest
+
+from benchmark import parse_bs4, parse_lxml
+from lib.analyzer import VotingCategories, VotingStation
+from lib.store import open_store
+from main import ingest
+
+# Telegramas de referencia, y registros esperados de cada uno (JSON, en el
+# mismo directorio).
+FIXTURES_DIR = os.path.join("fixtures", "telegrams")
+FIXTURE_RECORDS = "records.json"
+
+
+def as_record(value):
+    """Convierte un registro leído de JSON (listas) en registro (tuplas)."""
+    if isinstance(value, list):
+        return tuple(as_record(item) for item in value)
+    return value
+
+
+def expected_records():
+    """Retorna los registros esperados (filename -> registro)."""
+    with open(os.path.join(FIXTURES_DIR, FIXTURE_RECORDS)) as file:
+        return {filename: as_record(record)
+                for filename, record in json.load(file).items()}
+
+
+def read_fixture(filename):
+    """Retorna el contenido de un telegrama de referencia."""
+    with open(os.path.join(FIXTURES_DIR, filename), "rb") as file:
+        return file.read()
+
+
+EXPECTED = sorted(expected_records().items())
+
+
+@pytest.mark.parametrize("filename, record", EXPECTED)
+def test_parsers(settings, filename, record):
+    """Ambos parsers (y el de la configuración) obtienen el registro espera-
+    do."""
+
+    html = read_fixture(filename)
+    assert parse_bs4([html], settings.party_keys)[0] == record
+    assert parse_lxml([html], settings.party_keys)[0] == record
+    assert VotingStation.parse_record(html, settings) == record
+
+
+@pytest.mark.parametrize("filename, record", EXPECTED)
+def test_compact_station(filename, record):
+    """La mesa compacta conserva el registro y los conteos."""
+
+    vstation = VotingStation.from_record(record)
+    assert vstation.to_record() == record
+    for vtype, counts in record[5]:
+        for key, count in zip(VotingCategories.keys, counts):
+            assert vstation.count(vtype, key) == count
+
+
+def test_ingest(settings, tmp_path):
+    """La ingesta como flujo (ver main.ingest), desde una caché web tempo-
+    ral, obtiene los registros esperados."""
+
+    expected = dict(EXPECTED)
+    filenames = sorted(expected)
+
+    webcache = tmp_path / "response"
+    webcache.mkdir()
+    for filename in filenames:
+        shutil.copy(os.path.join(FIXTURES_DIR, filename), str(webcache))
+
+    settings = settings._replace(webcache_dir=str(webcache),
+                                 webcache_layout="directory",
+                                 reports_dir=str(tmp_path / "reports"))
+    store = open_store(settings)
+    try:
+        ingested = dict(ingest(filenames, filenames, 1, settings, store))
+    finally:
+        store.close()
+
+    assert ingested == expected
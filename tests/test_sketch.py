@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: test_sketch.py
+- Descripción: pruebas del estimador aproximado de cuartiles (t-digest, ver
+lib/sketch.py).
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import bisect
+import math
+import random
+
+from lib.sketch import SketchStatistics, TDigest
+
+
+def rank_error(ordered, value, q):
+    """Retorna el error de rango (en fracción de la muestra ordenada) del valor
+    indicado, como estimación del cuantil q."""
+    n = len(ordered)
+    low = bisect.bisect_left(ordered, value) / n
+    high = bisect.bisect_right(ordered, value) / n
+    if low <= q <= high:
+        return 0
+    return min(abs(low - q), abs(high - q))
+
+
+def test_merged_quartiles():
+    """Una muestra resumida por varios sketches (uno por proceso) luego com-
+    binados estima cada cuartil con un error de rango menor a la cota docu-
+    mentada."""
+
+    rnd = random.Random(0)
+    sample = [max(1, int(rnd.gauss(40, 15))) for _ in range(200000)]
+    compression = 100
+    nworkers = 4
+
+    digests = [TDigest(compression) for _ in range(nworkers)]
+    for i, digest in enumerate(digests):
+        digest.update(sample[i::nworkers])
+    for digest in digests[1:]:
+        digests[0].merge(digest)
+
+    ordered = sorted(sample)
+    estimated = SketchStatistics(digests[0])
+    for q, value in zip((0.25, 0.5, 0.75), estimated.quartiles()):
+        bound = 2 * math.pi * math.sqrt(q * (1 - q)) / compression
+        assert rank_error(ordered, value, q) <= bound
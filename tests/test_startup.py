@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: test_startup.py
+- Descripción: pruebas de la importación de los subcomandos livianos de
+cli.py (ver benchmark.import_times).
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import pytest
+
+from benchmark import STARTUP_COMMANDS, import_times
+
+# Módulos que los subcomandos livianos no deben importar.
+HEAVY_MODULES = ("bs4", "lxml", "numpy")
+
+
+@pytest.mark.parametrize("command", STARTUP_COMMANDS)
+def test_light_imports(command):
+    """Los subcomandos livianos no importan el parser html ni NumPy."""
+
+    times = import_times(["cli.py"] + list(command))
+    assert times
+    assert sorted(module for module in times
+                  if module.split(".")[0] in HEAVY_MODULES) == []
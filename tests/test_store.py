@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: test_store.py
+- Descripción: pruebas de los layouts de caché web (ver lib/store.py).
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+from benchmark import circuit_names, read_files, read_store
+from lib.store import PackedStore, open_store
+from lib.synthetic import TelegramGenerator
+
+
+def test_packed_store(settings, tmp_path):
+    """Los telegramas leídos del almacén empaquetado son los mismos que los
+    del layout de directorio."""
+
+    dir = str(tmp_path / "response")
+    generator = TelegramGenerator(circuit_names(2), 50,
+                                  settings.party_values)
+    store = open_store(settings._replace(webcache_dir=dir,
+                                         webcache_layout="directory"))
+    generator.write(store)
+    filenames = sorted(store.files())
+    store.close()
+
+    contents = read_files(dir, filenames)
+    store = PackedStore(str(tmp_path / "packed"))
+    for filename, content in zip(filenames, contents):
+        store.store(filename, "", 200, content)
+    store.close()
+
+    store = PackedStore(str(tmp_path / "packed"))
+    try:
+        assert read_store(store, filenames) == contents
+    finally:
+        store.close()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: test_sweep.py
+- Descripción: pruebas de la verificación de varias ponderaciones de IQR en
+una única pasada (ver VotingStationCollection.sweep).
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+from benchmark import analyze_records
+
+# Ponderaciones verificadas.
+PONDERATIONS = (0.5, 1.0, 1.5, 3.0)
+
+
+def sweep_reference(collection):
+    """Retorna, a partir del análisis completo de una colección, los regis-
+    tros equivalentes a los de VotingStationCollection.sweep (sin la ponde-
+    ración)."""
+
+    stations = {}
+    for record in collection.remark_records():
+        circuit, section, station, kind = record[:4]
+        if kind in ("lower", "upper"):
+            counts = stations.setdefault((circuit, section, station), [0, 0])
+            counts[kind == "upper"] += 1
+
+    summary = []
+    for circuit, count, remarked in collection.summary():
+        rows = [c for key, c in stations.items() if key[0] == circuit]
+        summary.append((circuit, count, remarked, len(rows),
+                        sum(c[0] for c in rows), sum(c[1] for c in rows)))
+
+    return summary, sorted(key + tuple(c) for key, c in stations.items())
+
+
+def test_sweep(settings, records):
+    """La pasada única obtiene, para cada ponderación, las mismas mesas con
+    observaciones y con valores atípicos que un análisis completo."""
+
+    summary, stations = analyze_records(records,
+                                        settings).sweep(PONDERATIONS)
+
+    for ponderation in PONDERATIONS:
+        collection = analyze_records(records, settings._replace(
+            iqr_ponderation=ponderation))
+
+        obtained = ([row[1:] for row in summary if row[0] == ponderation],
+                    sorted(row[1:] for row in stations
+                           if row[0] == ponderation))
+        assert obtained == sweep_reference(collection)
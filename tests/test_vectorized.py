@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+- Nombre: test_vectorized.py
+- Descripción: pruebas del motor de estadísticas vectorizado (ver lib/vecto-
+rized.py), que debe obtener los mismos límites que StatisticsAnalyzer.
+- Autor: Agustín González.
+- Modificado: 17/10/26.
+"""
+
+import pytest
+
+from benchmark import bench_numpy, bench_python, pack, synthetic_counts
+
+pytest.importorskip("numpy")
+
+
+def test_limits():
+    """Ambos motores calculan los mismos límites por circuito, tipo de voto
+    y categoría."""
+
+    ncircuits = 20
+    counts, labels = synthetic_counts(5000, ncircuits)
+    packed = pack(counts, labels)
+
+    assert bench_numpy(packed[0], packed[1], ncircuits) == \
+        bench_python(counts, labels, ncircuits)